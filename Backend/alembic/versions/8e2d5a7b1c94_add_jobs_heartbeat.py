@@ -0,0 +1,28 @@
+"""Add jobs.heartbeat_on so any worker can fail jobs of a dead one
+
+Revision ID: 8e2d5a7b1c94
+Revises: 4f7a2b9c8d10
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d5a7b1c94'
+down_revision: Union[str, Sequence[str], None] = '4f7a2b9c8d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('heartbeat_on', sa.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'heartbeat_on')
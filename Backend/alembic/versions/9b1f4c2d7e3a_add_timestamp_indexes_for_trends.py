@@ -0,0 +1,36 @@
+"""Add timestamp indexes for catalog trends
+
+Revision ID: 9b1f4c2d7e3a
+Revises: 70de9e06c549
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f4c2d7e3a'
+down_revision: Union[str, Sequence[str], None] = '70de9e06c549'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_offerings_created_on'), 'offerings', ['created_on'], unique=False)
+    op.create_index(op.f('ix_offerings_updated_on'), 'offerings', ['updated_on'], unique=False)
+    op.create_index(op.f('ix_activities_created_on'), 'activities', ['created_on'], unique=False)
+    op.create_index(op.f('ix_activities_updated_on'), 'activities', ['updated_on'], unique=False)
+    op.create_index(op.f('ix_offering_activities_created_on'), 'offering_activities', ['created_on'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_offering_activities_created_on'), table_name='offering_activities')
+    op.drop_index(op.f('ix_activities_updated_on'), table_name='activities')
+    op.drop_index(op.f('ix_activities_created_on'), table_name='activities')
+    op.drop_index(op.f('ix_offerings_updated_on'), table_name='offerings')
+    op.drop_index(op.f('ix_offerings_created_on'), table_name='offerings')
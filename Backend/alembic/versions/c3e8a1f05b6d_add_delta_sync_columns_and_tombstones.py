@@ -0,0 +1,84 @@
+"""Add updated_on columns and tombstones for delta sync
+
+Revision ID: c3e8a1f05b6d
+Revises: 9b1f4c2d7e3a
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f05b6d'
+down_revision: Union[str, Sequence[str], None] = '9b1f4c2d7e3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables whose deletes are recorded, with their primary key columns
+TOMBSTONE_TABLES = {
+    'offerings': ['offering_id'],
+    'activities': ['activity_id'],
+    'offering_activities': ['offering_id', 'activity_id'],
+    'staffing_details': ['staffing_id'],
+    'wbs': ['wbs_id'],
+    'pricing_details': ['country', 'role', 'band'],
+}
+
+UPDATED_ON_TABLES = ['offering_activities', 'staffing_details', 'wbs', 'pricing_details']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in UPDATED_ON_TABLES:
+        op.add_column(table, sa.Column('updated_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True))
+        op.create_index(op.f(f'ix_{table}_updated_on'), table, ['updated_on'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('tombstone_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('entity_type', sa.String(length=64), nullable=False),
+    sa.Column('entity_key', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('deleted_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('tombstone_id')
+    )
+    op.create_index(op.f('ix_tombstones_deleted_on'), 'tombstones', ['deleted_on'], unique=False)
+
+    # Triggers rather than ORM events so ON DELETE CASCADE and bulk deletes
+    # leave tombstones too. Trigger arguments are the primary key columns.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+        DECLARE
+            old_row jsonb := to_jsonb(OLD);
+            key_columns jsonb := '{}'::jsonb;
+            key_column text;
+        BEGIN
+            FOREACH key_column IN ARRAY TG_ARGV LOOP
+                key_columns := key_columns || jsonb_build_object(key_column, old_row -> key_column);
+            END LOOP;
+            INSERT INTO tombstones (entity_type, entity_key) VALUES (TG_TABLE_NAME, key_columns);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table, key_columns in TOMBSTONE_TABLES.items():
+        arguments = ', '.join(f"'{column}'" for column in key_columns)
+        op.execute(
+            f"CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE PROCEDURE record_tombstone({arguments})"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TOMBSTONE_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_tombstone ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_tombstone()")
+    op.drop_index(op.f('ix_tombstones_deleted_on'), table_name='tombstones')
+    op.drop_table('tombstones')
+    for table in reversed(UPDATED_ON_TABLES):
+        op.drop_index(op.f(f'ix_{table}_updated_on'), table_name=table)
+        op.drop_column(table, 'updated_on')
@@ -9,7 +9,11 @@ from app.api.v1.endpoints import (
     staffing,
     pricing,
     wbs,
-    admin_stats
+    admin_stats,
+    sync,
+    events,
+    jobs,
+    batch
 )
 
 api_router = APIRouter()
@@ -26,4 +30,8 @@ api_router.include_router(activities.router, tags=["activities"])
 api_router.include_router(staffing.router, tags=["staffing"])
 api_router.include_router(pricing.router, tags=["pricing"])
 api_router.include_router(wbs.router, tags=["wbs"])
-api_router.include_router(admin_stats.router, tags=["admin"])
\ No newline at end of file
+api_router.include_router(admin_stats.router, tags=["admin"])
+api_router.include_router(sync.router, tags=["sync"])
+api_router.include_router(events.router, tags=["events"])
+api_router.include_router(jobs.router, tags=["jobs"])
+api_router.include_router(batch.router, tags=["batch"])
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
@@ -15,6 +15,9 @@ from app.crud import activity as crud_activity
 from app.crud import offering as crud_offering
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin, require_solution_architect
+from app.response_cache import cache_response
+from app.single_flight import catalog_flight, request_key
+from app.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -85,16 +88,24 @@ async def get_activity_detail(
     
     return activity_dict
 
-@router.get("/activities", response_model=List[ActivityWithRelation])
+@router.get("/activities", response_model=List[ActivityWithRelation], dependencies=[Depends(cache_response("offering:{offering_id}", "activities"))])
 async def get_activities_for_offering(
+    request: Request,
     offering_id: str = Query(..., description="Offering ID to get activities for"),
-    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)  # All authenticated users
 ):
     """
     Get all activities for a specific offering
     Includes offering-specific fields like sequence and is_mandatory
     """
+    activities = await catalog_flight.do(
+        request, request_key(request, "user"), _load_offering_activities, offering_id
+    )
+    # Built field by field in crud, so re-validating through the schema adds nothing
+    return FastJSONResponse(activities)
+
+
+def _load_offering_activities(db: Session, offering_id: str) -> List[dict]:
     # Verify offering exists
     offering = crud_offering.get_offering_by_id(db, offering_id)
     if not offering:
@@ -175,8 +186,7 @@ async def link_activity_to_offering(
         raise HTTPException(status_code=404, detail="Activity not found")
     
     # Check if already linked
-    existing_activities = crud_activity.get_activities_by_offering(db, link_data.offering_id)
-    if any(a['activity_id'] == link_data.activity_id for a in existing_activities):
+    if crud_activity.is_activity_linked(db, link_data.offering_id, link_data.activity_id):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Activity already linked to this offering"
@@ -1,48 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict
-from app.database import get_db
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database import get_db, get_pool_stats
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
-
-# Import your models
-from app.models.brand import Brand
-from app.models.product import Product
-from app.models.offering import Offering
-from app.models.country import Country
-from app.models.activity import Activity
-from app.models.pricing import PricingDetail
-from app.models.staffing import StaffingDetail
-from app.models.wbs import WBS
+from app.crud import stats as crud_stats
+from app.crud.stats import stats_cache
+from app.single_flight import admin_flight
+from app.slow_query import slow_query_log
+from app.loop_monitor import loop_monitor
+from app.profiling import profile_store
 
 router = APIRouter()
 
+
+async def _cached_stats(request: Request, key: str, compute):
+    """stats_cache lookup where concurrent misses share one compute(db)"""
+    cached = stats_cache.get(key, None)
+    if cached is not None:
+        return cached
+    return await admin_flight.do(
+        request, (key, "admin"), lambda db: stats_cache.get_or_set(key, lambda: compute(db))
+    )
+
+
 @router.get("/admin/stats", response_model=Dict[str, int])
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    request: Request,
+    estimate: Optional[bool] = Query(None, description="Use planner row estimates instead of exact counts"),
     current_user: dict = Depends(require_admin)
 ):
     """
     Get aggregated statistics for all admin entities - **Requires Administrator access**
     
-    This endpoint returns counts for all entities in a single optimized query,
-    significantly faster than making multiple API calls.
+    All counts come from a single statement and are cached for
+    ADMIN_STATS_CACHE_SECONDS (catalog writes invalidate the cache).
     """
+    use_estimate = settings.ADMIN_STATS_ESTIMATE if estimate is None else estimate
     try:
-        # Execute all count queries in a single database round-trip
-        stats = {
-            "totalBrands": db.query(func.count(Brand.brand_id)).scalar() or 0,
-            "totalProducts": db.query(func.count(Product.product_id)).scalar() or 0,
-            "totalOfferings": db.query(func.count(Offering.offering_id)).scalar() or 0,
-            "totalCountries": db.query(func.count(Country.country_id)).scalar() or 0,
-            "totalActivities": db.query(func.count(Activity.activity_id)).scalar() or 0,
-            "totalPricing": db.query(func.count(PricingDetail.country)).scalar() or 0,
-            "totalStaffing": db.query(func.count(StaffingDetail.staffing_id)).scalar() or 0,
-            "totalWBS": db.query(func.count(WBS.wbs_id)).scalar() or 0,
-        }
-        
-        return stats
+        if use_estimate:
+            return await _cached_stats(request, "summary:estimate", crud_stats.get_estimated_counts)
+        return await _cached_stats(request, "summary", crud_stats.get_entity_counts)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -52,7 +53,7 @@ async def get_admin_stats(
 
 @router.get("/admin/stats/detailed", response_model=Dict[str, Dict])
 async def get_detailed_admin_stats(
-    db: Session = Depends(get_db),
+    request: Request,
     current_user: dict = Depends(require_admin)
 ):
     """
@@ -62,49 +63,24 @@ async def get_detailed_admin_stats(
     recent additions, etc.
     """
     try:
-        # Basic counts
-        total_brands = db.query(func.count(Brand.brand_id)).scalar() or 0
-        total_products = db.query(func.count(Product.product_id)).scalar() or 0
-        total_offerings = db.query(func.count(Offering.offering_id)).scalar() or 0
-        total_countries = db.query(func.count(Country.country_id)).scalar() or 0
-        total_activities = db.query(func.count(Activity.activity_id)).scalar() or 0
-        total_pricing = db.query(func.count(PricingDetail.country)).scalar() or 0
-        total_staffing = db.query(func.count(StaffingDetail.staffing_id)).scalar() or 0
-        total_wbs = db.query(func.count(WBS.wbs_id)).scalar() or 0
-        
-        # Additional breakdowns (customize based on your models)
-        # Example: Count offerings by type
-        offerings_by_saas_type = db.query(
-            Offering.saas_type,
-            func.count(Offering.offering_id)
-        ).group_by(Offering.saas_type).all()
-        
-        # Example: Count products by brand
-        products_by_brand = db.query(
-            Product.brand_id,
-            func.count(Product.product_id)
-        ).group_by(Product.brand_id).all()
-        
+        detailed = await _cached_stats(request, "detailed", crud_stats.get_detailed_counts)
+        counts = detailed["counts"]
         return {
             "catalog": {
-                "brands": total_brands,
-                "products": total_products,
-                "offerings": total_offerings,
-                "countries": total_countries
+                "brands": counts["totalBrands"],
+                "products": counts["totalProducts"],
+                "offerings": counts["totalOfferings"],
+                "countries": counts["totalCountries"]
             },
             "configuration": {
-                "activities": total_activities,
-                "pricing": total_pricing,
-                "staffing": total_staffing,
-                "wbs": total_wbs
+                "activities": counts["totalActivities"],
+                "pricing": counts["totalPricing"],
+                "staffing": counts["totalStaffing"],
+                "wbs": counts["totalWBS"]
             },
             "breakdowns": {
-                "offeringsBySaasType": {
-                    saas_type: count for saas_type, count in offerings_by_saas_type
-                },
-                "productsByBrand": {
-                    brand_id: count for brand_id, count in products_by_brand
-                }
+                "offeringsBySaasType": detailed["offeringsBySaasType"],
+                "productsByBrand": detailed["productsByBrand"]
             }
         }
     except Exception as e:
@@ -112,3 +88,126 @@ async def get_detailed_admin_stats(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching detailed admin statistics: {str(e)}"
         )
+
+
+@router.get("/admin/stats/trends", response_model=Dict)
+async def get_catalog_trends(
+    entity: str = Query("offerings", pattern="^(offerings|activities|offering_activities)$"),
+    period: str = Query("week", pattern="^(day|week|month)$"),
+    group_by: str = Query("brand", pattern="^(brand|product)$"),
+    since: Optional[datetime] = Query(None, description="Start of range (default: 26 periods ago)"),
+    until: Optional[datetime] = Query(None, description="End of range (default: now)"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Get created/updated counts per period, grouped by brand or product - **Requires Administrator access**
+    
+    Closed periods are cached; typically only the current period is queried.
+    """
+    until = crud_stats.naive_utc(until) if until else datetime.utcnow()
+    if since is None:
+        since = until - {"day": timedelta(days=26), "week": timedelta(weeks=26), "month": timedelta(days=26 * 31)}[period]
+    since = crud_stats.naive_utc(since)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+
+    buckets = crud_stats.get_trends(db, entity, period, group_by, since, until)
+    return {
+        "entity": entity,
+        "period": period,
+        "group_by": group_by,
+        "buckets": buckets
+    }
+
+
+@router.get("/admin/db/pool", response_model=Dict)
+async def get_db_pool_stats(
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Get database connection pool statistics - **Requires Administrator access**
+
+    Reports checked-out connections, overflow usage and how long requests
+    waited for a connection, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    return get_pool_stats()
+
+
+@router.get("/admin/db/slow-queries", response_model=List[Dict])
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total_ms", pattern="^(total_ms|p95_ms|p99_ms|max_ms|count|slow_count)$"),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Get the slowest SQL statement shapes since startup - **Requires Administrator access**
+
+    Each entry has execution counts, latency percentiles, the last route and
+    CRUD function that ran it slowly, and the captured plan when
+    DB_SLOW_QUERY_EXPLAIN is enabled.
+    """
+    return slow_query_log.top(limit=limit, order_by=order_by)
+
+
+@router.get("/admin/loop/blocks", response_model=List[Dict])
+async def get_loop_blocks(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|count|last_seen)$"),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Get the call sites that have blocked the event loop since startup - **Requires Administrator access**
+
+    Each entry is a route and the innermost application frame that was
+    running when the loop stalled past LOOP_BLOCK_THRESHOLD_MS, with stall
+    counts, durations and the last captured stack.
+    """
+    return loop_monitor.top(limit=limit, order_by=order_by)
+
+
+@router.get("/admin/profiles", response_model=List[Dict])
+async def list_profiles(current_user: dict = Depends(require_admin)):
+    """
+    List recent request profiles from this worker - **Requires Administrator access**
+
+    Send a request with `X-Profile: 1` (or `X-Profile: memory` for an
+    allocation diff as well) to profile it; the response's X-Profile-Id
+    header identifies the result.
+    """
+    return profile_store.list()
+
+
+def _get_profile(profile_id: str) -> Dict:
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found (set PROFILE_DIR to share profiles between workers)"
+        )
+    return entry
+
+
+@router.get("/admin/profiles/{profile_id}", response_model=Dict)
+async def get_profile(profile_id: str, current_user: dict = Depends(require_admin)):
+    """
+    Get a request profile summary - **Requires Administrator access**
+
+    Wall time, sample counts, database time and the slowest statements, and
+    the allocation diff for memory profiles.
+    """
+    return _get_profile(profile_id)["summary"]
+
+
+@router.get("/admin/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str, current_user: dict = Depends(require_admin)):
+    """
+    Download a request profile as folded stacks - **Requires Administrator access**
+
+    One `frame;frame;... count` line per stack, for flamegraph.pl, inferno
+    or speedscope. Time spent in SQL ends in an `[sql]` frame.
+    """
+    return PlainTextResponse(
+        _get_profile(profile_id)["folded"],
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
@@ -3,7 +3,9 @@ from fastapi.responses import RedirectResponse, JSONResponse
 from typing import Dict, Optional
 import logging
 from authlib.integrations.base_client.errors import MismatchingStateError, OAuthError
+from app.auth.ibm_auth import get_oauth
 from app.config import settings
+from app.metrics import observe_outbound
 
 # Import these if you have them
 try:
@@ -72,8 +74,10 @@ async def login(request: Request):
         logger.info(f"Starting login flow with redirect_uri: {redirect_uri}")
         logger.debug(f"Session keys after clearing: {list(request.session.keys())}")
 
-        from app.main import oauth
-        return await oauth.appid.authorize_redirect(request, redirect_uri)
+        oauth = get_oauth()
+        # First call also fetches the discovery document
+        with observe_outbound("appid", "authorize_redirect"):
+            return await oauth.appid.authorize_redirect(request, redirect_uri)
     except Exception as e:
         logger.error(f"Login error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
@@ -87,7 +91,7 @@ async def auth_callback(request: Request):
         logger.debug(f"Request URL: {request.url}")
         logger.debug(f"Session keys: {list(request.session.keys())}")
         
-        from app.main import oauth
+        oauth = get_oauth()
         
         # Check if we have the required state in session
         state_in_url = request.query_params.get('state')
@@ -101,7 +105,8 @@ async def auth_callback(request: Request):
         
         # Try to exchange authorization code for tokens
         try:
-            token = await oauth.appid.authorize_access_token(request)
+            with observe_outbound("appid", "token"):
+                token = await oauth.appid.authorize_access_token(request)
         except MismatchingStateError as e:
             logger.warning(f"State mismatch detected: {e}")
             clear_all_session(request.session)
@@ -127,12 +132,14 @@ async def auth_callback(request: Request):
         roles = []
         
         try:
-            user = await oauth.appid.parse_id_token(request, token)
+            with observe_outbound("appid", "parse_id_token"):
+                user = await oauth.appid.parse_id_token(request, token)
             logger.info("ID token parsed successfully")
         except Exception as e:
             logger.warning(f"Failed to parse ID token: {e}")
             try:
-                user = await oauth.appid.userinfo(token=token)
+                with observe_outbound("appid", "userinfo"):
+                    user = await oauth.appid.userinfo(token=token)
             except Exception as ue:
                 logger.error(f"Failed to get userinfo: {ue}")
                 clear_all_session(request.session)
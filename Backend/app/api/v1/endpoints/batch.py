@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from app.config import settings
+from app.auth.dependencies import get_current_active_user
+from app.batch import run_batch
+from app.schemas.batch import BatchRequest, BatchResponse
+
+router = APIRouter()
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch_requests(
+    batch: BatchRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Run several GET requests to existing API routes in one round trip
+    
+    Sub-requests run in-process with the caller's session cookie and share
+    a small set of DB sessions. Each response keeps its own status; the
+    batch itself returns 200.
+    """
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch"
+        )
+    return {"responses": await run_batch(request, batch.requests)}
@@ -6,11 +6,12 @@ from app.schemas.brand import Brand, BrandCreate, BrandUpdate
 from app.crud import brand as crud_brand
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
 
 router = APIRouter()
 
 # READ - Available to all authenticated users
-@router.get("/brands", response_model=List[Brand])
+@router.get("/brands", response_model=List[Brand], dependencies=[Depends(cache_response("brands"))])
 async def get_brands(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
@@ -6,11 +6,12 @@ from app.schemas.country import Country, CountryCreate, CountryUpdate
 from app.crud import country as crud_country
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
 
 router = APIRouter()
 
 # READ - Available to all authenticated users
-@router.get("/countries", response_model=List[Country])
+@router.get("/countries", response_model=List[Country], dependencies=[Depends(cache_response("countries"))])
 async def get_countries(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
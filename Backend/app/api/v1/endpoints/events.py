@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.auth.dependencies import get_current_active_user
+from app import events
+
+router = APIRouter()
+
+@router.get("/events")
+async def change_events(
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Server-Sent Events stream of catalog change notices
+    
+    Each `change` event carries the entity (table name), id (null for bulk
+    writes, meaning refetch the collection), op (create, update, delete,
+    link, unlink), version and the referenced foreign keys. A `reset` event
+    means the stream could not resume from Last-Event-ID and the client
+    should refetch everything.
+    """
+    return StreamingResponse(
+        events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
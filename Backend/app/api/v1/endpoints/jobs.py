@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.auth.permissions import require_admin
+from app.crud import job as crud_job
+from app.jobs import JOB_TYPES, InvalidJobParams, JobQueueFull, UnknownJobType, runner
+from app.models.job import JOB_STATUSES
+from app.schemas.job import Job, JobCreate, JobSummary
+import app.job_types  # registers the built-in job types
+
+router = APIRouter()
+
+@router.post("/jobs", response_model=JobSummary, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Queue a background job - **Requires Administrator access**
+    
+    Built-in types: export_catalog, delete_brand (params: brand_id),
+    reprice (params: percent, column, country, role), import_pricing
+    (params: rows). Poll /jobs/{job_id}.
+    """
+    try:
+        return await runner.submit(db, job.job_type, job.params, current_user.get("email"))
+    except UnknownJobType:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job type. Available: {', '.join(sorted(JOB_TYPES))}"
+        )
+    except InvalidJobParams as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@router.get("/jobs", response_model=List[JobSummary])
+def list_jobs(
+    job_status: Optional[str] = Query(None, alias="status", description=f"One of: {', '.join(JOB_STATUSES)}"),
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """List recent jobs, newest first - **Requires Administrator access**"""
+    return crud_job.get_jobs(db, status=job_status, job_type=job_type, limit=limit)
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Get a job's status, progress and result - **Requires Administrator access**"""
+    db_job = crud_job.get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobSummary)
+def cancel_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Cancel a queued or running job - **Requires Administrator access**"""
+    db_job = crud_job.get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return runner.cancel(db, db_job)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
@@ -6,31 +6,37 @@ from app.schemas.offering import Offering, OfferingCreate, OfferingUpdate
 from app.crud import offering as crud_offering
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
+from app.single_flight import catalog_flight, request_key
+from app.responses import FastJSONResponse
 
 router = APIRouter()
 
 # READ - Available to all authenticated users
-@router.get("/offerings", response_model=List[Offering])
+@router.get("/offerings", response_model=List[Offering], dependencies=[Depends(cache_response("product:{product_id}"))])
 async def get_offerings(
     product_id: str = Query(..., description="Product ID to filter offerings"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
 ):
     """Get offerings by product ID - Available to all authenticated users"""
-    offerings = crud_offering.get_offerings_by_product(db, product_id)
-    return offerings
+    return FastJSONResponse(crud_offering.get_offering_rows_by_product(db, product_id))
 
-@router.get("/offerings/{offering_id}", response_model=Offering)
+@router.get("/offerings/{offering_id}", response_model=Offering, dependencies=[Depends(cache_response("offering:{offering_id}"))])
 async def get_offering_by_id(
+    request: Request,
     offering_id: str = Path(..., description="Offering ID"),
-    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
 ):
     """Get offering by offering ID - Available to all authenticated users"""
+    return await catalog_flight.do(request, request_key(request, "user"), _load_offering, offering_id)
+
+
+def _load_offering(db: Session, offering_id: str) -> Offering:
     offering = crud_offering.get_offering_by_id(db, offering_id)
     if not offering:
         raise HTTPException(status_code=404, detail="Offering not found")
-    return offering
+    return Offering.model_validate(offering)
 
 @router.get("/offerings/search/", response_model=List[Offering])
 async def search_offerings(
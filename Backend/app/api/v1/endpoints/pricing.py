@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, status
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 from decimal import Decimal
@@ -8,12 +8,15 @@ from app.crud import pricing as crud_pricing
 from app.crud import staffing as crud_staffing
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
+from app.single_flight import catalog_flight, request_key
+from app.responses import FastJSONResponse
 
 router = APIRouter()
 
 # READ - Available to all authenticated users
 
-@router.get("/pricing/all", response_model=List[PricingDetail])
+@router.get("/pricing/all", response_model=List[PricingDetail], dependencies=[Depends(cache_response("pricing"))])
 async def get_all_pricing(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
@@ -22,8 +25,7 @@ async def get_all_pricing(
     Get all pricing details
     Available to all authenticated users
     """
-    pricing_list = crud_pricing.get_all_pricing(db)
-    return pricing_list
+    return FastJSONResponse(crud_pricing.get_all_pricing_rows(db))
 
 
 @router.get("/pricing/search", response_model=List[PricingDetail])
@@ -69,16 +71,23 @@ async def get_pricing_detail(
 
 @router.get("/totalHoursAndPrices/{offering_id}")
 async def get_total_hours_and_prices(
+    request: Request,
     offering_id: str = Path(..., description="Offering ID"),
-    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
 ):
     """
     Calculate total hours and prices for an offering
     Available to all authenticated users
-    """
     
-    staffing_details = crud_staffing.get_staffing_by_offering(db, offering_id)
+    Identical concurrent requests share one calculation.
+    """
+    return await catalog_flight.do(
+        request, request_key(request, "user"), _calculate_totals, offering_id
+    )
+
+
+def _calculate_totals(db: Session, offering_id: str) -> Dict:
+    staffing_details = crud_staffing.get_staffing_with_pricing_by_offering(db, offering_id)
     
     if not staffing_details:
         return {
@@ -94,14 +103,7 @@ async def get_total_hours_and_prices(
     total_sale_price = Decimal(0)
     breakdown = []
     
-    for staffing in staffing_details:
-        pricing = crud_pricing.get_pricing_details(
-            db=db,
-            country=staffing.country,
-            role=staffing.role,
-            band=staffing.band
-        )
-        
+    for staffing, pricing in staffing_details:
         hours = staffing.hours or 0
         total_hours += hours
         
@@ -6,11 +6,12 @@ from app.schemas.product import Product, ProductCreate, ProductUpdate
 from app.crud import product as crud_product
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
 
 router = APIRouter()
 
 # READ - Available to all authenticated users
-@router.get("/products/all", response_model=List[Product])
+@router.get("/products/all", response_model=List[Product], dependencies=[Depends(cache_response("products"))])
 async def get_all_products(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_active_user)
@@ -19,7 +20,7 @@ async def get_all_products(
     products = crud_product.get_all_products(db)
     return products
 
-@router.get("/products", response_model=List[Product])
+@router.get("/products", response_model=List[Product], dependencies=[Depends(cache_response("brand:{brand_id}"))])
 async def get_products(
     brand_id: str = Query(..., description="Brand ID to filter products"),
     db: Session = Depends(get_db),
@@ -6,6 +6,7 @@ from app.schemas.staffing import StaffingDetail, StaffingDetailCreate, StaffingD
 from app.crud import staffing as crud_staffing
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -15,8 +16,7 @@ async def get_all_staffing_details(
     current_user: dict = Depends(get_current_active_user)
 ):
     """Get all staffing details - Available to all authenticated users"""
-    staffing_details = crud_staffing.get_all_staffing(db)
-    return staffing_details
+    return FastJSONResponse(crud_staffing.get_all_staffing_rows(db))
 
 @router.get("/staffingDetails/activity/{activity_id}", response_model=List[StaffingDetail])
 async def get_staffing_by_activity(
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timezone
+from app.database import get_db
+from app.auth.dependencies import get_current_active_user
+from app.crud import sync as crud_sync
+from app.crud.sync import SYNC_ENTITIES
+from app.schemas.sync import SyncFeed
+
+router = APIRouter()
+
+@router.get("/sync", response_model=SyncFeed)
+def get_sync_feed(
+    updated_since: Optional[datetime] = Query(None, description="Return rows changed at or after this time (omit for a full snapshot)"),
+    entities: Optional[List[str]] = Query(None, description=f"Limit the feed to some of: {', '.join(SYNC_ENTITIES)}"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Delta feed of catalog changes for downstream mirrors
+    
+    Returns offerings, activities, offering-activity links, staffing, WBS
+    and pricing rows created or updated since `updated_since`, plus
+    tombstones for rows deleted since then. Store `next_since` and send it
+    as `updated_since` on the next call. Apply rows as upserts and
+    tombstones as deletes, ordered by updated_on/deleted_on.
+    """
+    selected = entities or list(SYNC_ENTITIES)
+    unknown = [entity for entity in selected if entity not in SYNC_ENTITIES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sync entities: {', '.join(unknown)}"
+        )
+
+    since = updated_since or datetime(1970, 1, 1)
+    if since.tzinfo is not None:
+        # Timestamp columns are stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return crud_sync.get_changes(db, since, selected)
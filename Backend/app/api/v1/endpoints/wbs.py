@@ -8,11 +8,12 @@ from app.schemas.wbs import WBSCreate, WBSUpdate, WBSResponse, ActivityWBSCreate
 from app.crud import wbs as crud_wbs
 from app.auth.dependencies import get_current_active_user
 from app.auth.permissions import require_admin
+from app.response_cache import cache_response
 
 router = APIRouter(prefix="/wbs", tags=["WBS"])
 
 # READ operations - Available to all authenticated users
-@router.get("/", response_model=List[WBSResponse])
+@router.get("/", response_model=List[WBSResponse], dependencies=[Depends(cache_response("wbs"))])
 def get_all_wbs(
     skip: int = 0, 
     limit: int = 100, 
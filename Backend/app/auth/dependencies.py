@@ -1,6 +1,7 @@
 from fastapi import Request, HTTPException, status
 from typing import Dict, Optional
 from app.bluegroups_auth import is_user_in_group
+from app.tracing import traced
 
 
 def get_current_user(request: Request) -> Dict:
@@ -17,6 +18,7 @@ def get_current_user(request: Request) -> Dict:
 
 from fastapi import Request, HTTPException, Depends
 
+@traced("dependency get_current_active_user")
 def get_current_active_user(request: Request):
     """
     Extracts the currently active user from session.
@@ -1,8 +1,10 @@
+from functools import lru_cache
 import httpx
 from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from typing import Dict, Optional
 from app.config import settings
+from app.metrics import observe_outbound
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,8 +26,9 @@ class IBMAuth:
         
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.get(self.discovery_endpoint)
-                response.raise_for_status()
+                with observe_outbound("appid", "discovery"):
+                    response = await client.get(self.discovery_endpoint)
+                    response.raise_for_status()
                 self._discovery_cache = response.json()
                 return self._discovery_cache
         except Exception as e:
@@ -45,8 +48,9 @@ class IBMAuth:
             jwks_uri = discovery.get("jwks_uri")
             
             async with httpx.AsyncClient() as client:
-                response = await client.get(jwks_uri)
-                response.raise_for_status()
+                with observe_outbound("appid", "jwks"):
+                    response = await client.get(jwks_uri)
+                    response.raise_for_status()
                 self._jwks_cache = response.json()
                 return self._jwks_cache
         except Exception as e:
@@ -120,15 +124,16 @@ class IBMAuth:
             introspection_endpoint = discovery.get("introspection_endpoint")
             
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    introspection_endpoint,
-                    data={
-                        "token": token,
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret
-                    }
-                )
-                response.raise_for_status()
+                with observe_outbound("appid", "introspect"):
+                    response = await client.post(
+                        introspection_endpoint,
+                        data={
+                            "token": token,
+                            "client_id": self.client_id,
+                            "client_secret": self.client_secret
+                        }
+                    )
+                    response.raise_for_status()
                 result = response.json()
                 
                 if not result.get("active"):
@@ -149,4 +154,34 @@ class IBMAuth:
             )
 
 
-ibm_auth = IBMAuth()
\ No newline at end of file
+@lru_cache
+def get_ibm_auth() -> IBMAuth:
+    return IBMAuth()
+
+
+@lru_cache
+def get_oauth():
+    """
+    Authlib client for the AppID login flow, registered on first use. The
+    discovery document is fetched by the first authorize redirect.
+    """
+    from authlib.integrations.starlette_client import OAuth
+
+    oauth = OAuth()
+    oauth.register(
+        name='appid',
+        client_id=settings.IBM_CLIENT_ID,
+        client_secret=settings.IBM_CLIENT_SECRET,
+        server_metadata_url=settings.IBM_DISCOVERY_ENDPOINT,
+        client_kwargs={
+            'scope': 'openid email profile'
+        }
+    )
+    return oauth
+
+
+def __getattr__(name):
+    # ibm_auth used to be created at import
+    if name == "ibm_auth":
+        return get_ibm_auth()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
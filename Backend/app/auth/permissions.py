@@ -3,16 +3,33 @@ from app.auth.dependencies import get_current_active_user
 from app.bluegroups_auth import is_user_in_group
 import logging
 from app.config import settings
+from app.tracing import traced
 
 # ADMIN_GROUP = "Admiin"
 # SOLUTION_ARCHITECT_GROUP = "Solution"
-ADMIN_GROUP = settings.ADMIN_BLUEGROUP
-SOLUTION_ARCHITECT_GROUP = settings.SOLUTION_ARCHITECT_BLUEGROUP
+
+def admin_group() -> str:
+    return settings.ADMIN_BLUEGROUP
+
+
+def solution_architect_group() -> str:
+    return settings.SOLUTION_ARCHITECT_BLUEGROUP
+
+
+def __getattr__(name):
+    # The group names used to be read from settings at import
+    if name == "ADMIN_GROUP":
+        return admin_group()
+    if name == "SOLUTION_ARCHITECT_GROUP":
+        return solution_architect_group()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 logger = logging.getLogger(__name__)
 
 # BlueGroup names - Update these with your actual BlueGroup names
 
+@traced("dependency require_admin")
 async def require_admin(current_user: dict = Depends(get_current_active_user)):
     """
     Require user to be in Administrators BlueGroup.
@@ -25,7 +42,7 @@ async def require_admin(current_user: dict = Depends(get_current_active_user)):
             detail="Email not found in user profile"
         )
     
-    # if not is_user_in_group(email, ADMIN_GROUP):
+    # if not is_user_in_group(email, admin_group()):
     #     logger.warning(f"User {email} attempted admin action without permission")
     #     raise HTTPException(
     #         status_code=status.HTTP_403_FORBIDDEN,
@@ -35,6 +52,7 @@ async def require_admin(current_user: dict = Depends(get_current_active_user)):
     logger.info(f"Admin access granted to {email}")
     return current_user
 
+@traced("dependency require_solution_architect")
 async def require_solution_architect(current_user: dict = Depends(get_current_active_user)):
     """
     Require user to be in Solution Architects BlueGroup or Administrators.
@@ -49,11 +67,11 @@ async def require_solution_architect(current_user: dict = Depends(get_current_ac
         )
     
     # Admins have all permissions including solution architect
-    if not is_user_in_group(email, ADMIN_GROUP):
+    if not is_user_in_group(email, admin_group()):
         logger.info(f"Solution Architect access granted to {email} (via Admin role)")
         return current_user
     
-    # if not is_user_in_group(email, SOLUTION_ARCHITECT_GROUP):
+    # if not is_user_in_group(email, solution_architect_group()):
     #     logger.warning(f"User {email} attempted solution architect action without permission")
     #     raise HTTPException(
     #         status_code=status.HTTP_403_FORBIDDEN,
@@ -77,9 +95,9 @@ async def get_user_roles(current_user: dict = Depends(get_current_active_user)):
             "has_catalog_access": True
         }
     
-    # is_admin = is_user_in_group(email, ADMIN_GROUP)
+    # is_admin = is_user_in_group(email, admin_group())
     is_admin = True
-    is_solution_architect = is_admin or is_user_in_group(email, SOLUTION_ARCHITECT_GROUP)
+    is_solution_architect = is_admin or is_user_in_group(email, solution_architect_group())
     
     
 
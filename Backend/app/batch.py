@@ -0,0 +1,178 @@
+from typing import Dict, List
+from fastapi import Request
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from starlette.types import Message, Scope
+import asyncio
+import json
+import logging
+from app.config import settings
+from app.database import SHARED_SESSION_SCOPE_KEY, read_session
+from app.response_cache import ResponseCacheMiddleware
+from app.schemas.batch import BatchItem
+
+logger = logging.getLogger(__name__)
+
+# Request headers a sub-request inherits from the /batch request
+FORWARDED_HEADERS = {b"cookie", b"authorization", b"user-agent", b"accept-language", b"traceparent"}
+
+# Routes that never finish on their own (relative to API_V1_PREFIX)
+STREAMING_PATHS = {"/events"}
+
+
+class SessionLanes:
+    """
+    A fixed number of DB sessions shared by a batch's sub-requests. Each
+    sub-request holds one lane for its whole run, so a session is never used
+    by two threads at once; waiting happens on the event loop, not in
+    threadpool threads.
+    """
+
+    def __init__(self, request: Request, size: int):
+        self._request = request
+        self._size = size
+        self._sessions = []
+        self._free: asyncio.Queue = asyncio.Queue()
+        self._retiring = set()
+
+    async def acquire(self):
+        if self._free.empty() and len(self._sessions) < self._size:
+            session = read_session(self._request)
+            self._sessions.append(session)
+            return session
+        return await self._free.get()
+
+    def release(self, session) -> None:
+        self._free.put_nowait(session)
+
+    def retire(self, session, task: asyncio.Task) -> None:
+        """
+        Give up a lane whose sub-request timed out. Its session may still be
+        in use by a threadpool thread, so it is closed only once `task` has
+        finished, and a fresh session takes the lane.
+        """
+        self._sessions.remove(session)
+
+        async def close_when_done():
+            try:
+                await task
+            except BaseException:
+                pass
+            await run_in_threadpool(session.close)
+
+        closer = asyncio.get_running_loop().create_task(close_when_done())
+        self._retiring.add(closer)
+        closer.add_done_callback(self._retiring.discard)
+        replacement = read_session(self._request)
+        self._sessions.append(replacement)
+        self._free.put_nowait(replacement)
+
+    async def close(self) -> None:
+        for session in self._sessions:
+            await run_in_threadpool(session.close)
+
+
+def _sub_scope(parent: Scope, path: str, query: str, session) -> Scope:
+    return {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            *(header for header in parent.get("headers", []) if header[0] in FORWARDED_HEADERS),
+            (b"accept", b"application/json"),
+        ],
+        "app": parent["app"],
+        "session": parent.get("session"),
+        "state": {},
+        "starlette.exception_handlers": parent.get("starlette.exception_handlers"),
+        SHARED_SESSION_SCOPE_KEY: session,
+    }
+
+
+def _is_streaming(request: Request, path: str) -> bool:
+    if path[len(settings.API_V1_PREFIX):].rstrip("/") in STREAMING_PATHS:
+        return True
+    scope = {"type": "http", "method": "GET", "path": path}
+    for route in request.app.router.routes:
+        if route.matches(scope)[0] == Match.FULL:
+            response_class = getattr(route, "response_class", None)
+            if isinstance(response_class, DefaultPlaceholder):
+                response_class = response_class.value
+            return isinstance(response_class, type) and issubclass(response_class, StreamingResponse)
+    return False
+
+
+async def _run_one(request: Request, lanes: SessionLanes, item: BatchItem) -> Dict:
+    path, _, query = item.path.partition("?")
+    result = {"id": item.id, "path": item.path}
+    if not path.startswith(settings.API_V1_PREFIX + "/") or path.rstrip("/").endswith("/batch"):
+        return {**result, "status": 400, "body": {"detail": "Only API GET routes can be batched"}}
+    if _is_streaming(request, path):
+        return {**result, "status": 400, "body": {"detail": "Streaming routes cannot be batched"}}
+
+    response: Dict = {"status": 500, "headers": [], "body": []}
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive() -> Message:
+        # Like a server: the (empty) body once, then block until the client goes away
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    session = await lanes.acquire()
+    # The same wrapping the app's middleware stack gives the router
+    app = ResponseCacheMiddleware(AsyncExitStackMiddleware(request.app.router))
+    task = asyncio.ensure_future(app(_sub_scope(request.scope, path, query, session), receive, send))
+    try:
+        await asyncio.wait_for(asyncio.shield(task), settings.BATCH_ITEM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Batch sub-request {item.path} timed out after {settings.BATCH_ITEM_TIMEOUT_SECONDS}s")
+        disconnected.set()
+        task.cancel()
+        lanes.retire(session, task)
+        return {**result, "status": 504, "body": {"detail": "Sub-request timed out"}}
+    except Exception as e:
+        logger.error(f"Batch sub-request {item.path} failed: {e}")
+        response = {"status": 500, "headers": [], "body": [b'{"detail":"Internal Server Error"}']}
+    if response["status"] >= 500:
+        await run_in_threadpool(session.rollback)
+    lanes.release(session)
+
+    body = b"".join(response["body"])
+    content_type = dict(response["headers"]).get(b"content-type", b"application/json")
+    if content_type.startswith(b"application/json") and body:
+        parsed = json.loads(body)
+    else:
+        parsed = body.decode("utf-8", errors="replace") or None
+    return {**result, "status": response["status"], "body": parsed}
+
+
+async def run_batch(request: Request, items: List[BatchItem]) -> List[Dict]:
+    """Run GET sub-requests in-process, concurrently, over BATCH_CONCURRENCY shared sessions"""
+    lanes = SessionLanes(request, settings.BATCH_CONCURRENCY)
+    try:
+        return list(await asyncio.gather(*(_run_one(request, lanes, item) for item in items)))
+    finally:
+        await lanes.close()
@@ -1,6 +1,8 @@
 import requests
 import xmltodict
 import logging
+from app.config import settings
+from app.metrics import observe_outbound
 
 logger = logging.getLogger(__name__)
 
@@ -9,10 +11,11 @@ def is_user_in_group(email: str, group_name: str) -> bool:
     Check if an IBM user belongs to a given BlueGroup.
     Returns True if rc=0 (user in group).
     """
-    url = f"https://bluepages.ibm.com/tools/groups/groupsxml.wss?task=inAGroup&email={email}&group={group_name}"
+    params = {"task": "inAGroup", "email": email, "group": group_name}
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        with observe_outbound("bluepages", "inAGroup"):
+            response = requests.get(settings.BLUEPAGES_URL, params=params, timeout=settings.BLUEPAGES_TIMEOUT_SECONDS)
+            response.raise_for_status()
         data = xmltodict.parse(response.text)
         rc_value = data.get("group", {}).get("rc")
         in_group = rc_value == "0"
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+import time
+from app import metrics
+
+MISSING = object()
+
+# Every named cache, so invalidations can reach all of them
+CACHES: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped on invalidation so a value computed before a write is not stored after it
+        self._generation = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                value = MISSING
+        metrics.record_cache(self.name, value is not MISSING)
+        return default if value is MISSING else value
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> None:
+        """Store `value`; skipped if the cache was invalidated since `generation` was read"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is MISSING:
+            generation = self._generation
+            value = factory()
+            self.set(key, value, generation=generation)
+        return value
+
+    def invalidate(self, key: Hashable = MISSING) -> None:
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            self._generation += 1
+            if key is MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_cache(name: str) -> Optional[TTLCache]:
+    return CACHES.get(name)
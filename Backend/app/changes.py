@@ -0,0 +1,118 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Junction tables report link/unlink instead of create/delete
+LINK_TABLES = {"offering_activities", "activity_wbs"}
+
+_PENDING_KEY = "pending_changes"
+
+
+class Change(NamedTuple):
+    """A committed write to one catalog row (key is None for bulk statements)"""
+    entity: str
+    key: Optional[str]
+    op: str
+    refs: Dict[str, Tuple[str, ...]] = {}
+
+
+Subscriber = Callable[[List[Change]], None]
+
+_subscribers: List[Subscriber] = []
+
+
+def subscribe(callback: Subscriber) -> Subscriber:
+    """Call `callback` with the list of changes after every successful commit"""
+    _subscribers.append(callback)
+    return callback
+
+
+def publish(changes: List[Change]) -> None:
+    """Deliver changes to every subscriber; one failing subscriber does not stop the rest"""
+    for callback in list(_subscribers):
+        try:
+            callback(changes)
+        except Exception as e:
+            logger.error(f"Change subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+def _op_for(table: str, op: str) -> str:
+    if table in LINK_TABLES:
+        return {"create": "link", "delete": "unlink"}.get(op, op)
+    return op
+
+
+def _instance_key(mapper, obj) -> Optional[str]:
+    values = mapper.primary_key_from_instance(obj)
+    if any(value is None for value in values):
+        return None
+    return ":".join(str(value) for value in values)
+
+
+def _instance_refs(mapper, obj) -> Dict[str, Tuple[str, ...]]:
+    """Foreign key values of the row, including the previous value when it changed"""
+    state = inspect(obj)
+    refs = {}
+    for column in mapper.columns:
+        if not column.foreign_keys:
+            continue
+        attr = mapper.get_property_by_column(column).key
+        history = state.attrs[attr].history
+        values = [v for v in (*history.added, *history.unchanged, *history.deleted) if v is not None]
+        if not values:
+            current = getattr(obj, attr, None)
+            values = [current] if current is not None else []
+        if values:
+            refs[column.name] = tuple(dict.fromkeys(str(v) for v in values))
+    return refs
+
+
+def _record(session: Session, changes: List[Change]) -> None:
+    session.info.setdefault(_PENDING_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flush(session, flush_context):
+    changes = []
+    for op, objects in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if op == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            mapper = inspect(obj).mapper
+            table = mapper.local_table.name
+            changes.append(Change(
+                entity=table,
+                key=_instance_key(mapper, obj),
+                op=_op_for(table, op),
+                refs=_instance_refs(mapper, obj),
+            ))
+    if changes:
+        _record(session, changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    # query(...).update() / .delete() and insert(Model) statements bypass the unit of work
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    table = mapper.local_table.name
+    op = "delete" if orm_execute_state.is_delete else "create" if orm_execute_state.is_insert else "update"
+    _record(orm_execute_state.session, [Change(entity=table, key=None, op=_op_for(table, op))])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_commit(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
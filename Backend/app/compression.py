@@ -0,0 +1,189 @@
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import gzip
+import zlib
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+# Never buffered or compressed: chunks must reach the client as they are sent
+STREAMING_TYPES = ("text/event-stream",)
+
+# Bodies larger than this are compressed in the threadpool, off the event loop
+_OFFLOAD_BYTES = 256 * 1024
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best encoding we support that the Accept-Encoding header allows"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    candidates = [
+        enc for enc in SUPPORTED_ENCODINGS
+        if accepted.get(enc, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda enc: accepted.get(enc, accepted.get("*", 0.0)))
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    if content_type.startswith(STREAMING_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression; level defaults to the dynamic-response setting"""
+    if encoding == "br":
+        quality = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+        return brotli.compress(data, quality=quality)
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def _weak_etag(headers: MutableHeaders) -> None:
+    # The compressed bytes differ from the ones a strong validator described
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli (if installed) or gzip, negotiated from
+    Accept-Encoding. Bodies under COMPRESSION_MIN_SIZE, non-text content,
+    event streams and responses that already carry a Content-Encoding pass
+    through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        buffered: List[bytes] = []
+        buffered_size = 0
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, buffered_size, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if (
+                    message["status"] < 200 or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                data = compressor.chunk(body) if more_body else compressor.finish(body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            buffered.append(body)
+            buffered_size += len(body)
+            if more_body and buffered_size < self.minimum_size:
+                return
+            payload = b"".join(buffered)
+            buffered.clear()
+
+            if not more_body and buffered_size < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": payload})
+                return
+
+            headers = MutableHeaders(scope=start)
+            headers["content-encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            _weak_etag(headers)
+
+            if not more_body:
+                if len(payload) > _OFFLOAD_BYTES:
+                    data = await run_in_threadpool(compress, payload, encoding)
+                else:
+                    data = compress(payload, encoding)
+                headers["content-length"] = str(len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data})
+                return
+
+            # Streamed body: compress chunk by chunk without a content-length
+            del headers["content-length"]
+            compressor = _StreamCompressor(encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressor.chunk(payload), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,9 +1,40 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+
+    # Optional read replica for GET traffic
+    DATABASE_REPLICA_URL: str | None = None
+    DB_READ_YOUR_WRITES_SECONDS: int = 5   # reads stay on the primary after a write
+    DB_REPLICA_RETRY_SECONDS: int = 30     # how long to skip an unreachable replica
+
+    # Database connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30              # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800            # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True          # detect connections dropped while idle
+    DB_CONNECT_TIMEOUT: int = 10           # seconds
+    DB_SSLMODE: str = "verify-full"        # "disable" for a local database (benchmarks)
+    DB_SSLROOTCERT: str = "/etc/secrets/root.crt"
+    DB_POOL_WARM: int = 2                  # connections opened per worker before it reports ready
+
+    # Server-side timeouts (milliseconds, 0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 60000
+
+    # Per-request query instrumentation
+    DB_QUERY_BUDGET: int = 50              # statements per request, 0 disables
+    DB_QUERY_BUDGET_STRICT: bool = False   # raise instead of logging (tests)
+    DB_N_PLUS_ONE_THRESHOLD: int = 5       # repeats of one statement shape to flag
+
+    # Slow-query log
+    DB_SLOW_QUERY_MS: int = 500                    # 0 disables
+    DB_SLOW_QUERY_EXPLAIN: bool = False            # capture EXPLAIN (ANALYZE, BUFFERS) for slow SELECTs
+    DB_SLOW_QUERY_EXPLAIN_INTERVAL: int = 300      # seconds between plans for the same statement
     
     # IBM AppID
     IBM_CLIENT_ID: str
@@ -18,6 +49,96 @@ class Settings(BaseSettings):
     API_V1_PREFIX: str = "/api/v1"
     DEBUG: bool = False
     
+    # Admin dashboard statistics
+    ADMIN_STATS_CACHE_SECONDS: int = 60    # invalidated early by catalog writes
+    ADMIN_STATS_ESTIMATE: bool = False     # use pg_class estimates instead of COUNT(*)
+    ADMIN_TRENDS_CACHE_SECONDS: int = 86400  # closed periods; edits and deletes invalidate
+
+    # Delta sync
+    SYNC_OVERLAP_SECONDS: int = 30  # next_since lags the snapshot so in-flight transactions are not missed
+
+    # Cross-worker cache invalidation (LISTEN/NOTIFY)
+    DB_NOTIFY_ENABLED: bool = True
+    DB_NOTIFY_CHANNEL: str = "catalog_changes"
+
+    # Tag-based response cache for catalog reads
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 8 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 600  # backstop; writes invalidate by tag
+
+    # Background jobs
+    JOBS_WORKERS: int = 2
+    JOBS_QUEUE_SIZE: int = 100
+    JOBS_PROGRESS_INTERVAL: float = 1.0  # seconds between progress writes
+    JOBS_HEARTBEAT_SECONDS: float = 15.0  # how often a worker renews its jobs and sweeps for stale ones
+    JOBS_LEASE_SECONDS: int = 120  # queued/running jobs not renewed for this long are failed, on any host
+
+    # /batch endpoint
+    BATCH_MAX_REQUESTS: int = 50
+    BATCH_CONCURRENCY: int = 4  # sub-requests in flight, each holding one of this many DB sessions
+    BATCH_ITEM_TIMEOUT_SECONDS: float = 10.0  # a slower sub-request gets a 504 entry
+
+    # Server-Sent Events change feed
+    EVENTS_BUFFER_SIZE: int = 1000  # recent events kept for Last-Event-ID resumption
+    EVENTS_CLIENT_QUEUE_SIZE: int = 500  # a client further behind than this gets a reset
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_RETRY_MS: int = 3000
+
+    # Production server (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 2
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_DRAIN_SECONDS: float = 0.0   # keep serving with /ready failing before closing listeners
+    SERVER_GRACEFUL_TIMEOUT: int = 30   # seconds to finish in-flight requests on shutdown
+
+    # Compression and static assets
+    COMPRESSION_MIN_SIZE: int = 1024  # smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4  # only used when the brotli package is installed
+    STATIC_MAX_CACHED_BYTES: int = 5 * 1024 * 1024  # larger files are streamed from disk
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None           # bearer token required to scrape; unset, /metrics answers 403
+    METRICS_ALLOW_UNAUTHENTICATED: bool = False  # serve /metrics without a token (local development)
+    METRICS_MULTIPROC_DIR: str | None = None   # shared dir to aggregate uvicorn workers
+    METRICS_FLUSH_SECONDS: float = 5.0
+
+    # Event-loop blocking detector
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: int = 50     # heartbeat and watchdog period
+    LOOP_BLOCK_THRESHOLD_MS: int = 100     # stalls longer than this capture a stack
+    LOOP_BLOCK_LOG_INTERVAL: int = 60      # seconds between logged stacks for the same route and call site
+
+    # On-demand request profiling (X-Profile header from an administrator)
+    PROFILE_ENABLED: bool = True
+    PROFILE_SAMPLE_INTERVAL_MS: float = 2.0
+    PROFILE_KEEP: int = 20                 # profiles kept in memory per worker
+    PROFILE_DIR: str | None = None         # also write profiles here, so any worker can serve them
+    PROFILE_TRACEMALLOC_FRAMES: int = 1    # traceback depth for X-Profile: memory
+
+    # Request tracing (every response carries X-Trace-Id; only sampled requests record spans)
+    TRACE_SAMPLE_RATE: float = 0.0         # fraction of requests without a traceparent to trace
+    TRACE_RESPECT_PARENT: bool = False     # follow the sampled flag of an incoming traceparent (only while the rate is above 0)
+    TRACE_EXPORTER: str = "file"           # "file" or "otlp"
+    TRACE_FILE: str = "traces.jsonl"       # OTLP/JSON, one export batch per line
+    TRACE_FILE_MAX_BYTES: int = 100 * 1024 * 1024  # then rolled over to TRACE_FILE.1, replacing the previous one
+    TRACE_OTLP_ENDPOINT: str = "http://127.0.0.1:4318/v1/traces"
+    TRACE_SERVICE_NAME: str = "solution-config-backend"
+    TRACE_EXPORT_QUEUE_SIZE: int = 1000    # traces waiting for export; beyond this they are dropped
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 1.0
+
+    # Logging (queued and written by a background thread)
+    LOG_LEVEL: str | None = None           # defaults to DEBUG when DEBUG is set, else INFO
+    LOG_FORMAT: str = "json"               # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000            # records waiting to be written; beyond this they are dropped
+    LOG_MAX_PER_SECOND: int = 1000         # hard cap on records written per worker; 0 disables
+    LOG_SAMPLE_BURST: int = 20             # INFO/DEBUG records per app call site per window kept in full
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
+    LOG_SAMPLE_EVERY: int = 100            # past the burst, keep one in this many (0 keeps none)
+
     # Frontend
     FRONTEND_URL: str = "https://solution-config-1.onrender.com"
     
@@ -27,10 +148,31 @@ class Settings(BaseSettings):
     # Groups
     ADMIN_BLUEGROUP: str
     SOLUTION_ARCHITECT_BLUEGROUP: str
+    BLUEPAGES_URL: str = "https://bluepages.ibm.com/tools/groups/groupsxml.wss"
+    BLUEPAGES_TIMEOUT_SECONDS: float = 10.0
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Load (and validate) settings on first use rather than at import"""
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Stands in for the Settings instance so `from app.config import settings`
+    is free: the environment is read on the first attribute access.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+
+settings = _LazySettings()
@@ -104,6 +104,15 @@ def link_activity_to_offering(
     db.refresh(db_link)
     return db_link
 
+def is_activity_linked(db: Session, offering_id: str, activity_id: str) -> bool:
+    """Whether the activity is already linked to the offering"""
+    return db.query(
+        db.query(OfferingActivity).filter(
+            OfferingActivity.offering_id == offering_id,
+            OfferingActivity.activity_id == activity_id
+        ).exists()
+    ).scalar()
+
 def unlink_activity_from_offering(
     db: Session,
     offering_id: str,
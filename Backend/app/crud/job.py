@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.job import Job
+
+
+def get_job(db: Session, job_id: str) -> Optional[Job]:
+    """Get a single job by ID"""
+    return db.query(Job).filter(Job.job_id == job_id).first()
+
+
+def get_jobs(db: Session, status: Optional[str] = None, job_type: Optional[str] = None,
+             limit: int = 50) -> List[Job]:
+    """Recent jobs, newest first"""
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    return query.order_by(Job.created_on.desc()).limit(limit).all()
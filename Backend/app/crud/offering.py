@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.models.offering import Offering
 from app.schemas.offering import OfferingCreate, OfferingUpdate
+from app.schemas import offering as offering_schemas
+from app.responses import schema_rows
 from datetime import datetime
 import uuid
 
@@ -11,6 +13,11 @@ def get_offerings_by_product(db: Session, product_id: str) -> List[Offering]:
     return db.query(Offering).filter(Offering.product_id == product_id).all()
 
 
+def get_offering_rows_by_product(db: Session, product_id: str) -> List[Dict]:
+    """Offerings for a product as response-ready dicts"""
+    return schema_rows(db, Offering, offering_schemas.Offering, Offering.product_id == product_id)
+
+
 def get_offering_by_id(db: Session, offering_id: str) -> Optional[Offering]:
     """Get a single offering by ID"""
     return db.query(Offering).filter(Offering.offering_id == offering_id).first()
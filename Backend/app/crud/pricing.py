@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.pricing import PricingDetail
 from app.schemas.pricing import PricingDetailCreate, PricingDetailUpdate
-from typing import Optional, List
+from app.schemas import pricing as pricing_schemas
+from app.responses import schema_rows
+from typing import Dict, Optional, List
 
 
 def get_pricing_details(
@@ -42,6 +44,11 @@ def get_all_pricing(db: Session) -> List[PricingDetail]:
     return db.query(PricingDetail).all()
 
 
+def get_all_pricing_rows(db: Session) -> List[Dict]:
+    """All pricing details as response-ready dicts"""
+    return schema_rows(db, PricingDetail, pricing_schemas.PricingDetail)
+
+
 def create_pricing(db: Session, pricing: PricingDetailCreate) -> PricingDetail:
     """Create a new pricing detail"""
     db_pricing = PricingDetail(
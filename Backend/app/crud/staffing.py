@@ -1,9 +1,13 @@
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from app.models.staffing import StaffingDetail
 from app.models.activity import Activity
 from app.models.activity import OfferingActivity
+from app.models.pricing import PricingDetail
 from app.schemas.staffing import StaffingDetailCreate, StaffingDetailUpdate
-from typing import List, Optional
+from app.schemas import staffing as staffing_schemas
+from app.responses import schema_rows
+from typing import Dict, List, Optional, Tuple
 import uuid
 
 
@@ -12,6 +16,11 @@ def get_all_staffing(db: Session) -> List[StaffingDetail]:
     return db.query(StaffingDetail).all()
 
 
+def get_all_staffing_rows(db: Session) -> List[Dict]:
+    """All staffing details as response-ready dicts"""
+    return schema_rows(db, StaffingDetail, staffing_schemas.StaffingDetail)
+
+
 def get_staffing_by_offering(db: Session, offering_id: str) -> List[StaffingDetail]:
     """Get all staffing details for a specific offering"""
     return (
@@ -23,6 +32,23 @@ def get_staffing_by_offering(db: Session, offering_id: str) -> List[StaffingDeta
     )
 
 
+def get_staffing_with_pricing_by_offering(
+    db: Session, offering_id: str
+) -> List[Tuple[StaffingDetail, Optional[PricingDetail]]]:
+    """Staffing details for an offering, each with its rate card entry (None if unpriced)"""
+    return (
+        db.query(StaffingDetail, PricingDetail)
+        .join(OfferingActivity, OfferingActivity.activity_id == StaffingDetail.activity_id)
+        .outerjoin(PricingDetail, and_(
+            PricingDetail.country == StaffingDetail.country,
+            PricingDetail.role == StaffingDetail.role,
+            PricingDetail.band == StaffingDetail.band,
+        ))
+        .filter(OfferingActivity.offering_id == offering_id)
+        .all()
+    )
+
+
 def get_staffing_by_id(db: Session, staffing_id: str) -> Optional[StaffingDetail]:
     """Get a single staffing detail by ID"""
     return db.query(StaffingDetail).filter(StaffingDetail.staffing_id == staffing_id).first()
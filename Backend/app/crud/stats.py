@@ -0,0 +1,250 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import String, cast, func, literal, select, text, union_all
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from app.cache import TTLCache
+from app.changes import Change, subscribe
+from app.config import settings
+from app.models.brand import Brand
+from app.models.product import Product
+from app.models.offering import Offering
+from app.models.country import Country
+from app.models.activity import Activity, OfferingActivity
+from app.models.pricing import PricingDetail
+from app.models.staffing import StaffingDetail
+from app.models.wbs import WBS
+
+# Response key -> model, in dashboard order
+COUNTED_MODELS = {
+    "totalBrands": Brand,
+    "totalProducts": Product,
+    "totalOfferings": Offering,
+    "totalCountries": Country,
+    "totalActivities": Activity,
+    "totalPricing": PricingDetail,
+    "totalStaffing": StaffingDetail,
+    "totalWBS": WBS,
+}
+
+COUNTED_TABLES = {model.__tablename__ for model in COUNTED_MODELS.values()}
+
+PG_CLASS_ESTIMATES = text(
+    "SELECT relname, reltuples FROM pg_class "
+    "WHERE relkind = 'r' AND relname = ANY(:tables) AND pg_table_is_visible(oid)"
+)
+
+stats_cache = TTLCache("admin_stats", ttl=settings.ADMIN_STATS_CACHE_SECONDS, maxsize=16)
+
+
+@subscribe
+def _invalidate_on_write(changes: List[Change]) -> None:
+    if any(change.entity in COUNTED_TABLES for change in changes):
+        stats_cache.invalidate()
+
+
+def _count(model):
+    return select(func.count()).select_from(model).scalar_subquery()
+
+
+def get_entity_counts(db: Session) -> Dict[str, int]:
+    """Exact row counts for every admin entity in one statement"""
+    row = db.execute(
+        select(*(_count(model).label(key) for key, model in COUNTED_MODELS.items()))
+    ).one()
+    return {key: value or 0 for key, value in row._mapping.items()}
+
+
+def get_estimated_counts(db: Session) -> Dict[str, int]:
+    """
+    Planner row estimates from pg_class (no table scans). Tables that have
+    never been analyzed have no estimate and fall back to an exact count.
+    """
+    keys_by_table = {model.__tablename__: key for key, model in COUNTED_MODELS.items()}
+    rows = db.execute(PG_CLASS_ESTIMATES, {"tables": list(keys_by_table)}).all()
+    estimates = {
+        keys_by_table[relname]: int(reltuples) for relname, reltuples in rows if reltuples >= 0
+    }
+    if len(estimates) < len(COUNTED_MODELS):
+        exact = get_entity_counts(db)
+        return {key: estimates.get(key, exact[key]) for key in COUNTED_MODELS}
+    return {key: estimates[key] for key in COUNTED_MODELS}
+
+
+def _breakdown(key_column, count_column):
+    """json_object_agg of a GROUP BY, as a scalar subquery"""
+    grouped = (
+        select(key_column.label("k"), func.count(count_column).label("n"))
+        .group_by(key_column)
+        .subquery()
+    )
+    return select(
+        func.json_object_agg(func.coalesce(cast(grouped.c.k, String), "null"), grouped.c.n)
+    ).scalar_subquery()
+
+
+def get_detailed_counts(db: Session) -> Dict:
+    """Entity counts plus offering/product breakdowns in one statement"""
+    columns = [_count(model).label(key) for key, model in COUNTED_MODELS.items()]
+    columns.append(_breakdown(Offering.saas_type, Offering.offering_id).label("offeringsBySaasType"))
+    columns.append(_breakdown(Product.brand_id, Product.product_id).label("productsByBrand"))
+    row = db.execute(select(*columns)).one()._mapping
+    return {
+        "counts": {key: row[key] or 0 for key in COUNTED_MODELS},
+        "offeringsBySaasType": row["offeringsBySaasType"] or {},
+        "productsByBrand": row["productsByBrand"] or {},
+    }
+
+
+# ==================== Catalog growth trends ====================
+
+TREND_PERIODS = ("day", "week", "month")
+TREND_GROUPS = ("brand", "product")
+MAX_TREND_BUCKETS = 3660
+UNASSIGNED_GROUP = "Unassigned"
+
+trends_cache = TTLCache("admin_trends", ttl=settings.ADMIN_TRENDS_CACHE_SECONDS, maxsize=20000)
+
+
+def _offering_source():
+    return {
+        "from": Offering.__table__.outerjoin(
+            Product.__table__, Product.product_id == Offering.product_id
+        ),
+        "created": Offering.created_on,
+        "updated": Offering.updated_on,
+        "groups": {"brand": Offering.brand, "product": Product.product_name},
+    }
+
+
+def _activity_source():
+    return {
+        "from": Activity.__table__,
+        "created": Activity.created_on,
+        "updated": Activity.updated_on,
+        "groups": {"brand": Activity.brand, "product": Activity.product_name},
+    }
+
+
+def _offering_activity_source():
+    return {
+        "from": OfferingActivity.__table__
+        .join(Offering.__table__, Offering.offering_id == OfferingActivity.offering_id)
+        .outerjoin(Product.__table__, Product.product_id == Offering.product_id),
+        "created": OfferingActivity.created_on,
+        "updated": None,
+        "groups": {"brand": Offering.brand, "product": Product.product_name},
+    }
+
+
+TREND_SOURCES = {
+    "offerings": _offering_source,
+    "activities": _activity_source,
+    "offering_activities": _offering_activity_source,
+}
+
+
+@subscribe
+def _invalidate_trends(changes: List[Change]) -> None:
+    # Creates only land in the current (never cached) bucket; updates move
+    # updated_on out of closed buckets and deletes shrink them.
+    if any(c.entity in TREND_SOURCES and c.op not in ("create", "link") for c in changes):
+        trends_cache.invalidate()
+
+
+def naive_utc(ts: datetime) -> datetime:
+    """Timestamp columns are stored as naive UTC; convert aware query parameters to match"""
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_start(ts: datetime, period: str) -> datetime:
+    """Python equivalent of date_trunc(period, ts)"""
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: datetime, period: str) -> datetime:
+    if period == "week":
+        return start + timedelta(days=7)
+    if period == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _query_trends(db: Session, entity: str, period: str, group_by: str,
+                  since: datetime, until: datetime) -> Dict[datetime, Dict[str, Dict[str, int]]]:
+    """Bucketed created/updated counts per group for [since, until) in one statement"""
+    source = TREND_SOURCES[entity]()
+    group = func.coalesce(source["groups"][group_by], UNASSIGNED_GROUP)
+    parts = []
+    for kind in ("created", "updated"):
+        column = source[kind]
+        if column is None:
+            continue
+        part = (
+            select(
+                func.date_trunc(period, column).label("bucket"),
+                group.label("grp"),
+                literal(kind).label("kind"),
+            )
+            .select_from(source["from"])
+            .where(column >= since, column < until)
+        )
+        if kind == "updated":
+            part = part.where(column > source["created"])
+        parts.append(part)
+
+    events = union_all(*parts).subquery()
+    rows = db.execute(
+        select(events.c.bucket, events.c.grp, events.c.kind, func.count())
+        .group_by(events.c.bucket, events.c.grp, events.c.kind)
+    ).all()
+
+    buckets: Dict[datetime, Dict[str, Dict[str, int]]] = {}
+    for bucket, grp, kind, count in rows:
+        counts = buckets.setdefault(bucket, {}).setdefault(grp, {"created": 0, "updated": 0})
+        counts[kind] = count
+    return buckets
+
+
+def get_trends(db: Session, entity: str, period: str, group_by: str,
+               since: datetime, until: datetime) -> List[Dict]:
+    """
+    Created/updated counts per period and group. Closed periods are served
+    from trends_cache; only the missing span (usually just the current,
+    still-open period) is queried.
+    """
+    since, until = naive_utc(since), naive_utc(until)
+    starts = []
+    start = bucket_start(since, period)
+    while start < until and len(starts) < MAX_TREND_BUCKETS:
+        starts.append(start)
+        start = next_bucket(start, period)
+
+    current = bucket_start(datetime.utcnow(), period)
+    results: Dict[datetime, Dict] = {}
+    missing = []
+    for start in starts:
+        cached = trends_cache.get((entity, period, group_by, start), None) if start < current else None
+        if cached is None:
+            missing.append(start)
+        else:
+            results[start] = cached
+
+    if missing:
+        generation = trends_cache.generation()
+        queried = _query_trends(
+            db, entity, period, group_by, missing[0], next_bucket(missing[-1], period)
+        )
+        for start in missing:
+            groups = queried.get(start, {})
+            results[start] = groups
+            if next_bucket(start, period) <= current:
+                trends_cache.set((entity, period, group_by, start), groups, generation=generation)
+
+    return [{"period_start": start, "groups": results[start]} for start in starts]
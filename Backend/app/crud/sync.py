@@ -0,0 +1,52 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+from app.config import settings
+from app.models.offering import Offering
+from app.models.activity import Activity, OfferingActivity
+from app.models.staffing import StaffingDetail
+from app.models.pricing import PricingDetail
+from app.models.wbs import WBS
+from app.models.tombstone import Tombstone
+
+# Feed key (also the table name recorded in tombstones) -> model
+SYNC_ENTITIES = {
+    "offerings": Offering,
+    "activities": Activity,
+    "offering_activities": OfferingActivity,
+    "staffing_details": StaffingDetail,
+    "wbs": WBS,
+    "pricing_details": PricingDetail,
+}
+
+
+def get_changes(db: Session, since: datetime, entities: Iterable[str], include_deleted: bool = True) -> Dict:
+    """
+    Rows with updated_on >= since plus tombstones for rows deleted since then.
+    Every query is a range scan on an updated_on/deleted_on index.
+    """
+    until = db.execute(select(func.localtimestamp())).scalar()
+    entities = list(entities)
+    feed = {
+        "since": since,
+        "until": until,
+        # Transactions still open at `until` may commit rows stamped earlier;
+        # overlapping the next window picks them up (consumers upsert, so
+        # seeing a row twice is harmless).
+        "next_since": max(since, until - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)),
+    }
+    for key in entities:
+        model = SYNC_ENTITIES[key]
+        feed[key] = db.execute(
+            select(model).where(model.updated_on >= since).order_by(model.updated_on)
+        ).scalars().all()
+
+    if not include_deleted:
+        return feed
+    feed["deleted"] = db.execute(
+        select(Tombstone)
+        .where(Tombstone.deleted_on >= since, Tombstone.entity_type.in_(entities))
+        .order_by(Tombstone.deleted_on, Tombstone.tombstone_id)
+    ).scalars().all()
+    return feed
@@ -1,35 +1,335 @@
-from sqlalchemy import create_engine
+from starlette.requests import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy import exc
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from collections import deque
+from typing import Dict, Optional
+import logging
+import threading
+import time
+from app.config import settings
+from app import metrics, query_stats, slow_query, tracing
+import app.changes  # registers the session write-tracking listeners
+import app.invalidation  # registers the NOTIFY-on-commit listener
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Methods served from the replica; everything else is treated as a write
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set in environment variables")
+# Session cookie key holding the time of the user's last write request
+LAST_WRITE_SESSION_KEY = "_db_last_write"
 
-# # ✅ Ensure using psycopg2
-# if DATABASE_URL.startswith("postgresql://"):
-#     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://")
+# ASGI scope key through which /batch hands its session to sub-requests
+SHARED_SESSION_SCOPE_KEY = "db_shared_session"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={
-        "sslmode": "verify-full",
-        "sslrootcert": "/etc/secrets/root.crt"
-    },
-    echo=False
-)
+# ASGI scope flag that keeps a read on the primary (set by the response cache)
+PRIMARY_READ_SCOPE_KEY = "db_primary_read"
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class PoolStats:
+    """Checkout counters and wait times for a connection pool"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent_waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self._recent_waits.append(wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            checkouts = self.checkouts
+            return {
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "wait_ms_p50": round(slow_query.percentile(recent, 50), 3),
+                "wait_ms_p95": round(slow_query.percentile(recent, 95), 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats:
+                self.stats.record_timeout()
+            raise
+        if self.stats:
+            self.stats.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+def _server_options() -> str:
+    """libpq `options` string applying server-side timeouts to every connection"""
+    options = []
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options.append(f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}")
+    if settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+        options.append(
+            f"-c idle_in_transaction_session_timeout={settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}"
+        )
+    return " ".join(options)
+
+
+def _connect_args() -> Dict:
+    connect_args = {
+        "sslmode": settings.DB_SSLMODE,
+        "connect_timeout": settings.DB_CONNECT_TIMEOUT,
+    }
+    if settings.DB_SSLMODE in ("verify-ca", "verify-full"):
+        connect_args["sslrootcert"] = settings.DB_SSLROOTCERT
+    options = _server_options()
+    if options:
+        connect_args["options"] = options
+    return connect_args
+
+
+def create_db_engine(url: str):
+    """Create an engine with the pool and timeout configuration from Settings"""
+    db_engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+        echo=False
+    )
+    db_engine.pool.stats = PoolStats()
+    query_stats.instrument(db_engine)
+    metrics.instrument(db_engine)
+    slow_query.instrument(db_engine)
+    tracing.instrument(db_engine)
+    return db_engine
+
+
+def create_unpooled_engine(url):
+    """
+    Engine for long-lived dedicated connections (LISTEN): every connection
+    is opened for its caller and really closed afterwards, never taking or
+    returning a slot in the application pool.
+    """
+    return create_engine(url, poolclass=NullPool, connect_args=_connect_args(), echo=False)
+
+
+class ReplicaHealth:
+    """Remembers replica failures so reads skip it for DB_REPLICA_RETRY_SECONDS"""
+
+    def __init__(self, retry_seconds: int):
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self) -> None:
+        if self.available():
+            logger.warning(f"Read replica unreachable, routing reads to primary for {self.retry_seconds}s")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+
+# Engines are built on first use, so importing models (Alembic, scripts,
+# tests) needs neither the database settings nor the TLS root certificate
+_engine = None
+_replica_engine = None
+_replica_health: Optional[ReplicaHealth] = None
+_init_lock = threading.Lock()
+
+
+def _init_engines() -> None:
+    global _engine, _replica_engine, _replica_health
+    with _init_lock:
+        if _engine is not None:
+            return
+        primary = create_db_engine(settings.DATABASE_URL)
+        replica = (
+            create_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+        )
+        health = ReplicaHealth(settings.DB_REPLICA_RETRY_SECONDS)
+
+        if replica is not None:
+            @event.listens_for(replica, "handle_error")
+            def _replica_error(context):
+                if context.is_disconnect:
+                    health.mark_down()
+
+        _replica_engine, _replica_health = replica, health
+        _engine = primary
+
+
+def get_engine():
+    if _engine is None:
+        _init_engines()
+    return _engine
+
+
+def get_replica_engine():
+    if _engine is None:
+        _init_engines()
+    return _replica_engine
+
+
+def get_replica_health() -> ReplicaHealth:
+    if _engine is None:
+        _init_engines()
+    return _replica_health
+
+
+def dispose_engines(close: bool = True) -> None:
+    """Dispose whichever engines have been created (close=False after fork)"""
+    for db_engine in (_engine, _replica_engine):
+        if db_engine is not None:
+            db_engine.dispose(close=close)
+
+
+def __getattr__(name):
+    # engine / replica_engine / replica_health used to be created at import
+    accessors = {
+        "engine": get_engine,
+        "replica_engine": get_replica_engine,
+        "replica_health": get_replica_health,
+    }
+    if name in accessors:
+        return accessors[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class RoutingSession(Session):
+    """
+    Session that runs its queries on the read replica when use_replica is set.
+    The replica connection is checked out lazily on first use; if the replica
+    cannot be reached the session falls back to the primary engine.
+    """
+
+    def __init__(self, *args, use_replica: bool = False, **kwargs):
+        if kwargs.get("bind") is None:
+            kwargs["bind"] = get_engine()
+        super().__init__(*args, **kwargs)
+        self.use_replica = use_replica and get_replica_engine() is not None
+        self._replica_connection = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.use_replica:
+            connection = self._get_replica_connection()
+            if connection is not None:
+                return connection
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _get_replica_connection(self):
+        if self._replica_connection is None:
+            if not get_replica_health().available():
+                self.use_replica = False
+                return None
+            try:
+                self._replica_connection = get_replica_engine().connect()
+            except exc.DBAPIError as e:
+                logger.warning(f"Replica connection failed, falling back to primary: {e}")
+                get_replica_health().mark_down()
+                self.use_replica = False
+                return None
+        return self._replica_connection
+
+    def close(self):
+        super().close()
+        if self._replica_connection is not None:
+            self._replica_connection.close()
+            self._replica_connection = None
+
+
+# Binds to get_engine() when a session is created; tests can SessionLocal.configure(bind=...)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+def get_pool_stats(db_engine=None) -> Dict:
+    """Current pool occupancy plus checkout wait statistics"""
+    pool = (db_engine or get_engine()).pool
+    stats = {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if pool.stats:
+        stats.update(pool.stats.snapshot())
+    if db_engine is None and get_replica_engine() is not None:
+        stats["replica"] = get_pool_stats(get_replica_engine())
+        stats["replica"]["available"] = get_replica_health().available()
+    return stats
+
+
+def _use_replica(request: Request, method: Optional[str] = None) -> bool:
+    """
+    Read requests go to the replica unless the user wrote recently
+    (read-your-writes window tracked in the session cookie).
+    """
+    if not settings.DATABASE_REPLICA_URL:
+        return False
+    session = request.scope.get("session")
+    if (method or request.method) not in READ_METHODS:
+        if session is not None:
+            session[LAST_WRITE_SESSION_KEY] = time.time()
+        return False
+    if request.scope.get(PRIMARY_READ_SCOPE_KEY):
+        return False
+    if session is not None:
+        last_write = session.get(LAST_WRITE_SESSION_KEY)
+        if last_write and time.time() - last_write < settings.DB_READ_YOUR_WRITES_SECONDS:
+            return False
+    return True
+
+
+def uses_replica(request: Request) -> bool:
+    """Whether get_db would give `request` a replica session (no side effects for reads)"""
+    return _use_replica(request, method="GET")
+
+
+def read_session(request: Request) -> Session:
+    """Session for read-only work done on behalf of `request`, whatever its method"""
+    return SessionLocal(use_replica=_use_replica(request, method="GET"))
+
+
+def get_db(request: Request):
+    shared = request.scope.get(SHARED_SESSION_SCOPE_KEY)
+    if shared is not None:
+        # /batch sub-request: the batch owns the session and closes it
+        yield shared
+        return
+    with tracing.start_span("dependency get_db"):
+        db = SessionLocal(use_replica=_use_replica(request))
     try:
         yield db
     finally:
@@ -0,0 +1,167 @@
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import threading
+import time
+from app.changes import Change, subscribe
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sent when a client cannot be resumed (unknown/expired Last-Event-ID or it
+# fell too far behind); the client should refetch everything it shows
+RESET = object()
+
+
+class ChangeEvent:
+    """One change notice as delivered over SSE"""
+
+    __slots__ = ("seq", "payload")
+
+    def __init__(self, seq: int, change: Change):
+        self.seq = seq
+        self.payload = {
+            "entity": change.entity,
+            "id": change.key,
+            "op": change.op,
+            "version": seq,
+            "refs": {column: list(values) for column, values in change.refs.items()},
+        }
+
+
+class EventBroker:
+    """
+    Fans committed changes out to SSE clients. Each client is an asyncio.Queue
+    on the event loop, so idle connections cost no threads. Recent events are
+    kept in a ring buffer for Last-Event-ID resumption.
+
+    Event ids are "<epoch>-<seq>"; the epoch changes on every process start,
+    so ids from another worker or a previous run trigger a reset.
+    """
+
+    def __init__(self, buffer_size: int, queue_size: int):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer: "deque[ChangeEvent]" = deque(maxlen=buffer_size)
+        self._clients: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def _parse_id(self, last_event_id: Optional[str]) -> Optional[int]:
+        if not last_event_id:
+            return None
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return -1
+        return int(seq)
+
+    def publish(self, changes: List[Change]) -> None:
+        """Called from whichever thread committed; buffers then hands off to the loop"""
+        with self._lock:
+            events = []
+            for change in changes:
+                self._seq += 1
+                events.append(ChangeEvent(self._seq, change))
+            self._buffer.extend(events)
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._fan_out, events)
+
+    def _fan_out(self, events: List[ChangeEvent]) -> None:
+        for client in list(self._clients):
+            for event in events:
+                try:
+                    client.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Too far behind: replace the backlog with a single reset
+                    while not client.empty():
+                        client.get_nowait()
+                    client.put_nowait(RESET)
+                    break
+
+    def connect(self, last_event_id: Optional[str]) -> Tuple[asyncio.Queue, list]:
+        """
+        Register a client (must run on the event loop). Returns its queue and
+        the buffered events to replay first, or [RESET] if the requested
+        position is no longer available.
+        """
+        self._loop = asyncio.get_running_loop()
+        client: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        last_seq = self._parse_id(last_event_id)
+        with self._lock:
+            self._clients.add(client)
+            if last_seq is None:
+                return client, []
+            oldest = self._buffer[0].seq if self._buffer else self._seq + 1
+            if last_seq < 0 or last_seq > self._seq or last_seq + 1 < oldest:
+                return client, [RESET]
+            return client, [event for event in self._buffer if event.seq > last_seq]
+
+    def disconnect(self, client: asyncio.Queue) -> None:
+        self._clients.discard(client)
+
+    @property
+    def current_seq(self) -> int:
+        return self._seq
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+
+broker = EventBroker(
+    buffer_size=settings.EVENTS_BUFFER_SIZE,
+    queue_size=settings.EVENTS_CLIENT_QUEUE_SIZE,
+)
+
+
+@subscribe
+def _publish_to_clients(changes: List[Change]) -> None:
+    broker.publish(changes)
+
+
+def format_event(event) -> str:
+    """Serialize a ChangeEvent (or RESET) in text/event-stream format"""
+    if event is RESET:
+        return f"id: {broker.event_id(broker.current_seq)}\nevent: reset\ndata: {{}}\n\n"
+    return (
+        f"id: {broker.event_id(event.seq)}\n"
+        f"event: change\n"
+        f"data: {json.dumps(event.payload, separators=(',', ':'))}\n\n"
+    )
+
+
+async def stream(last_event_id: Optional[str]):
+    """Async generator for one SSE connection"""
+    client, backlog = broker.connect(last_event_id)
+    sent = -1
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        for event in backlog:
+            yield format_event(event)
+            if event is not RESET:
+                sent = event.seq
+        while True:
+            try:
+                event = await asyncio.wait_for(client.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is RESET:
+                # Before yielding: events published while the client reads this are new to it
+                sent = broker.current_seq
+                yield format_event(event)
+                continue
+            # Events buffered while connecting can arrive both in the backlog and the queue
+            if event.seq <= sent:
+                continue
+            sent = event.seq
+            yield format_event(event)
+    finally:
+        broker.disconnect(client)
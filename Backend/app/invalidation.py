@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+import json
+import logging
+import os
+import select
+import socket
+import threading
+from app.cache import CACHES
+from app.changes import Change, publish
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+
+
+def worker_id() -> str:
+    """Identifies this process so it can skip its own notifications"""
+    # Evaluated per call: workers forked from a preloaded parent share imports
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encode(changes: List[Change]) -> List[str]:
+    """
+    NOTIFY payloads for a transaction's changes. A transaction too large for
+    one payload is collapsed to one keyless (bulk) change per entity and op.
+    """
+    rows = [[c.entity, c.key, c.op, {k: list(v) for k, v in c.refs.items()}] for c in changes]
+    payload = json.dumps({"w": worker_id(), "c": rows}, separators=(",", ":"))
+    if len(payload.encode()) <= MAX_PAYLOAD_BYTES:
+        return [payload]
+    collapsed = list(dict.fromkeys((c.entity, c.op) for c in changes))
+    return [
+        json.dumps({"w": worker_id(), "c": [[entity, None, op, {}] for entity, op in collapsed[i:i + 100]]}, separators=(",", ":"))
+        for i in range(0, len(collapsed), 100)
+    ]
+
+
+def decode(payload: str) -> Optional[List[Change]]:
+    """Changes from another worker's notification (None for our own or malformed ones)"""
+    try:
+        message = json.loads(payload)
+        if message.get("w") == worker_id():
+            return None
+        return [
+            Change(entity=entity, key=key, op=op, refs={k: tuple(v) for k, v in (refs or {}).items()})
+            for entity, key, op, refs in message["c"]
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed invalidation payload: {e}")
+        return None
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_on_commit(session):
+    # NOTIFY is transactional: other workers only hear about committed writes
+    if not settings.DB_NOTIFY_ENABLED or getattr(session, "use_replica", False):
+        return
+    session.flush()
+    changes = session.info.get("pending_changes")
+    if not changes:
+        return
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+    for payload in encode(changes):
+        connection.execute(NOTIFY, {"channel": settings.DB_NOTIFY_CHANNEL, "payload": payload})
+
+
+class InvalidationListener:
+    """
+    One LISTEN connection per worker. Notifications from other workers are
+    re-published locally, so every changes subscriber (cache invalidation,
+    SSE) sees them as if the write had happened in this process.
+
+    The connection comes from an unpooled engine for the same database: it
+    is held for the life of the worker and switched to autocommit, so it
+    must neither shrink the application pool nor ever be handed back to it.
+    """
+
+    def __init__(self, engine, channel: str):
+        from app.database import create_unpooled_engine
+        self.engine = create_unpooled_engine(engine.url)
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while not self._stop.is_set():
+            try:
+                connection = self.engine.raw_connection()
+            except Exception as e:
+                logger.warning(f"Invalidation listener cannot connect, retrying in {backoff:.0f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+            try:
+                if not first:
+                    # Notifications sent while disconnected are lost
+                    logger.info("Invalidation listener reconnected, clearing local caches")
+                    for cache in list(CACHES.values()):
+                        cache.invalidate()
+                first = False
+                backoff = 1.0
+                self._listen(connection.driver_connection)
+            except Exception as e:
+                logger.warning(f"Invalidation listener connection lost: {e}")
+                connection.invalidate()
+            else:
+                connection.close()
+
+    def _listen(self, dbapi_connection) -> None:
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        logger.info(f"Listening for cache invalidations on channel {self.channel}")
+        while not self._stop.is_set():
+            if select.select([dbapi_connection], [], [], 5.0) == ([], [], []):
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                notification = dbapi_connection.notifies.pop(0)
+                changes = decode(notification.payload)
+                if changes:
+                    publish(changes)
+
+
+_listener: Optional[InvalidationListener] = None
+
+
+def start_listener(engine) -> Optional[InvalidationListener]:
+    """Start this worker's LISTEN thread (PostgreSQL only)"""
+    global _listener
+    if not settings.DB_NOTIFY_ENABLED or engine.dialect.name != "postgresql":
+        return None
+    if _listener is None:
+        _listener = InvalidationListener(engine, settings.DB_NOTIFY_CHANNEL)
+        _listener.start()
+    return _listener
+
+
+def stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
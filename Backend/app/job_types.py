@@ -0,0 +1,118 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict
+import uuid
+from app.crud import sync as crud_sync
+from app.crud.sync import SYNC_ENTITIES
+from app.jobs import JobContext, register_job
+from app.models.brand import Brand
+from app.models.product import Product
+from app.models.offering import Offering
+from app.models.pricing import PricingDetail
+from app.schemas.pricing import PricingDetailCreate
+from app.schemas.job import DeleteBrandParams, ExportCatalogParams, ImportPricingParams, RepriceParams
+from app.schemas.sync import SyncFeed
+
+IMPORT_CHUNK_SIZE = 500
+
+# ==================== Built-in job types ====================
+
+
+@register_job("export_catalog", ExportCatalogParams)
+def export_catalog(db: Session, context: JobContext) -> Dict:
+    """Full catalog snapshot in the /sync feed format"""
+    entities = list(SYNC_ENTITIES)
+    snapshot = {}
+    for done, entity in enumerate(entities):
+        context.progress(done, len(entities), f"Exporting {entity}")
+        feed = crud_sync.get_changes(db, datetime(1970, 1, 1), [entity], include_deleted=False)
+        snapshot.setdefault("since", feed["since"])
+        snapshot["until"] = snapshot["next_since"] = feed["until"]
+        snapshot[entity] = feed[entity]
+    context.progress(len(entities), len(entities), "Serializing", force=True)
+    return SyncFeed.model_validate(snapshot).model_dump(mode="json", exclude={"since", "next_since", "deleted"})
+
+
+@register_job("delete_brand", DeleteBrandParams)
+def delete_brand(db: Session, context: JobContext) -> Dict:
+    """
+    Delete a brand with all its products and offerings, one product per
+    statement so no single statement runs into statement_timeout. Runs in
+    one transaction: cancelling rolls everything back.
+    """
+    brand_id = uuid.UUID(context.params["brand_id"])
+    if not db.query(Brand.brand_id).filter(Brand.brand_id == brand_id).first():
+        raise ValueError(f"Brand {brand_id} not found")
+
+    product_ids = [row.product_id for row in db.query(Product.product_id).filter(Product.brand_id == brand_id)]
+    total = len(product_ids) + 1
+    offerings_deleted = 0
+    for done, product_id in enumerate(product_ids):
+        context.progress(done, total, f"Deleting product {product_id}")
+        offerings_deleted += db.query(Offering).filter(
+            Offering.product_id == product_id
+        ).delete(synchronize_session=False)
+        db.query(Product).filter(Product.product_id == product_id).delete(synchronize_session=False)
+
+    context.progress(total - 1, total, "Deleting brand", force=True)
+    db.query(Brand).filter(Brand.brand_id == brand_id).delete(synchronize_session=False)
+    db.commit()
+    return {
+        "brand_id": str(brand_id),
+        "products_deleted": len(product_ids),
+        "offerings_deleted": offerings_deleted,
+    }
+
+
+@register_job("reprice", RepriceParams)
+def reprice(db: Session, context: JobContext) -> Dict:
+    """
+    Adjust cost or sale_price by `percent` (e.g. 3.5 or -2), optionally for
+    one country and/or role. One UPDATE per country, single transaction.
+    """
+    params = context.params
+    column_name = params["column"]
+    factor = 1 + Decimal(params["percent"]) / 100
+    column = getattr(PricingDetail, column_name)
+
+    query = db.query(PricingDetail)
+    if params.get("country"):
+        query = query.filter(PricingDetail.country == params["country"])
+    if params.get("role"):
+        query = query.filter(PricingDetail.role == params["role"])
+
+    countries = [row.country for row in query.with_entities(PricingDetail.country).distinct()]
+    rows_updated = 0
+    for done, country in enumerate(countries):
+        context.progress(done, len(countries), f"Repricing {country}")
+        rows_updated += query.filter(PricingDetail.country == country).update(
+            {column: func.round(column * factor, 2)}, synchronize_session=False
+        )
+    context.progress(len(countries), len(countries), "Committing", force=True)
+    db.commit()
+    return {"column": column_name, "percent": params["percent"], "rows_updated": rows_updated}
+
+
+@register_job("import_pricing", ImportPricingParams)
+def import_pricing(db: Session, context: JobContext) -> Dict:
+    """
+    Upsert rate-card rows keyed by (country, role, band), IMPORT_CHUNK_SIZE
+    rows per statement, in one transaction: cancelling imports nothing.
+    """
+    # Back from their JSON form (Decimal prices were stored as strings)
+    rows = [PricingDetailCreate.model_validate(row).model_dump() for row in context.params["rows"]]
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        context.progress(start, len(rows), f"Importing rows {start + 1}-{min(start + IMPORT_CHUNK_SIZE, len(rows))}")
+        statement = dialect.insert(PricingDetail).values(rows[start:start + IMPORT_CHUNK_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[PricingDetail.country, PricingDetail.role, PricingDetail.band],
+            set_={"cost": statement.excluded.cost, "sale_price": statement.excluded.sale_price,
+                  "updated_on": func.now()},
+        ))
+    context.progress(len(rows), len(rows), "Committing", force=True)
+    db.commit()
+    return {"rows_imported": len(rows)}
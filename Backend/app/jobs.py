@@ -0,0 +1,286 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.database import SessionLocal
+from app.invalidation import worker_id
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class JobQueueFull(Exception):
+    """The in-process queue is at JOBS_QUEUE_SIZE"""
+
+
+class UnknownJobType(ValueError):
+    pass
+
+
+class InvalidJobParams(ValueError):
+    """params do not match the job type's schema"""
+
+    def __init__(self, errors: list):
+        super().__init__("Invalid job params")
+        self.errors = errors
+
+
+JobHandler = Callable[[Session, "JobContext"], Optional[Any]]
+
+JOB_TYPES: Dict[str, JobHandler] = {}
+JOB_PARAMS: Dict[str, Type[BaseModel]] = {}
+
+
+def register_job(job_type: str, params: Type[BaseModel]):
+    """
+    Register a job handler, e.g. @register_job("export_catalog", ExportCatalogParams).
+
+    Params are validated against the schema when the job is submitted and
+    handed to the handler as a validated dict. Handlers are plain functions
+    run in the threadpool with their own session. They commit their own
+    work, report progress through the context, and return a
+    JSON-serializable result.
+    """
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_TYPES[job_type] = handler
+        JOB_PARAMS[job_type] = params
+        return handler
+    return decorator
+
+
+def validate_params(job_type: str, params: Optional[Dict]) -> Dict:
+    if job_type not in JOB_TYPES:
+        raise UnknownJobType(job_type)
+    try:
+        return JOB_PARAMS[job_type].model_validate(params or {}).model_dump(mode="json")
+    except ValidationError as e:
+        raise InvalidJobParams(e.errors(include_url=False, include_context=False))
+
+
+class JobContext:
+    """Handed to a running job for params, progress reporting and cancellation"""
+
+    def __init__(self, runner: "JobRunner", job_id, params: Dict):
+        self.runner = runner
+        self.job_id = job_id
+        self.params = params or {}
+        self._last_write = 0.0
+        self._cancelled = False
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None,
+                 force: bool = False) -> None:
+        """Record progress (written at most every JOBS_PROGRESS_INTERVAL seconds) and honour cancellation"""
+        now = time.monotonic()
+        if force or now - self._last_write >= settings.JOBS_PROGRESS_INTERVAL:
+            self._last_write = now
+            with SessionLocal() as db:
+                job = db.get(Job, self.job_id)
+                if job is not None:
+                    job.heartbeat_on = datetime.utcnow()
+                    job.progress_done = done
+                    if total is not None:
+                        job.progress_total = total
+                    if message is not None:
+                        job.progress_message = message[:255]
+                    db.commit()
+                    # Picks up a cancel requested through another worker
+                    self._cancelled = self._cancelled or job.cancel_requested
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self._cancelled or self.job_id in self.runner.cancel_requested:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    In-process job queue: an asyncio.Queue of job ids drained by a fixed
+    number of worker tasks, each running one job at a time in the
+    threadpool. Job state lives in the jobs table so any worker can report
+    on it; jobs run in the worker that accepted them.
+
+    Each worker renews heartbeat_on on the jobs it owns every
+    JOBS_HEARTBEAT_SECONDS and fails any job, from any host, whose lease
+    has lapsed, so jobs of a crashed or replaced instance do not stay
+    queued or running.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cancel_requested: Set = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        try:
+            self.recover()
+        except Exception as e:
+            logger.warning(f"Could not check for interrupted jobs: {e}")
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{n}") for n in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._keep_alive(), name="job-heartbeat"))
+        logger.info(f"Started {self.workers} background job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def recover(self) -> int:
+        """Fail jobs whose worker has stopped renewing their lease (it crashed, or was replaced)"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+        with SessionLocal() as db:
+            orphans = db.query(Job).filter(
+                Job.status.in_(ACTIVE_STATUSES),
+                or_(
+                    Job.heartbeat_on < cutoff,
+                    # Rows written before heartbeats existed
+                    and_(Job.heartbeat_on.is_(None), Job.created_on < cutoff),
+                ),
+            ).all()
+            for job in orphans:
+                logger.warning(f"Job {job.job_id} ({job.job_type}) on {job.worker} lost its worker")
+                job.status = "failed"
+                job.error = "Interrupted: its worker stopped (restart or redeploy)"
+                job.finished_on = func.now()
+            db.commit()
+        return len(orphans)
+
+    def heartbeat(self) -> None:
+        """Renew the lease on every job this worker owns"""
+        with SessionLocal() as db:
+            # Through the connection: a bulk update in the session would publish a keyless change
+            db.connection().execute(
+                update(Job)
+                .where(Job.worker == worker_id(), Job.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_on=datetime.utcnow())
+            )
+            db.commit()
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(settings.JOBS_HEARTBEAT_SECONDS)
+            try:
+                await run_in_threadpool(self.heartbeat)
+                await run_in_threadpool(self.recover)
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    async def submit(self, db: Session, job_type: str, params: Dict, created_by: Optional[str]) -> Job:
+        """Validate, record and enqueue a job (call on the runner's event loop)"""
+        params = validate_params(job_type, params)
+        if self._queue is None:
+            raise JobQueueFull("Job workers are not running")
+        if self._queue.full():
+            raise JobQueueFull(f"{self.queue_size} jobs already queued")
+        job = await run_in_threadpool(self._insert, db, job_type, params, created_by)
+        try:
+            # Concurrent submits can all pass the check above; the queue has the final say
+            self._queue.put_nowait(job.job_id)
+        except asyncio.QueueFull:
+            await run_in_threadpool(self._reject, db, job)
+            raise JobQueueFull(f"{self.queue_size} jobs already queued")
+        return job
+
+    def _insert(self, db: Session, job_type: str, params: Dict, created_by: Optional[str]) -> Job:
+        job = Job(
+            job_type=job_type,
+            status="queued",
+            params=params,
+            progress_done=0,
+            cancel_requested=False,
+            worker=worker_id(),
+            created_by=created_by,
+            heartbeat_on=datetime.utcnow(),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def _reject(self, db: Session, job: Job) -> None:
+        job.status = "failed"
+        job.error = "Job queue full"
+        job.finished_on = func.now()
+        db.commit()
+        db.refresh(job)
+
+    def cancel(self, db: Session, job: Job) -> Job:
+        """Cancel a queued job immediately, or ask a running one to stop"""
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_on = func.now()
+        elif job.status == "running":
+            job.cancel_requested = True
+            self.cancel_requested.add(job.job_id)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_in_threadpool(self._run, job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed the runner: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id) -> None:
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            if job is None or job.status != "queued":
+                return
+            job.status = "running"
+            job.started_on = func.now()
+            job.worker = worker_id()
+            job.heartbeat_on = datetime.utcnow()
+            db.commit()
+            job_type, params = job.job_type, job.params
+
+        context = JobContext(self, job_id, params)
+        status, result, error = "succeeded", None, None
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            try:
+                context.check_cancelled()
+                result = JOB_TYPES[job_type](db, context)
+            except JobCancelled:
+                db.rollback()
+                status = "cancelled"
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Job {job_id} ({job_type}) failed")
+                status, error = "failed", str(e)
+
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_on = func.now()
+            db.commit()
+        self.cancel_requested.discard(job_id)
+        logger.info(f"Job {job_id} ({job_type}) {status} in {time.perf_counter() - started:.1f}s")
+
+
+runner = JobRunner(workers=settings.JOBS_WORKERS, queue_size=settings.JOBS_QUEUE_SIZE)
@@ -0,0 +1,65 @@
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+import logging
+import time
+from app.config import settings
+from app.crud import stats as crud_stats
+from app.crud.stats import stats_cache
+from app.database import SessionLocal, get_engine, get_replica_engine
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """
+    Readiness of this worker. /health only says the process is up; /ready
+    says it has warmed up and is not draining, so the load balancer should
+    send it traffic.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+
+    def is_ready(self) -> bool:
+        return self.ready and not self.draining
+
+
+lifecycle = Lifecycle()
+
+
+def _engines() -> List:
+    return [e for e in (get_engine(), get_replica_engine()) if e is not None]
+
+
+def warm_pool(db_engine, connections: int) -> int:
+    """Open up to `connections` pooled connections so first requests do not pay for TLS and auth"""
+    opened = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            connection = db_engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def warm_up() -> None:
+    """Blocking warm-up run once per worker before it reports ready"""
+    started = time.perf_counter()
+    configure_mappers()
+    for db_engine in _engines():
+        try:
+            opened = warm_pool(db_engine, settings.DB_POOL_WARM)
+            logger.info(f"Warmed {opened} connections to {db_engine.url.host}")
+        except Exception as e:
+            logger.warning(f"Could not warm connection pool for {db_engine.url.host}: {e}")
+    try:
+        with SessionLocal() as db:
+            stats_cache.get_or_set("summary", lambda: crud_stats.get_entity_counts(db))
+    except Exception as e:
+        logger.warning(f"Could not warm admin stats cache: {e}")
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
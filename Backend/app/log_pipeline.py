@@ -0,0 +1,211 @@
+"""
+Queue-based logging.
+
+Loggers only put records on a bounded queue; a listener thread formats
+them (JSON with request and trace IDs by default) and writes them, so log
+I/O never runs on the event loop. Before a record is queued, INFO and
+DEBUG records from app.* call sites are sampled once a site has logged
+LOG_SAMPLE_BURST times in a window, and LOG_MAX_PER_SECOND caps every
+record. Drops are counted in log_records_dropped_total, and the next
+record that gets through says how many were skipped.
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import orjson
+from app.config import settings
+from app import tracing
+from app.metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+SENTINEL_TIMEOUT_SECONDS = 5.0  # stop() gives the listener this long to make room
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_PIPELINE_ATTRIBUTES = {"request_id", "trace_id", "suppressed", "rate_limited"}
+
+
+class _Site:
+    __slots__ = ("window_start", "count", "suppressed")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.count = 0
+        self.suppressed = 0
+
+
+class SiteSampler(logging.Filter):
+    """
+    Keeps the first LOG_SAMPLE_BURST INFO/DEBUG records per app.* call site
+    in each LOG_SAMPLE_WINDOW_SECONDS, then one in LOG_SAMPLE_EVERY.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._sites: Dict[tuple, _Site] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not record.name.startswith("app."):
+            return True
+        burst = settings.LOG_SAMPLE_BURST
+        every = settings.LOG_SAMPLE_EVERY
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None:
+                site = self._sites[(record.pathname, record.lineno)] = _Site(now)
+            elif now - site.window_start >= settings.LOG_SAMPLE_WINDOW_SECONDS:
+                site.window_start = now
+                site.count = 0
+            site.count += 1
+            keep = site.count <= burst or (every > 0 and (site.count - burst) % every == 0)
+            if not keep:
+                site.suppressed += 1
+            elif site.suppressed:
+                record.suppressed = site.suppressed
+                site.suppressed = 0
+        if not keep:
+            LOG_RECORDS_DROPPED.inc(("sampled",))
+        return keep
+
+
+class RateLimiter(logging.Filter):
+    """Token bucket refilled at LOG_MAX_PER_SECOND (0 disables the cap)"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._tokens = float(settings.LOG_MAX_PER_SECOND)
+        self._last = time.monotonic()
+        self._dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = settings.LOG_MAX_PER_SECOND
+        if rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            self._tokens = min(float(rate), self._tokens + (now - self._last) * rate)
+            self._last = now
+            if self._tokens < 1:
+                self._dropped += 1
+                keep = False
+            else:
+                self._tokens -= 1
+                keep = True
+                if self._dropped:
+                    record.rate_limited = self._dropped
+                    self._dropped = 0
+        if not keep:
+            LOG_RECORDS_DROPPED.inc(("rate_limited",))
+        return keep
+
+
+class PipelineHandler(QueueHandler):
+    """Stamps request context on the record and queues it without formatting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the message is rendered here, so later changes to args cannot alter it
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.request_id = tracing.current_request_id()
+        record.trace_id = tracing.current_trace_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(("queue_full",))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+        }
+        for key in ("request_id", "trace_id", "suppressed", "rate_limited"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and key not in _PIPELINE_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class PipelineListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue instead of raising queue.Full"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel, timeout=SENTINEL_TIMEOUT_SECONDS)
+
+
+class LogPipeline:
+    """Root handler feeding a listener thread; restarted in forked workers"""
+
+    def __init__(self):
+        self.handler: Optional[PipelineHandler] = None
+        self.listener: Optional[PipelineListener] = None
+        self._output: Optional[logging.Handler] = None
+
+    def install(self) -> None:
+        if self.handler is not None:
+            return
+        self._output = logging.StreamHandler(sys.stderr)
+        if settings.LOG_FORMAT == "json":
+            self._output.setFormatter(JsonFormatter())
+        else:
+            self._output.setFormatter(logging.Formatter(TEXT_FORMAT))
+        self.handler = PipelineHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        self.handler.addFilter(SiteSampler())
+        self.handler.addFilter(RateLimiter())
+
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(settings.LOG_LEVEL or (logging.DEBUG if settings.DEBUG else logging.INFO))
+        self._start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start(self) -> None:
+        self.listener = PipelineListener(self.handler.queue, self._output)
+        self.listener.start()
+
+    def _after_fork(self) -> None:
+        # The listener thread does not survive fork; start a fresh one on a fresh queue
+        self.handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self._start()
+
+    def stop(self) -> None:
+        """Write everything queued so far and stop the listener"""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+
+log_pipeline = LogPipeline()
+
+
+def configure_logging() -> None:
+    log_pipeline.install()
@@ -0,0 +1,225 @@
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from app.config import settings
+from app.metrics import EVENT_LOOP_BLOCKED_SECONDS, EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+MAX_SITES = 500
+STACK_LIMIT = 40
+
+
+def _route_name(scope: Optional[dict]) -> str:
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return f"{scope.get('method')} {getattr(route, 'path', scope.get('path'))}"
+
+
+def _call_site(frame) -> str:
+    """Innermost application frame, e.g. app.bluegroups_auth.is_user_in_group:23"""
+    innermost = frame
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and module != __name__:
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    return f"{innermost.f_globals.get('__name__', '?')}.{innermost.f_code.co_name}:{innermost.f_lineno}"
+
+
+class Block:
+    """A stall caught in progress by the watchdog"""
+
+    def __init__(self, beat: float, route: str, site: str, stack: str):
+        self.beat = beat
+        self.route = route
+        self.site = site
+        self.stack = stack
+
+
+class SiteStats:
+    """Stalls for one route and call site"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = 0.0
+        self.logged_at = 0.0
+        self.stack: Optional[str] = None
+
+    def as_dict(self, route: str, site: str) -> Dict:
+        return {
+            "route": route,
+            "site": site,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag with a heartbeat task. A watchdog thread notices
+    when the heartbeat is overdue by LOOP_BLOCK_THRESHOLD_MS and captures the
+    loop thread's stack while the blocking call is still running; the request
+    task that was running is mapped back to its route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites: Dict[tuple, SiteStats] = {}
+        self._requests: Dict[asyncio.Task, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._beat = 0.0
+        self._pending: Optional[Block] = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from the loop, e.g. lifespan)"""
+        if not settings.LOOP_MONITOR_ENABLED or self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._beat = time.perf_counter()
+        self._heartbeat = self._loop.create_task(self._heartbeat_loop(), name="loop-monitor-heartbeat")
+        self._watchdog = threading.Thread(target=self._watchdog_loop, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    # ---- request attribution (loop thread) ----
+
+    def request_started(self, scope: dict) -> Optional[asyncio.Task]:
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests[task] = scope
+        return task
+
+    def request_finished(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._requests.pop(task, None)
+
+    # ---- heartbeat (loop thread) ----
+
+    async def _heartbeat_loop(self) -> None:
+        interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        while True:
+            beat = self._beat = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - beat - interval)
+            EVENT_LOOP_LAG.observe((), lag)
+            pending = self._pending
+            if pending is not None and pending.beat == beat:
+                self._pending = None
+                self._record(pending, lag * 1000)
+
+    # ---- watchdog (own thread) ----
+
+    def _watchdog_loop(self) -> None:
+        interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000
+        threshold = settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+        captured_beat = None
+        while not self._stop.wait(interval):
+            beat = self._beat
+            if beat == captured_beat or time.perf_counter() - beat - interval < threshold:
+                continue
+            captured_beat = beat
+            try:
+                self._pending = self._capture(beat)
+            except Exception as e:
+                logger.debug(f"Could not capture blocked loop stack: {e}")
+
+    def _capture(self, beat: float) -> Optional[Block]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        task = asyncio.current_task(self._loop)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+        return Block(beat, _route_name(self._requests.get(task)), _call_site(frame), stack)
+
+    # ---- reporting ----
+
+    def _record(self, block: Block, lag_ms: float) -> None:
+        labels = (block.route, block.site)
+        EVENT_LOOP_BLOCKS.inc(labels)
+        EVENT_LOOP_BLOCKED_SECONDS.inc(labels, lag_ms / 1000)
+        now = time.time()
+        with self._lock:
+            stats = self._sites.get(labels)
+            if stats is None:
+                if len(self._sites) >= MAX_SITES:
+                    return
+                stats = self._sites[labels] = SiteStats()
+            stats.count += 1
+            stats.total_ms += lag_ms
+            stats.max_ms = max(stats.max_ms, lag_ms)
+            stats.last_seen = now
+            stats.stack = block.stack
+            should_log = now - stats.logged_at >= settings.LOOP_BLOCK_LOG_INTERVAL
+            if should_log:
+                stats.logged_at = now
+        if should_log:
+            logger.warning(
+                f"Event loop blocked for {lag_ms:.0f}ms on {block.route} at {block.site}:\n{block.stack}"
+            )
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict]:
+        """Call sites that have blocked the loop since startup"""
+        with self._lock:
+            rows = [stats.as_dict(route, site) for (route, site), stats in self._sites.items()]
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+
+
+loop_monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """Remembers which request each task is serving so stalls can be attributed"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = loop_monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.request_finished(task)
@@ -1,30 +1,87 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from authlib.integrations.starlette_client import OAuth
 from app.config import settings
 from app.api.v1.api import api_router
+from app.query_stats import QueryStatsMiddleware
+from app.response_cache import CachedResponseHit, ResponseCacheMiddleware, cached_response_hit_handler
+from app import metrics, invalidation
+from app.responses import FastJSONResponse
+from app.compression import CompressionMiddleware
+from app.static_files import PrecompressedStaticFiles, SpaShell
+from app.jobs import runner as job_runner
+from app.database import dispose_engines, get_engine
+from app.lifecycle import lifecycle, warm_up
+from app.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from app.profiling import ProfilingMiddleware
+from app.log_pipeline import configure_logging
+from app.tracing import TracingMiddleware, exporter as trace_exporter
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import hmac
 import logging
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import exc as sa_exc
 import os
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG if settings.DEBUG else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging goes through a queue to a writer thread (see app.log_pipeline)
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
+spa_shell = SpaShell(os.path.join("frontend", "build", "index.html"))
+static_files = PrecompressedStaticFiles(directory="frontend/build/static", check_dir=False)
+
+
+def preload() -> None:
+    """Load the frontend into memory (the server runs this before forking workers)"""
+    static_files.load()
+    spa_shell.load()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("=" * 80)
+    logger.info("APPLICATION STARTING")
+    logger.info(f"Frontend URL: {settings.FRONTEND_URL}")
+    logger.info(f"Client ID: {settings.IBM_CLIENT_ID}")
+    logger.info(f"Discovery Endpoint: {settings.IBM_DISCOVERY_ENDPOINT}")
+    logger.info("=" * 80)
+    metrics.start_flusher()
+    loop_monitor.start()
+    invalidation.start_listener(get_engine())
+    job_runner.start()
+    await run_in_threadpool(preload)
+    await run_in_threadpool(warm_up)
+    lifecycle.ready = True
+    logger.info(f"Worker {os.getpid()} ready")
+
+    yield
+
+    # uvicorn has stopped accepting connections and drained in-flight requests
+    lifecycle.ready = False
+    await job_runner.stop()
+    invalidation.stop_listener()
+    await loop_monitor.stop()
+    metrics.write_snapshot()
+    await run_in_threadpool(trace_exporter.flush)
+    dispose_engines()
+    logger.info(f"Worker {os.getpid()} stopped")
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
+# X-Profile requests from administrators (innermost, so the session is available)
+app.add_middleware(ProfilingMiddleware)
+
 # Add Session Middleware (MUST be before CORS for cookies to work)
 app.add_middleware(
     SessionMiddleware,
@@ -47,43 +104,75 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries", "X-Trace-Id", "X-Request-Id"],
 )
 
-# Configure OAuth with Authlib
-oauth = OAuth()
-oauth.register(
-    name='appid',
-    client_id=settings.IBM_CLIENT_ID,
-    client_secret=settings.IBM_CLIENT_SECRET,
-    server_metadata_url=settings.IBM_DISCOVERY_ENDPOINT,
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
+# Stores serialized bodies for routes using the cache_response dependency
+app.add_middleware(ResponseCacheMiddleware)
 
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_PREFIX)
+# Per-request SQL statement counts (X-DB-Queries / Server-Timing headers)
+app.add_middleware(QueryStatsMiddleware)
 
-from fastapi.staticfiles import StaticFiles
-app.mount("/static", StaticFiles(directory="frontend/build/static"), name="static")
+# Request count / latency / in-flight per route template (served at /metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
-# --- React SPA fallback ---
-@app.get("/{path_name:path}")
-async def spa_fallback(path_name: str):
-    return FileResponse(os.path.join("frontend", "build", "index.html"))
+# Attributes event-loop stalls to the route being served
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
 
+# gzip/brotli for responses above COMPRESSION_MIN_SIZE (outermost, so it sees final bodies)
+app.add_middleware(CompressionMiddleware)
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("=" * 80)
-    logger.info("APPLICATION STARTING")
-    logger.info(f"Frontend URL: {settings.FRONTEND_URL}")
-    logger.info(f"Client ID: {settings.IBM_CLIENT_ID}")
-    logger.info(f"Discovery Endpoint: {settings.IBM_DISCOVERY_ENDPOINT}")
-    logger.info("=" * 80)
+# Trace ID for every request and spans for sampled ones (outermost, so the server span covers everything)
+app.add_middleware(TracingMiddleware)
+
+app.add_exception_handler(CachedResponseHit, cached_response_hit_handler)
 
+# Postgres SQLSTATE raised when statement_timeout cancels a query
+QUERY_CANCELED = "57014"
 
 
+@app.exception_handler(sa_exc.OperationalError)
+async def database_operational_error_handler(request: Request, exc: sa_exc.OperationalError):
+    if getattr(exc.orig, "pgcode", None) == QUERY_CANCELED:
+        logger.warning(f"Query cancelled by statement_timeout on {request.url.path}")
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "Database query timed out"}
+        )
+    logger.error(f"Database error on {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database unavailable"}
+    )
+
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def database_pool_timeout_handler(request: Request, exc: sa_exc.TimeoutError):
+    logger.warning(f"Timed out waiting for a database connection on {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database busy, please retry"}
+    )
+
+# Include API router
+app.include_router(api_router, prefix=settings.API_V1_PREFIX)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled", status_code=status.HTTP_404_NOT_FOUND)
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            return PlainTextResponse("unauthorized", status_code=status.HTTP_401_UNAUTHORIZED)
+    elif not settings.METRICS_ALLOW_UNAUTHENTICATED:
+        # X-Forwarded-For is trusted from anywhere, so the client address cannot tell internal scrapers apart
+        return PlainTextResponse("set METRICS_TOKEN to enable scraping", status_code=status.HTTP_403_FORBIDDEN)
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 
 @app.get("/")
 async def root():
@@ -102,10 +191,32 @@ async def debug(request: Request):
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: warmed up and not draining, safe to route traffic here"""
+    if not lifecycle.is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "draining" if lifecycle.draining else "starting"}
+        )
+    return {"status": "ready"}
+
+
+app.mount("/static", static_files, name="static")
+
+# --- React SPA fallback (registered last so it never shadows real routes) ---
+@app.get("/{path_name:path}")
+async def spa_fallback(path_name: str, request: Request):
+    if request.url.path.startswith(f"{settings.API_V1_PREFIX}/"):
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not Found"})
+    return spa_shell.response(request)
+
 
 if __name__ == "__main__":
+    # Development server; production runs `python -m app.server`
     import uvicorn
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,462 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from starlette.routing import Match
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from app.config import settings
+from app import tracing
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+LOOP_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+REGISTRY: List["Metric"] = []
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    """
+    Base class for in-process metrics.
+
+    Values live in one dict per thread, so recording never takes a lock;
+    shards are merged when the metrics are collected.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        self._function: Optional[Callable[[], Iterable[Tuple[Labels, float]]]] = None
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def set_function(self, function: Callable[[], Iterable[Tuple[Labels, float]]]) -> None:
+        """Compute the samples at collection time, for values kept elsewhere (e.g. pool stats)"""
+        self._function = function
+
+    def collect(self) -> Dict[Labels, object]:
+        if self._function is not None:
+            try:
+                return {tuple(labels): value for labels, value in self._function()}
+            except Exception as e:
+                logger.debug(f"{self.name} collection failed: {e}")
+                return {}
+        merged = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                merged[labels] = self._merge(merged.get(labels), value)
+        return merged
+
+    def _merge(self, current, value):
+        return value if current is None else current + value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float) -> None:
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            # per-bucket counts (non-cumulative), +Inf bucket, sum
+            values = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    @contextmanager
+    def time(self, labels: Labels = ()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - start)
+
+    def _merge(self, current, value):
+        if current is None:
+            return list(value)
+        return [a + b for a, b in zip(current, value)]
+
+
+# ==================== Metric definitions ====================
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("method", "route")
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",), DB_BUCKETS
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Connection pool occupancy", ("engine", "state")
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connection checkouts", ("engine",)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Connection checkouts that timed out", ("engine",)
+)
+OUTBOUND_LATENCY = Histogram(
+    "outbound_request_duration_seconds", "Outbound HTTP call latency", ("target", "operation", "outcome")
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups", ("cache", "result")
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat woke up", (), LOOP_BUCKETS
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total", "Event loop stalls over LOOP_BLOCK_THRESHOLD_MS", ("route", "site")
+)
+EVENT_LOOP_BLOCKED_SECONDS = Counter(
+    "event_loop_blocked_seconds_total", "Time the event loop spent stalled", ("route", "site")
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Coalesced calls by role (leader runs the query)", ("group", "role")
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records not written, by reason (sampled, rate_limited, queue_full)", ("reason",)
+)
+
+
+# ==================== Recording helpers ====================
+
+@contextmanager
+def observe_outbound(target: str, operation: str):
+    """Time an outbound call, e.g. with observe_outbound("bluepages", "inAGroup")"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.start_span(f"{target} {operation}", tracing.KIND_CLIENT, **{"peer.service": target}):
+            yield
+        outcome = "ok"
+    finally:
+        OUTBOUND_LATENCY.observe((target, operation, outcome), time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc((cache, "hit" if hit else "miss"))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERY_LATENCY.observe((operation,), time.perf_counter() - context._metrics_start)
+
+
+def instrument(engine) -> None:
+    """Attach statement timing to an engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_samples(field: str, with_state: bool = False):
+    from app import database
+
+    engines = [("primary", database.get_engine())]
+    if database.get_replica_engine() is not None:
+        engines.append(("replica", database.get_replica_engine()))
+    for name, db_engine in engines:
+        stats = database.get_pool_stats(db_engine)
+        if with_state:
+            for state in ("checked_out", "checked_in", "overflow"):
+                yield (name, state), stats[state]
+        else:
+            yield (name,), stats.get(field, 0)
+
+
+DB_POOL_CONNECTIONS.set_function(lambda: _pool_samples("", with_state=True))
+DB_POOL_CHECKOUTS.set_function(lambda: _pool_samples("checkouts"))
+DB_POOL_TIMEOUTS.set_function(lambda: _pool_samples("timeouts"))
+
+
+# ==================== Multi-worker aggregation ====================
+
+# Counters and histograms of workers that have exited, merged into one file
+EXITED_SNAPSHOT = "metrics_exited.json"
+
+def _snapshot() -> dict:
+    return {
+        metric.name: [[list(labels), value] for labels, value in metric.collect().items()]
+        for metric in REGISTRY
+    }
+
+
+def _write_json(path: str, content: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot() -> None:
+    """Persist this worker's values for aggregation by whichever worker is scraped"""
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    _write_json(os.path.join(directory, f"metrics_{os.getpid()}.json"), {"pid": os.getpid(), "metrics": _snapshot()})
+
+
+def retire_snapshot(pid: int) -> None:
+    """
+    Fold an exited worker's counters and histograms into metrics_exited.json
+    and delete its snapshot, so restarted workers do not leave a file each.
+    Called by the supervisor once the worker has been reaped.
+    """
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        snapshot = {}
+    exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+    try:
+        with open(exited_path) as f:
+            exited = json.load(f)["metrics"]
+    except (OSError, ValueError, KeyError):
+        exited = {}
+
+    by_name = {metric.name: metric for metric in REGISTRY}
+    for name, samples in snapshot.get("metrics", {}).items():
+        metric = by_name.get(name)
+        if metric is None or metric.type == "gauge":
+            continue
+        values = {tuple(labels): value for labels, value in exited.get(name, [])}
+        for labels, value in samples:
+            labels = tuple(labels)
+            values[labels] = metric._merge(values.get(labels), value)
+        exited[name] = [[list(labels), value] for labels, value in values.items()]
+    _write_json(exited_path, {"pid": None, "metrics": exited})
+    os.remove(path)
+
+
+def retire_stale_snapshots() -> None:
+    """Retire snapshots left by workers of a previous run, or killed without being reaped"""
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        pid = os.path.basename(path)[len("metrics_"):-len(".json")]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            retire_snapshot(int(pid))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect_all() -> Dict[str, Dict[Labels, object]]:
+    """Merge metrics from every worker snapshot (or just this process)"""
+    by_name = {metric.name: metric for metric in REGISTRY}
+    merged = {metric.name: metric.collect() for metric in REGISTRY}
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return merged
+
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pid = snapshot.get("pid")
+        if pid == os.getpid():
+            continue
+        alive = pid is not None and _pid_alive(pid)
+        for name, samples in snapshot.get("metrics", {}).items():
+            metric = by_name.get(name)
+            if metric is None:
+                continue
+            # a dead worker's counters still count; its gauges do not
+            if metric.type == "gauge" and not alive:
+                continue
+            values = merged[name]
+            for labels, value in samples:
+                labels = tuple(labels)
+                values[labels] = metric._merge(values.get(labels), value)
+    return merged
+
+
+def _flush_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot()
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+
+def start_flusher() -> None:
+    """Periodically publish this worker's metrics when running multiple workers"""
+    if not settings.METRICS_MULTIPROC_DIR:
+        return
+    os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+    thread = threading.Thread(
+        target=_flush_loop,
+        args=(settings.METRICS_FLUSH_SECONDS,),
+        name="metrics-flusher",
+        daemon=True
+    )
+    thread.start()
+
+
+# ==================== Exposition ====================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labels: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    collected = _collect_all()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for labels, value in sorted(collected[metric.name].items()):
+            if metric.type == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value[:-1]):
+                    cumulative += count
+                    le = 'le="+Inf"' if math.isinf(bound) else f'le="{bound}"'
+                    lines.append(
+                        f"{metric.name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}"
+                    )
+                label_str = _format_labels(metric.labelnames, labels)
+                lines.append(f"{metric.name}_sum{label_str} {_format_value(value[-1])}")
+                lines.append(f"{metric.name}_count{label_str} {cumulative}")
+            else:
+                lines.append(
+                    f"{metric.name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+# ==================== Middleware ====================
+
+def resolve_route(scope) -> str:
+    """Route template for a request, so metrics are labelled by route not by URL"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return "unmatched"
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records request count, latency and in-flight requests per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = resolve_route(scope)
+        labels = (method, route)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec(labels)
+            HTTP_LATENCY.observe(labels, time.perf_counter() - start)
+            HTTP_REQUESTS.inc((method, route, str(status_code)))
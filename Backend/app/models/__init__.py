@@ -7,6 +7,8 @@ from app.models.staffing import StaffingDetail
 from app.models.pricing import PricingDetail
 from app.models.wbs import WBS
 from app.models.activity_wbs import ActivityWBS
+from app.models.tombstone import Tombstone
+from app.models.job import Job
 
 __all__ = [
     "Country",
@@ -19,4 +21,6 @@ __all__ = [
     "PricingDetail"
     "WBS",
     "ActivityWBS",
+    "Tombstone",
+    "Job",
 ]
\ No newline at end of file
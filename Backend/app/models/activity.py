@@ -28,8 +28,8 @@ class Activity(Base):
     completion_criteria = Column(Text)
     wbs = Column(String(100))
     week = Column(Integer)
-    created_on = Column(TIMESTAMP, server_default=func.now())
-    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_on = Column(TIMESTAMP, server_default=func.now(), index=True)
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
     
     # Relationships
     offerings = relationship(
@@ -60,7 +60,8 @@ class OfferingActivity(Base):
     activity_id = Column(UUID(as_uuid=True), ForeignKey("activities.activity_id", ondelete="CASCADE"), primary_key=True)
     sequence = Column(Integer)
     is_mandatory = Column(Boolean, default=True)
-    created_on = Column(TIMESTAMP, server_default=func.now())
+    created_on = Column(TIMESTAMP, server_default=func.now(), index=True)
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
     
     # Relationships
     offering = relationship("Offering", back_populates="activities")
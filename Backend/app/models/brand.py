@@ -13,4 +13,4 @@ class Brand(Base):
     description = Column(Text)
 
     # Relationships
-    products = relationship("Product", back_populates="brand", cascade="all, delete-orphan")
+    products = relationship("Product", back_populates="brand", cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Integer, Boolean, Text, JSON, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+
+class Job(Base):
+    """A background operation queued through /jobs"""
+    __tablename__ = "jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    params = Column(JSON().with_variant(JSONB, "postgresql"))
+    result = Column(JSON().with_variant(JSONB, "postgresql"))
+    error = Column(Text)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer)
+    progress_message = Column(String(255))
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker = Column(String(255))
+    created_by = Column(String(255))
+    created_on = Column(TIMESTAMP, server_default=func.now(), index=True)
+    started_on = Column(TIMESTAMP)
+    finished_on = Column(TIMESTAMP)
+    heartbeat_on = Column(TIMESTAMP)  # renewed by the owning worker; stale means the worker is gone
@@ -48,8 +48,8 @@ class Offering(Base):
     part_numbers = Column(String(100))
     sale_price = Column(DECIMAL(12, 2))
 
-    created_on = Column(TIMESTAMP, server_default=func.now())
-    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_on = Column(TIMESTAMP, server_default=func.now(), index=True)
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
 
     # Relationships
     product = relationship("Product", back_populates="offerings")
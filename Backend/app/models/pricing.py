@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, DECIMAL, UniqueConstraint
+from sqlalchemy import Column, String, Integer, DECIMAL, TIMESTAMP, UniqueConstraint
+from sqlalchemy.sql import func
 from app.database import Base
 
 
@@ -12,4 +13,5 @@ class PricingDetail(Base):
     role = Column(String(100), primary_key=True)
     band = Column(Integer, primary_key=True)
     cost = Column(DECIMAL(12, 2))
-    sale_price = Column(DECIMAL(12, 2))
\ No newline at end of file
+    sale_price = Column(DECIMAL(12, 2))
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
\ No newline at end of file
@@ -15,4 +15,4 @@ class Product(Base):
 
     # Relationships
     brand = relationship("Brand", back_populates="products")
-    offerings = relationship("Offering", back_populates="product", cascade="all, delete-orphan")
+    offerings = relationship("Offering", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
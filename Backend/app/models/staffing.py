@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import uuid
 from app.database import Base
 
@@ -15,6 +16,7 @@ class StaffingDetail(Base):
     role = Column(String(100))
     band = Column(Integer)
     hours = Column(Integer)
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
 
     # Relationships
     activity = relationship("Activity", back_populates="staffing_details")
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, BigInteger, Integer, String, JSON, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Tombstone(Base):
+    """
+    One row per deleted catalog row, written by database triggers so that
+    cascaded and bulk deletes are captured too. Read by the delta sync feed.
+    """
+    __tablename__ = "tombstones"
+
+    tombstone_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity_type = Column(String(64), nullable=False)
+    entity_key = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    deleted_on = Column(TIMESTAMP, server_default=func.now(), nullable=False, index=True)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import uuid
 from app.database import Base
 
@@ -11,6 +12,7 @@ class WBS(Base):
     wbs_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     wbs_description = Column(String(255), nullable=False)
     wbs_weeks = Column(Integer)
+    updated_on = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True)
     
     # Relationships
     activities = relationship(
@@ -0,0 +1,392 @@
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+import asyncio
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from app.config import settings
+from app.query_stats import statement_shape
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = b"__profile="
+MAX_STACK_DEPTH = 128
+TOP_STATEMENTS = 20
+TOP_ALLOCATIONS = 25
+
+_active_profile: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+
+def current_profile() -> Optional["Profile"]:
+    return _active_profile.get()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+class Profile:
+    """
+    Samples the stacks doing work for one request: the event loop while the
+    request's task is running, and threadpool threads while they run a
+    statement or a claimed function for it. Samples where neither is running
+    are recorded as [awaiting], so the folded stacks add up to wall time.
+    """
+
+    def __init__(self, scope: dict, memory: bool):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = scope.get("method")
+        self.path = scope.get("path")
+        self.scope = scope
+        self.memory = memory
+        self.interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.started_at = time.time()
+        self.status_code: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.statements: Dict[str, List[float]] = {}
+        self.tasks = set()
+        self._claimed: Counter = Counter()        # thread id -> active claims
+        self._in_sql: Dict[int, str] = {}        # thread id -> statement shape
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profile-{self.id}", daemon=True)
+        self._wall_start = 0.0
+        self.wall_ms = 0.0
+        self._memory_start = None
+        self.allocations: Optional[Dict] = None
+
+    # ---- attribution (request, loop and worker threads) ----
+
+    def claim(self, function: Callable) -> Callable:
+        """Wrap a function bound for the threadpool so its thread is sampled"""
+        return functools.partial(_run_claimed, self, function)
+
+    def sql_started(self, statement: str) -> None:
+        self._in_sql[threading.get_ident()] = statement_shape(statement)
+
+    def sql_finished(self, duration_ms: float) -> None:
+        shape = self._in_sql.pop(threading.get_ident(), None)
+        if shape is not None:
+            self.statements.setdefault(shape, []).append(duration_ms)
+
+    # ---- sampling (own thread) ----
+
+    def start(self) -> None:
+        self.tasks.add(asyncio.current_task())
+        if self.memory:
+            self._start_tracemalloc()
+        self._wall_start = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        self._stop.set()
+        self._sampler.join()
+        if self.memory:
+            self._stop_tracemalloc()
+
+    def _sample_loop(self) -> None:
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(own_thread)
+            except Exception as e:
+                logger.debug(f"Profile sample failed: {e}")
+
+    def _sample(self, own_thread: int) -> None:
+        frames = sys._current_frames()
+        sampled = False
+        if asyncio.current_task(self._loop) in self.tasks:
+            self._record(frames.get(self._loop_thread), "loop", self._loop_thread)
+            sampled = True
+        for ident, frame in frames.items():
+            if ident in (own_thread, self._loop_thread):
+                continue
+            if self._claimed.get(ident) or ident in self._in_sql:
+                self._record(frame, "threadpool", ident)
+                sampled = True
+        if not sampled:
+            self.samples["[awaiting]"] += 1
+
+    def _record(self, frame, root: str, ident: int) -> None:
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            if frame.f_code in _ROOT_CODES:
+                break
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        stack.append(root)
+        stack.reverse()
+        shape = self._in_sql.get(ident)
+        if shape is not None:
+            stack.append(f"[sql] {shape[:120].replace(';', ',')}")
+        self.samples[";".join(stack)] += 1
+
+    # ---- allocations ----
+
+    def _start_tracemalloc(self) -> None:
+        with _memory_lock:
+            if tracemalloc.is_tracing():
+                # Someone else is tracing (another profile, or -X tracemalloc)
+                self.memory = False
+                self.allocations = {"skipped": "tracemalloc already running"}
+                return
+            tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+        self._memory_start = tracemalloc.take_snapshot()
+
+    def _stop_tracemalloc(self) -> None:
+        end = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = end.filter_traces(filters).compare_to(self._memory_start.filter_traces(filters), "lineno")
+        self._memory_start = None
+        self.allocations = {
+            "note": "process-wide while the request ran",
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    # ---- output ----
+
+    def folded(self) -> str:
+        """Folded stacks (flamegraph.pl, speedscope, inferno): `frame;frame;... count`"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def summary(self) -> Dict:
+        sample_total = sum(self.samples.values())
+        sql_samples = sum(n for stack, n in self.samples.items() if ";[sql] " in stack)
+        statements = sorted(
+            ({"statement": shape, "count": len(times), "total_ms": round(sum(times), 3)}
+             for shape, times in self.statements.items()),
+            key=lambda row: row["total_ms"], reverse=True,
+        )
+        db_ms = sum(row["total_ms"] for row in statements)
+        route = self.scope.get("route")
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": getattr(route, "path", None),
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_ms, 3),
+            "sample_interval_ms": self.interval * 1000,
+            "samples": sample_total,
+            "awaiting_samples": self.samples.get("[awaiting]", 0),
+            "db": {
+                "statements": sum(row["count"] for row in statements),
+                "total_ms": round(db_ms, 3),
+                "share_of_wall": round(db_ms / self.wall_ms, 3) if self.wall_ms else None,
+                "sql_samples": sql_samples,
+                "top": statements[:TOP_STATEMENTS],
+            },
+            "allocations": self.allocations,
+        }
+
+
+def _run_claimed(profile: Profile, function: Callable, *args, **kwargs):
+    ident = threading.get_ident()
+    profile._claimed[ident] += 1
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profile._claimed[ident] -= 1
+
+
+_memory_lock = threading.Lock()
+
+
+class ProfileStore:
+    """The last PROFILE_KEEP profiles in this worker, and on disk when PROFILE_DIR is set"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def add(self, profile: Profile) -> None:
+        entry = {"summary": profile.summary(), "folded": profile.folded()}
+        with self._lock:
+            self._profiles[profile.id] = entry
+            while len(self._profiles) > settings.PROFILE_KEEP:
+                self._profiles.popitem(last=False)
+        if settings.PROFILE_DIR:
+            try:
+                self._write(profile.id, entry)
+            except OSError as e:
+                logger.warning(f"Could not write profile {profile.id} to {settings.PROFILE_DIR}: {e}")
+
+    def _write(self, profile_id: str, entry: Dict) -> None:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(settings.PROFILE_DIR, profile_id)
+        with open(f"{base}.folded", "w") as f:
+            f.write(entry["folded"])
+        with open(f"{base}.json", "w") as f:
+            json.dump(entry["summary"], f)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is not None or not settings.PROFILE_DIR or not profile_id.isalnum():
+            return entry
+        # Profiled by another worker
+        base = os.path.join(settings.PROFILE_DIR, profile_id)
+        try:
+            with open(f"{base}.json") as f:
+                summary = json.load(f)
+            with open(f"{base}.folded") as f:
+                return {"summary": summary, "folded": f.read()}
+        except OSError:
+            return None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [entry["summary"] for entry in reversed(self._profiles.values())]
+
+
+profile_store = ProfileStore()
+
+
+# ---- SQL timing, attached only while a profile is running ----
+
+_listeners_lock = threading.Lock()
+_running_profiles = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None:
+        context._profile_start = time.perf_counter()
+        profile.sql_started(statement)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and hasattr(context, "_profile_start"):
+        profile.sql_finished((time.perf_counter() - context._profile_start) * 1000)
+
+
+def _attach_sql_listeners() -> None:
+    global _running_profiles
+    with _listeners_lock:
+        _running_profiles += 1
+        if _running_profiles == 1:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _detach_sql_listeners() -> None:
+    global _running_profiles
+    with _listeners_lock:
+        _running_profiles -= 1
+        if _running_profiles == 0:
+            event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---- trigger ----
+
+def _requested_mode(scope) -> Optional[str]:
+    """'cpu' or 'memory' when the request asks to be profiled"""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return "memory" if value.strip().lower() == b"memory" else "cpu"
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY in query:
+        value = query.split(PROFILE_QUERY, 1)[1].split(b"&", 1)[0]
+        return "memory" if value.lower() == b"memory" else "cpu"
+    return None
+
+
+async def _is_admin(scope) -> bool:
+    """Run the same checks as the require_admin dependency (honouring overrides)"""
+    from fastapi import HTTPException
+    from app.auth.dependencies import get_current_active_user
+    from app.auth.permissions import require_admin
+
+    overrides = getattr(scope.get("app"), "dependency_overrides", {})
+    try:
+        get_user = overrides.get(get_current_active_user)
+        user = get_user() if get_user else get_current_active_user(Request(scope))
+        check = overrides.get(require_admin)
+        if check is not None:
+            check()
+        else:
+            await require_admin(current_user=user)
+    except (HTTPException, AssertionError):
+        # AssertionError: no session in scope
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent by an administrator with `X-Profile: 1` (or
+    `memory` to add a tracemalloc allocation diff), or `?__profile=1`.
+    The response carries X-Profile-Id; fetch the result from
+    /admin/profiles/{id}. Other requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        mode = _requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not await _is_admin(scope):
+            logger.info(f"Ignoring profile request from a non-administrator for {scope.get('path')}")
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope, memory=mode == "memory")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        token = _active_profile.set(profile)
+        _attach_sql_listeners()
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            _detach_sql_listeners()
+            _active_profile.reset(token)
+            profile_store.add(profile)
+            logger.info(
+                f"Profiled {profile.method} {profile.path} as {profile.id}: "
+                f"{profile.wall_ms:.1f}ms, {sum(profile.samples.values())} samples"
+            )
+
+
+# Stacks are cut where the profiled work starts
+_ROOT_CODES = (ProfilingMiddleware.__call__.__code__, _run_claimed.__code__)
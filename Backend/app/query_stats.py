@@ -0,0 +1,133 @@
+from contextvars import ContextVar
+from collections import Counter
+from typing import Optional
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+import logging
+import re
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a request issues more statements than its budget"""
+
+
+class QueryStats:
+    """SQL statements issued while handling a single request"""
+
+    def __init__(self, budget: int = 0, scope: Optional[dict] = None):
+        self.budget = budget
+        self.scope = scope
+        self.count = 0
+        self.duration_ms = 0.0
+        self.shapes = Counter()
+
+    def repeated_shapes(self, threshold: int):
+        """Statement shapes executed at least `threshold` times (likely N+1)"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Stats for the request being handled, or None outside a request"""
+    return _current_stats.get()
+
+
+def statement_shape(statement: str) -> str:
+    """Statements are already parameterized; normalizing whitespace gives the shape"""
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_stats_start = time.perf_counter()
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.shapes[statement_shape(statement)] += 1
+    if settings.DB_QUERY_BUDGET_STRICT and stats.budget and stats.count > stats.budget:
+        raise QueryBudgetExceeded(
+            f"Request exceeded its query budget of {stats.budget} statements: "
+            f"{stats.repeated_shapes(2) or statement_shape(statement)}"
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.duration_ms += (time.perf_counter() - context._query_stats_start) * 1000
+
+
+def instrument(engine) -> None:
+    """Attach statement counting to an engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_budget(limit: int):
+    """
+    Dependency factory overriding the default statement budget for a route.
+    Usage: dependencies=[Depends(query_budget(5))]
+    """
+    def dependency():
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = limit
+    return dependency
+
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", scope.get("path", ""))
+
+
+def _report(scope, stats: QueryStats) -> None:
+    route = f"{scope.get('method')} {_route_path(scope)}"
+    for shape, n in stats.repeated_shapes(settings.DB_N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"Possible N+1 on {route}: statement executed {n}x: {shape[:300]}")
+    if stats.budget and stats.count > stats.budget:
+        logger.warning(
+            f"{route} issued {stats.count} statements (budget {stats.budget}, "
+            f"{stats.duration_ms:.1f}ms in database)"
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Counts statements and database time per request and reports them in the
+    X-DB-Queries and Server-Timing response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(budget=settings.DB_QUERY_BUDGET, scope=scope)
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(stats.count))
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            _report(scope, stats)
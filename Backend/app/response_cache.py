@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import Depends, Request
+from fastapi.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+import threading
+import time
+from app import metrics
+from app.auth.dependencies import get_current_active_user
+from app.changes import Change, subscribe
+from app.config import settings
+from app.database import PRIMARY_READ_SCOPE_KEY, SHARED_SESSION_SCOPE_KEY
+
+logger = logging.getLogger(__name__)
+
+# scope["state"] key carrying a cache miss from the dependency to the middleware
+_STATE_KEY = "response_cache"
+
+# Row tag prefix and collection tag per table
+ENTITY_TAGS = {
+    "brands": ("brand", "brands"),
+    "products": ("product", "products"),
+    "offerings": ("offering", "offerings"),
+    "countries": ("country", "countries"),
+    "activities": ("activity", "activities"),
+    "pricing_details": (None, "pricing"),
+    "staffing_details": (None, "staffing"),
+    "wbs": ("wbs", "wbs"),
+    "offering_activities": (None, None),
+    "activity_wbs": (None, None),
+}
+
+# Foreign key column -> tag prefix of the row it points at
+REF_TAGS = {
+    "brand_id": "brand",
+    "product_id": "product",
+    "offering_id": "offering",
+    "activity_id": "activity",
+    "wbs_id": "wbs",
+}
+
+# Deleting these cascades in the database to rows we never see a change for
+CASCADING_DELETES = {"brands", "products", "offerings", "activities", "wbs"}
+
+# Invalidation times kept before old ones are pruned
+INVALIDATED_AT_MAX = 4096
+
+
+def tags_for(change: Change) -> Optional[Set[str]]:
+    """Tags a committed change invalidates, or None to invalidate everything"""
+    if change.key is None or (change.op == "delete" and change.entity in CASCADING_DELETES):
+        return None
+    row_prefix, collection = ENTITY_TAGS.get(change.entity, (None, change.entity))
+    tags = set()
+    if collection:
+        tags.add(collection)
+    if row_prefix:
+        tags.add(f"{row_prefix}:{change.key}".lower())
+    for column, values in change.refs.items():
+        prefix = REF_TAGS.get(column)
+        if prefix:
+            tags.update(f"{prefix}:{value}".lower() for value in values)
+    return tags
+
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "tags", "expires_at")
+
+    def __init__(self, body: bytes, headers: List[Tuple[bytes, bytes]], tags: Set[str], expires_at: float):
+        self.body = body
+        self.headers = headers
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Serialized response bodies keyed by request, evicted LRU once the total
+    size exceeds max_bytes. Each entry carries dependency tags; invalidating
+    a tag drops every entry that has it.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[Tuple]] = {}
+        # Bumped on invalidation so a response computed before a write is not stored after it
+        self._generation = 0
+        self._tag_generations: Dict[str, int] = {}
+        # When each tag (or, for clear(), every tag) was last invalidated
+        self._cleared_at = float("-inf")
+        self._invalidated_at: Dict[str, float] = {}
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.record_cache("response", entry is not None)
+        return entry
+
+    def generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return (self._generation, *(self._tag_generations.get(tag, 0) for tag in tags))
+
+    def set(self, key: Tuple, body: bytes, headers: List[Tuple[bytes, bytes]],
+            tags: Set[str], generation: Tuple[int, ...]) -> None:
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            current = (self._generation, *(self._tag_generations.get(tag, 0) for tag in tags))
+            if current != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedResponse(body, headers, tags, time.monotonic() + self.ttl)
+            self.size += len(body)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self.size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidated_within(self, tags: Iterable[str], seconds: float) -> bool:
+        """Whether any of `tags` was invalidated in the last `seconds`"""
+        since = time.monotonic() - seconds
+        with self._lock:
+            return self._cleared_at > since or any(self._invalidated_at.get(tag, since) > since for tag in tags)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        now = time.monotonic()
+        with self._lock:
+            if len(self._invalidated_at) > INVALIDATED_AT_MAX:
+                cutoff = now - settings.DB_READ_YOUR_WRITES_SECONDS
+                self._invalidated_at = {tag: at for tag, at in self._invalidated_at.items() if at > cutoff}
+            for tag in tags:
+                self._invalidated_at[tag] = now
+                self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cleared_at = time.monotonic()
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+@subscribe
+def _invalidate_on_write(changes: List[Change]) -> None:
+    tags: Set[str] = set()
+    for change in changes:
+        change_tags = tags_for(change)
+        if change_tags is None:
+            response_cache.clear()
+            return
+        tags |= change_tags
+    if tags:
+        response_cache.invalidate_tags(tags)
+
+
+class CachedResponseHit(Exception):
+    """Raised by the cache dependency to short-circuit the endpoint"""
+
+    def __init__(self, entry: CachedResponse):
+        self.entry = entry
+
+
+async def cached_response_hit_handler(request: Request, exc: CachedResponseHit) -> Response:
+    response = Response(content=exc.entry.body, status_code=200)
+    response.raw_headers = [
+        *(header for header in exc.entry.headers if header[0] != b"content-length"),
+        (b"content-length", str(len(exc.entry.body)).encode()),
+        (b"x-cache", b"HIT"),
+    ]
+    return response
+
+
+def cache_response(*tag_templates: str, auth: Callable = get_current_active_user):
+    """
+    Route dependency that serves GET responses from the response cache.
+
+    Tag templates are formatted with the request's path and query params,
+    e.g. cache_response("product:{product_id}"). The key covers the path,
+    query string and the `auth` dependency, which still runs on hits.
+    List it in the route's `dependencies=[...]` so it resolves before get_db:
+    a miss shortly after one of its tags was invalidated reads the primary.
+    """
+    auth_class = getattr(auth, "__name__", repr(auth))
+
+    def dependency(request: Request, current_user: dict = Depends(auth)) -> None:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), auth_class)
+        entry = response_cache.get(key)
+        if entry is not None:
+            raise CachedResponseHit(entry)
+        params = {**request.query_params, **request.path_params}
+        try:
+            tags = {template.format(**params).lower() for template in tag_templates}
+        except KeyError:
+            return
+        generation = response_cache.generation(tags)
+        if response_cache.invalidated_within(tags, settings.DB_READ_YOUR_WRITES_SECONDS):
+            # Other clients read from the replica, which may not have the write yet
+            if SHARED_SESSION_SCOPE_KEY in request.scope:
+                return  # /batch chose its session already; serve without storing
+            request.scope[PRIMARY_READ_SCOPE_KEY] = True
+        request.scope.setdefault("state", {})[_STATE_KEY] = (key, tags, generation)
+
+    return dependency
+
+
+class ResponseCacheMiddleware:
+    """Stores the body of 200 responses whose route marked a cache miss"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        response: Dict = {}
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                pending = state.get(_STATE_KEY)
+                if pending is not None and response.get("status") == 200:
+                    chunks.append(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        key, tags, generation = pending
+                        headers = [h for h in response["headers"] if h[0] in (b"content-type", b"content-length")]
+                        response_cache.set(key, b"".join(chunks), headers, tags, generation)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,43 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Type
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import orjson
+from app import tracing
+
+
+def _default(value: Any) -> Any:
+    # Same as Pydantic's JSON mode, so fast-path and validated responses agree
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson with UUID/datetime natively and Decimal as a string"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class. Endpoints may also return one directly with
+    trusted rows (see schema_rows) to skip response_model re-validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with tracing.start_span("serialize") as span:
+            body = dumps(content)
+            span.set("http.response_content_length", len(body))
+            return body
+
+
+def schema_rows(db: Session, model, schema: Type[BaseModel], *criteria) -> List[Dict]:
+    """
+    Rows of `model` as plain dicts with exactly the fields of `schema`,
+    straight from the cursor (no ORM objects, no Pydantic validation).
+    """
+    table = model.__table__
+    statement = select(*(table.c[name] for name in schema.model_fields)).where(*criteria)
+    return [dict(row) for row in db.execute(statement).mappings()]
@@ -85,6 +85,7 @@ class OfferingActivityUpdate(BaseModel):
 
 class OfferingActivity(OfferingActivityBase):
     created_on: Optional[datetime] = None
+    updated_on: Optional[datetime] = None
     
     class Config:
         from_attributes = True
\ No newline at end of file
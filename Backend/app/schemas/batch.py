@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    path: str = Field(..., description="API path with query string, e.g. /api/v1/wbs/activity/{id}/wbs")
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+
+class BatchItemResponse(BaseModel):
+    id: Optional[str] = None
+    path: str
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse]
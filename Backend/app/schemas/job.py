@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+from app.schemas.pricing import PricingDetailCreate
+
+
+class JobCreate(BaseModel):
+    job_type: str
+    params: Dict[str, Any] = {}
+
+
+class JobSummary(BaseModel):
+    """Job status without its (possibly large) result"""
+    job_id: UUID
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    progress_message: Optional[str] = None
+    cancel_requested: bool = False
+    created_by: Optional[str] = None
+    created_on: Optional[datetime] = None
+    started_on: Optional[datetime] = None
+    finished_on: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Job(JobSummary):
+    result: Optional[Any] = None
+
+
+# ==================== Params per job type ====================
+
+class ExportCatalogParams(BaseModel):
+    class Config:
+        extra = "forbid"
+
+
+class DeleteBrandParams(BaseModel):
+    brand_id: UUID
+
+    class Config:
+        extra = "forbid"
+
+
+class RepriceParams(BaseModel):
+    percent: Decimal = Field(..., gt=-100, le=1000, description="e.g. 3.5 or -2")
+    column: Literal["sale_price", "cost"] = "sale_price"
+    country: Optional[str] = None
+    role: Optional[str] = None
+
+    class Config:
+        extra = "forbid"
+
+
+class ImportPricingParams(BaseModel):
+    rows: List[PricingDetailCreate] = Field(..., min_length=1, max_length=100000)
+
+    class Config:
+        extra = "forbid"
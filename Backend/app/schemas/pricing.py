@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from decimal import Decimal
+from datetime import datetime
 
 
 class PricingDetailBase(BaseModel):
@@ -25,6 +26,7 @@ class PricingDetailUpdate(BaseModel):
 
 
 class PricingDetail(PricingDetailBase):
+    updated_on: Optional[datetime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from uuid import UUID
+from datetime import datetime
 
 
 class StaffingDetailBase(BaseModel):
@@ -26,6 +27,7 @@ class StaffingDetailUpdate(BaseModel):
 
 class StaffingDetail(StaffingDetailBase):
     staffing_id: UUID
+    updated_on: Optional[datetime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
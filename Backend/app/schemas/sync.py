@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List
+from datetime import datetime
+from app.schemas.offering import Offering
+from app.schemas.activity import Activity, OfferingActivity
+from app.schemas.staffing import StaffingDetail
+from app.schemas.pricing import PricingDetail
+from app.schemas.wbs import WBSResponse
+
+
+class Tombstone(BaseModel):
+    """A deleted row; entity_key holds its primary key columns"""
+    entity_type: str
+    entity_key: Dict[str, Any]
+    deleted_on: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncFeed(BaseModel):
+    """Rows changed and deleted since `since`. Pass `next_since` on the next call."""
+    since: datetime
+    until: datetime
+    next_since: datetime
+    offerings: List[Offering] = []
+    activities: List[Activity] = []
+    offering_activities: List[OfferingActivity] = []
+    staffing_details: List[StaffingDetail] = []
+    wbs: List[WBSResponse] = []
+    pricing_details: List[PricingDetail] = []
+    deleted: List[Tombstone] = []
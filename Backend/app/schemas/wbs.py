@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from typing import Optional
+from datetime import datetime
 
 
 class WBSBase(BaseModel):
@@ -19,6 +20,7 @@ class WBSUpdate(BaseModel):
 
 class WBSResponse(WBSBase):
     wbs_id: UUID
+    updated_on: Optional[datetime] = None
 
     class Config:
         from_attributes = True
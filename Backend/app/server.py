@@ -0,0 +1,183 @@
+"""
+Production entry point: python -m app.server
+
+The parent process imports the application once (so modules, the static
+asset cache and compiled schemas are shared copy-on-write), binds the
+listening socket and forks SERVER_WORKERS uvicorn workers. It restarts
+workers that die and, on SIGTERM/SIGINT, asks them to drain and exit.
+"""
+from typing import Dict
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import uvicorn
+from app.config import settings
+
+logger = logging.getLogger("app.server")
+
+# A worker that dies sooner than this after starting is crash-looping
+MIN_WORKER_UPTIME = 5.0
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that reports not-ready as soon as shutdown is requested
+    and keeps serving for SERVER_DRAIN_SECONDS, so the load balancer stops
+    routing to it before the listening socket closes.
+    """
+
+    def handle_exit(self, sig, frame) -> None:
+        from app.lifecycle import lifecycle
+        lifecycle.draining = True
+        super().handle_exit(sig, frame)
+
+    async def shutdown(self, sockets=None) -> None:
+        if settings.SERVER_DRAIN_SECONDS and not self.force_exit:
+            logger.info(f"Draining for {settings.SERVER_DRAIN_SECONDS}s before closing listeners")
+            await asyncio.sleep(settings.SERVER_DRAIN_SECONDS)
+        await super().shutdown(sockets=sockets)
+
+
+def build_config() -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        # uvicorn's records propagate to the root logger and go through app.log_pipeline
+        log_config=None,
+    )
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    # Connections are never opened in the parent, but be safe with inherited pools
+    from app.database import dispose_engines
+    dispose_engines(close=False)
+    DrainingServer(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.config, self.sock)
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                try:
+                    # os._exit skips atexit, so write out queued log records first
+                    from app.log_pipeline import log_pipeline
+                    log_pipeline.stop()
+                except Exception:
+                    pass
+                finally:
+                    os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def _retire(self, pid: int) -> None:
+        # Fold the exited worker's metrics snapshot into the shared totals
+        from app import metrics
+        try:
+            metrics.retire_snapshot(pid)
+        except OSError as e:
+            logger.warning(f"Failed to retire metrics snapshot of worker {pid}: {e}")
+
+    def _handle_stop(self, sig, frame) -> None:
+        if not self.stopping:
+            logger.info(f"Received {signal.Signals(sig).name}, stopping {len(self.children)} workers")
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        from app import metrics
+        try:
+            metrics.retire_stale_snapshots()
+        except OSError as e:
+            logger.warning(f"Failed to retire stale metrics snapshots: {e}")
+        # Keep preloaded objects out of the collector so it does not dirty shared pages
+        gc.freeze()
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            self._retire(pid)
+            if started is None or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            if not self.stopping:
+                self.spawn()
+
+        return self._reap()
+
+    def _reap(self) -> int:
+        deadline = time.monotonic() + settings.SERVER_DRAIN_SECONDS + settings.SERVER_GRACEFUL_TIMEOUT + 10
+        while self.children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+                self._retire(pid)
+            else:
+                time.sleep(0.1)
+        for pid in self.children:
+            logger.warning(f"Worker {pid} did not exit in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+        return 0
+
+
+def main() -> int:
+    config = build_config()
+    # Import the application (and configure logging) before forking
+    config.load()
+    from app.main import preload
+    preload()
+    workers = max(settings.SERVER_WORKERS, 1)
+    if workers == 1:
+        DrainingServer(config).run()
+        return 0
+    sock = config.bind_socket()
+    logger.info(f"Preloaded {config.app!r}, forking {workers} workers")
+    try:
+        return Supervisor(config, sock, workers).run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
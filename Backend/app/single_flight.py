@@ -0,0 +1,76 @@
+from typing import Any, Callable, Dict, Hashable
+from fastapi import Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import logging
+from app import metrics, tracing
+from app.database import SessionLocal, uses_replica
+from app.profiling import current_profile
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key runs
+    the (blocking) function in the threadpool, everyone arriving while it
+    runs awaits the same result or exception. Nothing is kept afterwards;
+    this is not a cache.
+
+    The function gets a session opened and closed inside the shared task,
+    never the leader request's own, which is closed as soon as that request
+    ends (e.g. on client disconnect) while followers still wait. Callers
+    routed to the replica and to the primary (read-your-writes window) never
+    share a result. The result is shared between requests, so it must not
+    hold ORM objects - return dicts or schema instances.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, request: Request, key: Hashable, function: Callable[..., Any], *args) -> Any:
+        """function(db, *args) once for every concurrent caller with `key`"""
+        use_replica = uses_replica(request)
+        key = (key, use_replica)
+        task = self._in_flight.get(key)
+        if task is None:
+            metrics.SINGLE_FLIGHT_CALLS.inc((self.name, "leader"))
+            profile = current_profile()
+            if profile is not None:
+                function = profile.claim(function)
+            # A task of its own, so a cancelled caller does not cancel the others
+            task = asyncio.ensure_future(run_in_threadpool(_with_session, self.name, use_replica, function, *args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            metrics.SINGLE_FLIGHT_CALLS.inc((self.name, "follower"))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+
+def _with_session(name: str, use_replica: bool, function: Callable[..., Any], *args) -> Any:
+    with tracing.start_span(f"single_flight {name}"):
+        db: Session = SessionLocal(use_replica=use_replica)
+        try:
+            return function(db, *args)
+        finally:
+            db.close()
+
+
+def request_key(request: Request, auth_class: str) -> tuple:
+    """Coalescing key: route template, path and query params, authorization class"""
+    route = request.scope.get("route")
+    return (
+        getattr(route, "path", request.url.path),
+        tuple(sorted(request.path_params.items())),
+        tuple(sorted(request.query_params.multi_items())),
+        auth_class,
+    )
+
+
+catalog_flight = SingleFlight("catalog")
+admin_flight = SingleFlight("admin")
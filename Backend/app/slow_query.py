@@ -0,0 +1,234 @@
+from collections import deque
+from typing import Dict, List, Optional
+from sqlalchemy import event
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from app.config import settings
+from app import query_stats
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists (one bind per element) collapse to a single shape
+_IN_LIST = re.compile(r"IN \((?:\s*%\([^)]+\)s\s*,?)+\)|IN \((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+
+MAX_SHAPES = 1000
+SAMPLES_PER_SHAPE = 500
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def normalize(statement: str) -> str:
+    return _IN_LIST.sub("IN (...)", query_stats.statement_shape(statement))
+
+
+def redact(parameters) -> object:
+    """Keep parameter names and types, never values"""
+    def describe(value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return f"<str:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(parameters, dict):
+        return {key: describe(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact(p) for p in parameters[:3]]
+        return [describe(value) for value in parameters]
+    return describe(parameters)
+
+
+def _calling_function() -> str:
+    """Nearest CRUD (or endpoint) function on the stack that issued the statement"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.crud."):
+            return f"{module}.{frame.f_code.co_name}"
+        if fallback is None and module.startswith("app.api."):
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+def _current_route() -> str:
+    stats = query_stats.current_stats()
+    if stats is None or stats.scope is None:
+        return "background"
+    route = stats.scope.get("route")
+    return f"{stats.scope.get('method')} {getattr(route, 'path', stats.scope.get('path'))}"
+
+
+class ShapeStats:
+    """Execution times for one normalized statement"""
+
+    def __init__(self):
+        self.count = 0
+        self.slow_count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_SHAPE)
+        self.last_route: Optional[str] = None
+        self.last_caller: Optional[str] = None
+        self.plan: Optional[str] = None
+        self.plan_captured_at = 0.0
+
+    def as_dict(self, shape: str) -> Dict:
+        ordered = sorted(self.samples)
+        return {
+            "statement": shape,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "last_route": self.last_route,
+            "last_caller": self.last_caller,
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """Per-shape statement timings since startup, plus EXPLAIN capture for slow SELECTs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, ShapeStats] = {}
+        self._normalized: Dict[str, str] = {}
+        self._explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def _shape_for(self, statement: str) -> str:
+        shape = self._normalized.get(statement)
+        if shape is None:
+            shape = normalize(statement)
+            if len(self._normalized) < MAX_SHAPES * 4:
+                self._normalized[statement] = shape
+        return shape
+
+    def record(self, conn, statement: str, parameters, duration_ms: float) -> None:
+        shape = self._shape_for(statement)
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= MAX_SHAPES:
+                    return
+                stats = self._shapes[shape] = ShapeStats()
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.samples.append(duration_ms)
+
+        threshold = settings.DB_SLOW_QUERY_MS
+        if not threshold or duration_ms < threshold:
+            return
+
+        route = _current_route()
+        caller = _calling_function()
+        with self._lock:
+            stats.slow_count += 1
+            stats.last_route = route
+            stats.last_caller = caller
+        logger.warning(
+            f"Slow query ({duration_ms:.0f}ms) on {route} via {caller}: "
+            f"{shape[:1000]} params={redact(parameters)}"
+        )
+        if settings.DB_SLOW_QUERY_EXPLAIN and self._should_explain(shape, stats):
+            self._enqueue_explain(conn.engine, shape, statement, parameters)
+
+    def _should_explain(self, shape: str, stats: ShapeStats) -> bool:
+        # ANALYZE executes the statement again, so only ever do it for reads
+        if not shape.upper().startswith("SELECT"):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if stats.plan_captured_at and now - stats.plan_captured_at < settings.DB_SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            stats.plan_captured_at = now
+        return True
+
+    def _enqueue_explain(self, engine, shape, statement, parameters) -> None:
+        if self._explain_thread is None:
+            with self._lock:
+                if self._explain_thread is None:
+                    self._explain_thread = threading.Thread(
+                        target=self._explain_worker, name="slow-query-explain", daemon=True
+                    )
+                    self._explain_thread.start()
+        try:
+            self._explain_queue.put_nowait((engine, shape, statement, parameters))
+        except queue.Full:
+            logger.debug("EXPLAIN queue full, skipping plan capture")
+
+    def _explain_worker(self) -> None:
+        while True:
+            engine, shape, statement, parameters = self._explain_queue.get()
+            try:
+                plan = self._explain(engine, statement, parameters)
+            except Exception as e:
+                logger.warning(f"EXPLAIN failed for slow query {shape[:200]}: {e}")
+                continue
+            with self._lock:
+                stats = self._shapes.get(shape)
+                if stats is not None:
+                    stats.plan = plan
+            logger.info(f"EXPLAIN (ANALYZE, BUFFERS) for slow query {shape[:200]}:\n{plan}")
+
+    def _explain(self, engine, statement: str, parameters) -> str:
+        timeout_ms = settings.DB_SLOW_QUERY_MS * 10
+        with engine.connect().execution_options(slow_query_log=False) as conn:
+            transaction = conn.begin()
+            try:
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+                rows = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                ).fetchall()
+            finally:
+                transaction.rollback()
+        return "\n".join(row[0] for row in rows)
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict]:
+        """Slowest statement shapes since startup"""
+        with self._lock:
+            rows = [stats.as_dict(shape) for shape, stats in self._shapes.items()]
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+    if not context.execution_options.get("slow_query_log", True):
+        return
+    slow_query_log.record(conn, statement, parameters, duration_ms)
+
+
+def instrument(engine) -> None:
+    """Attach per-shape timing and the slow-query log to an engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
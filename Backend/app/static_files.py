@@ -0,0 +1,180 @@
+from email.utils import formatdate
+from typing import Dict, Optional
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import sys
+from app.compression import SUPPORTED_ENCODINGS, compress, is_compressible, negotiate
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Build tools put a content hash in the file name (main.97ae6ad4.js), so the
+# URL changes whenever the content does and the file can be cached forever
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Suffixes of sibling files written by precompress_directory()
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Strongest settings: this work is done once, not per request
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data, usedforsecurity=False).hexdigest()}"'
+
+
+class StaticAsset:
+    """A file held in memory with its precompressed variants"""
+
+    __slots__ = ("body", "media_type", "etag", "last_modified", "cache_control", "variants")
+
+    def __init__(self, path: str, cache_control: Optional[str] = None):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        stat = os.stat(path)
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = _etag(self.body)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        if cache_control is None:
+            name = os.path.basename(path)
+            cache_control = IMMUTABLE_CACHE if HASHED_NAME.search(name) else REVALIDATE_CACHE
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {}
+        if len(self.body) >= settings.COMPRESSION_MIN_SIZE and is_compressible(self.media_type):
+            for encoding in SUPPORTED_ENCODINGS:
+                data = _read_precompressed(path, encoding, stat.st_mtime)
+                if data is None:
+                    data = compress(self.body, encoding, STATIC_LEVELS[encoding])
+                if len(data) < len(self.body):
+                    self.variants[encoding] = data
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def response(self, request_headers: Headers) -> Response:
+        encoding = negotiate(request_headers.get("accept-encoding"))
+        body = self.variants.get(encoding) if encoding else None
+        etag = self.etag if body is None else f'{self.etag[:-1]}-{encoding}"'
+        headers = {
+            "etag": etag,
+            "last-modified": self.last_modified,
+            "cache-control": self.cache_control,
+        }
+        if self.variants:
+            headers["vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip(" W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        if body is None:
+            body = self.body
+        else:
+            headers["content-encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+def _read_precompressed(path: str, encoding: str, mtime: float) -> Optional[bytes]:
+    """A build-time .br/.gz sibling, if one exists and is not older than the source"""
+    sibling = path + ENCODING_SUFFIXES[encoding]
+    try:
+        if os.stat(sibling).st_mtime < mtime:
+            return None
+        with open(sibling, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that loads the directory into memory once load() is called
+    (at startup), compresses each compressible file once (or picks up .br/.gz
+    siblings written at build time), and serves hashed file names with
+    immutable cache headers. Anything not loaded falls back to regular
+    FileResponse handling.
+    """
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.assets: Dict[str, StaticAsset] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        self.loaded = True
+        directory = self.directory
+        if not os.path.isdir(directory):
+            return
+        total = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(tuple(ENCODING_SUFFIXES.values())) or os.path.getsize(path) > settings.STATIC_MAX_CACHED_BYTES:
+                    continue
+                asset = StaticAsset(path)
+                self.assets[os.path.realpath(path)] = asset
+                total += asset.size
+        logger.info(f"Loaded {len(self.assets)} static files ({total / 1024:.0f} KiB) from {directory}")
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        asset = self.assets.get(os.path.realpath(full_path))
+        if asset is None or status_code != 200:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            name = os.path.basename(full_path)
+            response.headers["cache-control"] = IMMUTABLE_CACHE if HASHED_NAME.search(name) else REVALIDATE_CACHE
+            return response
+        return asset.response(Headers(scope=scope))
+
+
+class SpaShell:
+    """The SPA's index.html, read once and served from memory with an ETag"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._asset: Optional[StaticAsset] = None
+
+    def load(self) -> Optional[StaticAsset]:
+        if self._asset is None and os.path.isfile(self.path):
+            # Revalidated on every navigation so a deploy is picked up at once
+            self._asset = StaticAsset(self.path, cache_control=REVALIDATE_CACHE)
+        return self._asset
+
+    def response(self, request: Request) -> Response:
+        asset = self.load()
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Frontend build not found")
+        return asset.response(request.headers)
+
+
+def precompress_directory(directory: str) -> int:
+    """Write .br/.gz siblings for every compressible file (run after the frontend build)"""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(tuple(ENCODING_SUFFIXES.values())):
+                continue
+            path = os.path.join(root, name)
+            asset = StaticAsset(path)
+            for encoding, data in asset.variants.items():
+                with open(path + ENCODING_SUFFIXES[encoding], "wb") as f:
+                    f.write(data)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    # python -m app.static_files frontend/build
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join("frontend", "build")
+    print(f"Wrote {precompress_directory(target)} precompressed files under {target}")
@@ -0,0 +1,385 @@
+"""
+Lightweight request tracing.
+
+Every request gets a trace ID (from an incoming W3C `traceparent`, or a new
+one) returned in X-Trace-Id, and a request ID (from X-Request-Id, or a new
+one) returned in X-Request-Id; both are stamped on log records. A sampled request also records spans for its
+dependencies, SQL statements, outbound calls and response serialization,
+exported in OTLP/JSON to a file or an OTLP/HTTP collector. Unsampled
+requests only pay for the ID: start_span() returns a shared no-op.
+"""
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+MAX_STATEMENT_LENGTH = 1000
+EXPORT_BATCH_SIZE = 512
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class Trace:
+    """Spans recorded for one sampled request"""
+    __slots__ = ("trace_id", "request_id", "sampled", "parent_span_id", "spans")
+
+    def __init__(self, trace_id: str, request_id: str, sampled: bool, parent_span_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.sampled = sampled
+        self.parent_span_id = parent_span_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: int, attributes: Dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.spans.append(self)
+
+    # Used as a context manager the span becomes the parent of spans opened inside it
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        self.end(exc)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Returned for unsampled requests; every operation does nothing"""
+    __slots__ = ()
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """
+    Start a span under the current one. Use as `with start_span(...)` to
+    make it the parent of nested spans, or call .end() yourself.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        return NOOP_SPAN
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else trace.parent_span_id, kind, attributes)
+
+
+def traced(name: str):
+    """Decorator recording a span per call, for sync and async functions (e.g. dependencies)"""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# ==================== Export ====================
+
+class SpanExporter:
+    """Batches finished traces on a background thread and writes them as OTLP/JSON"""
+
+    def __init__(self):
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue(maxsize=settings.TRACE_EXPORT_QUEUE_SIZE)
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        client = None
+        while True:
+            traces = [self._queue.get()]
+            deadline = time.monotonic() + settings.TRACE_EXPORT_INTERVAL_SECONDS
+            while len(traces) < EXPORT_BATCH_SIZE:
+                try:
+                    traces.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                client = self._export(traces, client)
+            except Exception as e:
+                logger.warning(f"Exporting {len(traces)} traces failed: {e}")
+            finally:
+                for _ in traces:
+                    self._queue.task_done()
+
+    def _export(self, traces: List[Trace], client):
+        payload = encode(traces)
+        if settings.TRACE_EXPORTER == "otlp":
+            import httpx
+            if client is None:
+                client = httpx.Client(timeout=5.0)
+            response = client.post(
+                settings.TRACE_OTLP_ENDPOINT, content=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+        else:
+            self._append(json.dumps(payload) + "\n")
+        return client
+
+    def _append(self, line: str) -> None:
+        """Append to TRACE_FILE, rolling it over to TRACE_FILE.1 once it would pass TRACE_FILE_MAX_BYTES"""
+        path = settings.TRACE_FILE
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if size and size + len(line) > settings.TRACE_FILE_MAX_BYTES:
+            os.replace(path, f"{path}.1")
+        with open(path, "a") as f:
+            f.write(line)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything submitted so far has been exported"""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+def encode(traces: List[Trace]) -> Dict:
+    """An OTLP ExportTraceServiceRequest in its JSON encoding"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                _otlp_attribute("service.name", settings.TRACE_SERVICE_NAME),
+                _otlp_attribute("process.pid", os.getpid()),
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.to_otlp() for trace in traces for span in trace.spans],
+            }],
+        }]
+    }
+
+
+exporter = SpanExporter()
+
+
+# ==================== Instrumentation ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        return
+    context._trace_span = start_span(
+        "db.query", KIND_CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": " ".join(statement.split())[:MAX_STATEMENT_LENGTH]},
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.set("db.rows", cursor.rowcount)
+        span.end()
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.end(exception_context.original_exception)
+
+
+def instrument(engine) -> None:
+    """A span per SQL statement on sampled requests"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _incoming_context(scope) -> tuple:
+    """(traceparent fields or None, request ID or None) from the request headers"""
+    parent = request_id = None
+    for name, value in scope["headers"]:
+        if name == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1").strip().lower())
+            if match and match.group(1) != "0" * 32:
+                parent = match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+        elif name == b"x-request-id":
+            candidate = value.decode("latin-1").strip()
+            if _REQUEST_ID.match(candidate):
+                request_id = candidate
+    return parent, request_id
+
+
+def _should_sample(parent_sampled: Optional[bool]) -> bool:
+    rate = settings.TRACE_SAMPLE_RATE
+    if rate <= 0:
+        # Tracing is off: a client's traceparent must not switch it on
+        return False
+    if parent_sampled is not None and settings.TRACE_RESPECT_PARENT:
+        return parent_sampled
+    return rate >= 1 or random.random() < rate
+
+
+class TracingMiddleware:
+    """
+    Starts the trace for a request, records the server span when sampled
+    and returns the trace and request IDs in X-Trace-Id and X-Request-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent, request_id = _incoming_context(scope)
+        request_id = request_id or _new_id(8)
+        if parent is not None:
+            trace_id, parent_span_id, parent_sampled = parent
+            trace = Trace(trace_id, request_id, _should_sample(parent_sampled), parent_span_id)
+        else:
+            trace = Trace(_new_id(16), request_id, _should_sample(None))
+        token = _current_trace.set(trace)
+        root = start_span(f"{scope['method']} {scope['path']}", KIND_SERVER, **{
+            "http.method": scope["method"], "http.target": scope["path"],
+        })
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Trace-Id", trace.trace_id)
+                headers.append("X-Request-Id", trace.request_id)
+                root.set("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_trace.reset(token)
+            if trace.sampled:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                    root.set("http.route", route.path)
+                exporter.submit(trace)
@@ -0,0 +1,252 @@
+"""
+Synthetic catalog generator.
+
+Builds brands -> products -> offerings (with long text fields), a pool of
+activities shared across offerings of the same product, staffing rows per
+activity, WBS entries and a full rate card (every country x role x band).
+Everything is derived from --seed, so a given size is reproducible.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterator, List
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from sqlalchemy import create_engine, insert
+from app.database import Base
+from app.models import (
+    Activity, ActivityWBS, Brand, Country, Offering, OfferingActivity,
+    PricingDetail, Product, StaffingDetail, WBS,
+)
+
+BATCH_SIZE = 1000
+
+WORDS = (
+    "cloud hybrid migration automation security data analytics platform integration "
+    "modernization assessment roadmap workshop governance resilience observability "
+    "compliance identity network storage container kubernetes mainframe ai watsonx "
+    "sustainability supply chain finance procurement quantum design thinking garage "
+    "discovery pilot adoption operations devops sre backup recovery zero trust"
+).split()
+
+SAAS_TYPES = ("SaaS", "On-Prem", "Hybrid", "Managed")
+INDUSTRIES = ("Banking", "Insurance", "Retail", "Healthcare", "Telco", "Energy", "Government", "Manufacturing")
+CLIENT_TYPES = ("Enterprise", "Mid-market", "Public sector")
+FRAMEWORKS = ("Assess", "Plan", "Build", "Run", "Optimize")
+ROLES = tuple(f"{area} {level}" for area in (
+    "Architect", "Consultant", "Developer", "Project Manager", "Data Scientist",
+) for level in ("Associate", "Senior", "Principal", "Lead", "Executive"))
+
+# Text columns filled with long generated paragraphs
+OFFERING_TEXT_FIELDS = (
+    "business_challenges", "business_drivers", "offering_value", "tag_line", "elevator_pitch",
+    "offering_outcomes", "key_deliverables", "offering_summary", "when_and_why_to_sell",
+    "buyer_persona", "user_persona", "scope_summary", "prerequisites",
+)
+ACTIVITY_TEXT_FIELDS = (
+    "outcome", "description", "client_responsibilities", "ibm_responsibilities",
+    "assumptions", "deliverables", "completion_criteria",
+)
+
+
+@dataclass
+class CatalogSpec:
+    offerings: int = 1000
+    products_per_brand: int = 10
+    offerings_per_product: int = 10
+    activities_per_product: int = 20       # pool shared by the product's offerings
+    activities_per_offering: int = 8
+    staffing_per_activity: int = 4
+    countries: int = 20
+    bands: int = 6
+    wbs: int = 200
+    text_words: int = 120                  # words per long text field
+    seed: int = 42
+
+    @property
+    def products(self) -> int:
+        return max(1, math.ceil(self.offerings / self.offerings_per_product))
+
+    @property
+    def brands(self) -> int:
+        return max(1, math.ceil(self.products / self.products_per_brand))
+
+
+class Generator:
+    def __init__(self, spec: CatalogSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        # Sampling from a fixed set of paragraphs keeps generation fast at 100k offerings
+        self._paragraphs = [self._paragraph() for _ in range(2000)]
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _paragraph(self) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.spec.text_words))
+
+    def text(self) -> str:
+        return self.rng.choice(self._paragraphs)
+
+    def countries(self) -> List[str]:
+        return [f"Country {n:02d}" for n in range(self.spec.countries)]
+
+    def rate_card(self) -> Iterator[Dict]:
+        for country in self.countries():
+            for role in ROLES:
+                for band in range(1, self.spec.bands + 1):
+                    cost = Decimal(40 + band * 15 + self.rng.randint(0, 20))
+                    yield {
+                        "country": country, "role": role, "band": band,
+                        "cost": cost, "sale_price": (cost * Decimal("1.6")).quantize(Decimal("0.01")),
+                    }
+
+    def generate(self) -> Dict[str, List[Dict]]:
+        """All rows, keyed by table, in insertion order"""
+        spec = self.spec
+        rows: Dict[str, List[Dict]] = {name: [] for name in (
+            "countries", "pricing_details", "wbs", "brands", "products", "offerings",
+            "activities", "activity_wbs", "offering_activities", "staffing_details",
+        )}
+        countries = self.countries()
+        rows["countries"] = [{"country_id": self._uuid(), "country_name": c} for c in countries]
+        rows["pricing_details"] = list(self.rate_card())
+        rows["wbs"] = [
+            {"wbs_id": self._uuid(), "wbs_description": f"WBS {n} {self.rng.choice(WORDS)}",
+             "wbs_weeks": self.rng.randint(1, 12)}
+            for n in range(spec.wbs)
+        ]
+        wbs_ids = [w["wbs_id"] for w in rows["wbs"]]
+
+        for b in range(spec.brands):
+            rows["brands"].append({"brand_id": self._uuid(), "brand_name": f"Brand {b}", "description": self.text()})
+
+        offering_count = 0
+        for p in range(spec.products):
+            brand = rows["brands"][p // spec.products_per_brand]
+            product = {
+                "product_id": self._uuid(), "brand_id": brand["brand_id"],
+                "product_name": f"{brand['brand_name']} Product {p}", "description": self.text(),
+            }
+            rows["products"].append(product)
+
+            pool = []
+            for a in range(spec.activities_per_product):
+                activity = {
+                    "activity_id": self._uuid(),
+                    "activity_name": f"{self.rng.choice(WORDS).title()} activity {p}-{a}",
+                    "brand": brand["brand_name"], "product_name": product["product_name"],
+                    "category": self.rng.choice(FRAMEWORKS), "part_numbers": f"D{p:05d}{a:02d}",
+                    "duration_weeks": self.rng.randint(1, 8), "duration_hours": self.rng.randint(8, 320),
+                    "effort_hours": self.rng.randint(8, 320),
+                    "fixed_price": Decimal(self.rng.randint(1000, 50000)),
+                    "week": self.rng.randint(1, 12),
+                    **{field: self.text() for field in ACTIVITY_TEXT_FIELDS},
+                }
+                rows["activities"].append(activity)
+                pool.append(activity["activity_id"])
+                for wbs_id in self.rng.sample(wbs_ids, min(2, len(wbs_ids))):
+                    rows["activity_wbs"].append({"activity_id": activity["activity_id"], "wbs_id": wbs_id})
+                for _ in range(spec.staffing_per_activity):
+                    rows["staffing_details"].append({
+                        "staffing_id": self._uuid(), "activity_id": activity["activity_id"],
+                        "country": self.rng.choice(countries), "role": self.rng.choice(ROLES),
+                        "band": self.rng.randint(1, spec.bands), "hours": self.rng.randint(4, 160),
+                    })
+
+            for _ in range(min(spec.offerings_per_product, spec.offerings - offering_count)):
+                offering = {
+                    "offering_id": self._uuid(), "product_id": product["product_id"],
+                    "offering_name": f"{self.rng.choice(WORDS).title()} {self.rng.choice(WORDS)} offering {offering_count}",
+                    "saas_type": self.rng.choice(SAAS_TYPES), "brand": brand["brand_name"],
+                    "supported_product": product["product_name"],
+                    "client_type": self.rng.choice(CLIENT_TYPES), "industry": self.rng.choice(INDUSTRIES),
+                    "framework_category": self.rng.choice(FRAMEWORKS),
+                    "offering_tags": " ".join(self.rng.sample(WORDS, 5)),
+                    "duration": f"{self.rng.randint(2, 16)} weeks",
+                    "sale_price": Decimal(self.rng.randint(10000, 500000)),
+                    **{field: self.text() for field in OFFERING_TEXT_FIELDS},
+                }
+                rows["offerings"].append(offering)
+                linked = self.rng.sample(pool, min(spec.activities_per_offering, len(pool)))
+                for sequence, activity_id in enumerate(linked, start=1):
+                    rows["offering_activities"].append({
+                        "offering_id": offering["offering_id"], "activity_id": activity_id,
+                        "sequence": sequence, "is_mandatory": self.rng.random() < 0.8,
+                    })
+                offering_count += 1
+        return rows
+
+
+MODELS = {
+    "countries": Country, "pricing_details": PricingDetail, "wbs": WBS, "brands": Brand,
+    "products": Product, "offerings": Offering, "activities": Activity, "activity_wbs": ActivityWBS,
+    "offering_activities": OfferingActivity, "staffing_details": StaffingDetail,
+}
+
+
+def load(db_engine, spec: CatalogSpec, reset: bool = True) -> Dict[str, int]:
+    """Generate the catalog into `db_engine`; returns row counts per table"""
+    if reset:
+        Base.metadata.drop_all(db_engine)
+        Base.metadata.create_all(db_engine)
+    rows = Generator(spec).generate()
+    counts = {}
+    with db_engine.begin() as connection:
+        for table, table_rows in rows.items():
+            statement = insert(MODELS[table].__table__)
+            for start in range(0, len(table_rows), BATCH_SIZE):
+                connection.execute(statement, table_rows[start:start + BATCH_SIZE])
+            counts[table] = len(table_rows)
+    if db_engine.dialect.name == "postgresql":
+        with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("ANALYZE")
+    return counts
+
+
+def bench_database_url(url: str = None) -> str:
+    url = url or os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL (or pass --database-url) to a scratch database")
+    return url
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = CatalogSpec()
+    parser.add_argument("--database-url", help="scratch database (default: $BENCH_DATABASE_URL)")
+    for field in ("products_per_brand", "offerings_per_product", "activities_per_product",
+                  "activities_per_offering", "staffing_per_activity", "countries", "bands",
+                  "wbs", "text_words", "seed"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(defaults, field))
+
+
+def spec_from_args(args: argparse.Namespace, offerings: int) -> CatalogSpec:
+    return CatalogSpec(offerings=offerings, **{
+        field: getattr(args, field) for field in (
+            "products_per_brand", "offerings_per_product", "activities_per_product",
+            "activities_per_offering", "staffing_per_activity", "countries", "bands",
+            "wbs", "text_words", "seed",
+        )
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog into a scratch database")
+    parser.add_argument("--offerings", type=int, default=1000)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    db_engine = create_engine(bench_database_url(args.database_url))
+    started = time.perf_counter()
+    counts = load(db_engine, spec_from_args(args, args.offerings))
+    for table, count in counts.items():
+        print(f"{table:>20}: {count}")
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
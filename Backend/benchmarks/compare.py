@@ -0,0 +1,41 @@
+"""
+Compare two benchmark result files:
+
+    python -m benchmarks.compare results/base.json results/new.json
+"""
+import argparse
+import json
+
+METRICS = ("p50", "p95", "p99")
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency deltas between two benchmark runs")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    base, new = _load(args.base), _load(args.new)
+
+    print(f"base {base['meta'].get('commit')} ({base['meta']['offerings']} offerings)  "
+          f"new {new['meta'].get('commit')} ({new['meta']['offerings']} offerings)")
+    print(f"{'scenario':>18}  " + "  ".join(f"{m:>22}" for m in METRICS) + f"  {'req/s':>18}")
+    for name, result in new["results"].items():
+        before = base["results"].get(name)
+        if before is None:
+            continue
+        cells = []
+        for metric in METRICS:
+            old_ms, new_ms = before["latency_ms"][metric], result["latency_ms"][metric]
+            change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+            cells.append(f"{old_ms:8.2f} -> {new_ms:8.2f} {change:+5.0f}%")
+        cells.append(f"{before['throughput_rps']:7.1f} -> {result['throughput_rps']:7.1f}")
+        print(f"{name:>18}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
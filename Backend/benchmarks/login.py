@@ -0,0 +1,200 @@
+"""
+Login throughput against the local identity stand-ins.
+
+Each iteration is one new user: `/login` (Authlib builds the authorize
+redirect), the mock authorize step a browser would follow, `/callback`
+(token exchange, ID token validation against JWKS, bluepages lookup) and
+then authenticated API calls with the resulting session cookie. The app runs
+in-process; the mock services listen on a local port so every outbound call
+is a real HTTP round trip whose latency can be set with
+--idp-latency-ms / --bluepages-latency-ms.
+
+    python -m benchmarks.login --requests 200 --concurrency 8 --bluepages-latency-ms 100
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import time
+from benchmarks.mock_idp import (
+    CLIENT_ID, CLIENT_SECRET, BackgroundServer, MockServices, add_mock_arguments, config_from_args,
+)
+from benchmarks.run import RESULTS_DIR, git_revision, summarize
+
+APP_URL = "https://bench"              # the session cookie is https-only
+FRONTEND_URL = "https://frontend.bench"
+STEPS = ("login", "authorize", "callback", "api", "flow")
+
+
+def configure_environment(server: BackgroundServer, database_url: str) -> None:
+    """Point the app at the mock services before it is imported"""
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "DB_SSLMODE": os.environ.get("DB_SSLMODE", "disable"),
+        "DB_NOTIFY_ENABLED": "false",
+        "IBM_CLIENT_ID": CLIENT_ID, "IBM_CLIENT_SECRET": CLIENT_SECRET, "IBM_TENANT_ID": "mock",
+        "IBM_OAUTH_SERVER_URL": f"{server.url}/oidc",
+        "IBM_DISCOVERY_ENDPOINT": server.discovery_endpoint,
+        "BLUEPAGES_URL": server.bluepages_url,
+        "FRONTEND_URL": FRONTEND_URL,
+    })
+    for key, value in {"SESSION_SECRET": "bench", "ADMIN_BLUEGROUP": "Administrators",
+                       "SOLUTION_ARCHITECT_BLUEGROUP": "Solution_Architect"}.items():
+        os.environ.setdefault(key, value)
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+
+
+def outbound_calls() -> Dict[Tuple[str, str, str], Tuple[int, float]]:
+    """(target, operation, outcome) -> (calls, total seconds) so far"""
+    from app.metrics import OUTBOUND_LATENCY
+    return {labels: (int(sum(values[:-1])), values[-1]) for labels, values in OUTBOUND_LATENCY.collect().items()}
+
+
+def outbound_delta(before: Dict, after: Dict, flows: int) -> List[Dict]:
+    rows = []
+    for labels, (calls, seconds) in sorted(after.items()):
+        calls -= before.get(labels, (0, 0.0))[0]
+        seconds -= before.get(labels, (0, 0.0))[1]
+        if calls:
+            target, operation, outcome = labels
+            rows.append({
+                "target": target, "operation": operation, "outcome": outcome, "calls": calls,
+                "calls_per_login": round(calls / flows, 2) if flows else None,
+                "mean_ms": round(seconds / calls * 1000, 3),
+            })
+    return rows
+
+
+class LoginError(Exception):
+    pass
+
+
+async def login_flow(transport, idp, api_paths: List[str], timings: Dict[str, List[float]],
+                     statuses: Counter) -> None:
+    import httpx
+
+    async def step(name: str, call):
+        started = time.perf_counter()
+        response = await call
+        timings[name].append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] += 1
+        return response
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url=APP_URL) as client:
+        response = await step("login", client.get("/api/v1/login"))
+        if response.status_code != 302:
+            raise LoginError(f"/login returned {response.status_code}")
+        response = await step("authorize", idp.get(response.headers["location"]))
+        callback = urlsplit(response.headers["location"])
+        response = await step("callback", client.get(f"{callback.path}?{callback.query}"))
+        if not response.headers.get("location", "").startswith(f"{FRONTEND_URL}/catalog"):
+            raise LoginError(f"/callback redirected to {response.headers.get('location')}")
+        for path in api_paths:
+            response = await step("api", client.get(path))
+            if response.status_code >= 400:
+                raise LoginError(f"{path} returned {response.status_code}")
+    timings["flow"].append((time.perf_counter() - started) * 1000)
+
+
+async def measure(app, api_paths: List[str], requests: int, concurrency: int, warmup: int) -> Dict:
+    import httpx
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    timings: Dict[str, List[float]] = {name: [] for name in STEPS}
+    statuses: Counter = Counter()
+    failures: Counter = Counter()
+
+    async with httpx.AsyncClient() as idp:
+        for _ in range(warmup):
+            await login_flow(transport, idp, api_paths, {name: [] for name in STEPS}, Counter())
+
+        remaining = iter(range(requests))
+
+        async def worker() -> None:
+            for _ in remaining:
+                try:
+                    await login_flow(transport, idp, api_paths, timings, statuses)
+                except LoginError as e:
+                    failures[str(e)] += 1
+
+        before = outbound_calls()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        after = outbound_calls()
+
+    flows = len(timings["flow"])
+    return {
+        "logins": flows,
+        "failed_logins": sum(failures.values()),
+        "failures": dict(failures),
+        "logins_per_second": round(flows / elapsed, 2) if elapsed else 0.0,
+        "results": {name: summarize(timings[name], statuses if name == "flow" else Counter(), [], elapsed)
+                    for name in STEPS},
+        "outbound": outbound_delta(before, after, flows),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the login flow against mock AppID and bluepages")
+    parser.add_argument("--requests", type=int, default=100, help="measured logins")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--api-path", action="append", dest="api_paths",
+                        help="authenticated call made after each login (repeatable; default: /api/v1/me, /api/v1/validate)")
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="only needed when --api-path routes touch the catalog")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    api_paths = args.api_paths or ["/api/v1/me", "/api/v1/validate"]
+
+    server = BackgroundServer(MockServices(config_from_args(args))).start()
+    try:
+        configure_environment(server, args.database_url)
+        from app.main import app
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        print(f"Mock identity services on {server.url}; {args.requests} logins x {args.concurrency} concurrent")
+        report = asyncio.run(measure(app, api_paths, args.requests, args.concurrency, args.warmup))
+    finally:
+        server.stop()
+
+    for name in STEPS:
+        latency = report["results"][name]["latency_ms"]
+        print(f"  {name:>10}: p50 {latency['p50']:8.2f}ms  p95 {latency['p95']:8.2f}ms  p99 {latency['p99']:8.2f}ms")
+    print(f"  {report['logins_per_second']:.1f} logins/s, {report['failed_logins']} failed")
+    for call in report["outbound"]:
+        print(f"  {call['target']:>10} {call['operation']:<20} {call['outcome']:<5} "
+              f"{call['calls_per_login']:5.2f}/login  mean {call['mean_ms']:8.2f}ms")
+
+    revision = git_revision()
+    report["meta"] = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "scenario": "login",
+        "offerings": None,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "api_paths": api_paths,
+        "idp_latency_ms": args.idp_latency_ms,
+        "bluepages_latency_ms": args.bluepages_latency_ms,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(args.output_dir, f"{stamp}-{revision['commit'] or 'nogit'}-login.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
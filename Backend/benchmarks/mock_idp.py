@@ -0,0 +1,240 @@
+"""
+Local stand-ins for IBM AppID (OIDC) and the bluepages groups service.
+
+The OIDC side serves discovery, JWKS, an authorize endpoint that approves
+immediately, a token endpoint issuing RS256-signed ID tokens, and userinfo.
+The bluepages side answers `task=inAGroup` with the same XML as the real
+service. Every endpoint sleeps for a configurable latency so the cost of
+each outbound call can be dialled up or down.
+
+    python -m benchmarks.mock_idp --port 9400 --idp-latency-ms 40 --bluepages-latency-ms 150
+
+then point the app at it:
+
+    IBM_DISCOVERY_ENDPOINT=http://127.0.0.1:9400/oidc/.well-known/openid-configuration
+    BLUEPAGES_URL=http://127.0.0.1:9400/bluepages/tools/groups/groupsxml.wss
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import secrets
+import socket
+import threading
+import time
+from authlib.jose import JsonWebKey, jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+CLIENT_ID = "mock-client"
+CLIENT_SECRET = "mock-secret"
+
+
+@dataclass
+class MockConfig:
+    idp_latency_ms: float = 0.0
+    bluepages_latency_ms: float = 0.0
+    groups: Optional[Set[str]] = None      # groups every user belongs to; None means all
+    token_ttl: int = 3600
+    key_bits: int = 2048
+
+
+@dataclass
+class _Grant:
+    client_id: str
+    redirect_uri: str
+    nonce: Optional[str]
+    email: str
+
+
+@dataclass
+class MockServices:
+    """The ASGI app plus the signing key and issued codes"""
+    config: MockConfig = field(default_factory=MockConfig)
+
+    def __post_init__(self):
+        self.key = JsonWebKey.generate_key("RSA", self.config.key_bits, is_private=True, options={"kid": "mock"})
+        self.grants: Dict[str, _Grant] = {}
+        self.access_tokens: Dict[str, Dict] = {}
+        self.users = 0
+        self.app = Starlette(routes=[
+            Route("/oidc/.well-known/openid-configuration", self.discovery),
+            Route("/oidc/jwks", self.jwks),
+            Route("/oidc/authorize", self.authorize),
+            Route("/oidc/token", self.token, methods=["POST"]),
+            Route("/oidc/userinfo", self.userinfo),
+            Route("/bluepages/tools/groups/groupsxml.wss", self.bluepages),
+        ])
+
+    async def _idp_delay(self) -> None:
+        if self.config.idp_latency_ms:
+            await asyncio.sleep(self.config.idp_latency_ms / 1000)
+
+    @staticmethod
+    def _issuer(request: Request) -> str:
+        return str(request.base_url).rstrip("/") + "/oidc"
+
+    async def discovery(self, request: Request) -> Response:
+        await self._idp_delay()
+        issuer = self._issuer(request)
+        return JSONResponse({
+            "issuer": issuer,
+            "authorization_endpoint": f"{issuer}/authorize",
+            "token_endpoint": f"{issuer}/token",
+            "userinfo_endpoint": f"{issuer}/userinfo",
+            "jwks_uri": f"{issuer}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": ["RS256"],
+            "token_endpoint_auth_methods_supported": ["client_secret_basic", "client_secret_post"],
+        })
+
+    async def jwks(self, request: Request) -> Response:
+        await self._idp_delay()
+        return JSONResponse({"keys": [self.key.as_dict(is_private=False)]})
+
+    async def authorize(self, request: Request) -> Response:
+        """Approve straight away as a new user and send the browser back with a code"""
+        await self._idp_delay()
+        params = request.query_params
+        if "redirect_uri" not in params:
+            return JSONResponse({"error": "invalid_request"}, status_code=400)
+        self.users += 1
+        code = secrets.token_urlsafe(16)
+        self.grants[code] = _Grant(
+            client_id=params.get("client_id", ""),
+            redirect_uri=params["redirect_uri"],
+            nonce=params.get("nonce"),
+            email=params.get("login_hint") or f"user{self.users}@example.com",
+        )
+        query = {"code": code}
+        if "state" in params:
+            query["state"] = params["state"]
+        return RedirectResponse(f"{params['redirect_uri']}?{urlencode(query)}", status_code=302)
+
+    def _claims(self, grant: _Grant) -> Dict:
+        name = grant.email.split("@")[0]
+        return {
+            "sub": name, "email": grant.email, "name": name.title(),
+            "given_name": name.title(), "family_name": "Mock",
+        }
+
+    async def token(self, request: Request) -> Response:
+        await self._idp_delay()
+        form = await request.form()
+        grant = self.grants.pop(form.get("code", ""), None)
+        if grant is None or form.get("redirect_uri", grant.redirect_uri) != grant.redirect_uri:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        now = int(time.time())
+        claims = {
+            **self._claims(grant),
+            "iss": self._issuer(request), "aud": grant.client_id or CLIENT_ID,
+            "iat": now, "exp": now + self.config.token_ttl,
+        }
+        if grant.nonce:
+            claims["nonce"] = grant.nonce
+        id_token = jwt.encode({"alg": "RS256", "kid": "mock"}, claims, self.key).decode()
+        access_token = secrets.token_urlsafe(24)
+        self.access_tokens[access_token] = self._claims(grant)
+        return JSONResponse({
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expires_in": self.config.token_ttl,
+            "id_token": id_token,
+            "scope": "openid email profile",
+        })
+
+    async def userinfo(self, request: Request) -> Response:
+        await self._idp_delay()
+        scheme, _, access_token = request.headers.get("authorization", "").partition(" ")
+        claims = self.access_tokens.get(access_token) if scheme.lower() == "bearer" else None
+        if claims is None:
+            return JSONResponse({"error": "invalid_token"}, status_code=401)
+        return JSONResponse(claims)
+
+    async def bluepages(self, request: Request) -> Response:
+        if self.config.bluepages_latency_ms:
+            await asyncio.sleep(self.config.bluepages_latency_ms / 1000)
+        if request.query_params.get("task") != "inAGroup":
+            return Response("<group><rc>2</rc><msg>Unsupported task</msg></group>", media_type="text/xml")
+        groups = self.config.groups
+        member = groups is None or request.query_params.get("group") in groups
+        rc, msg = ("0", "Success") if member else ("1", "Not a member")
+        return Response(f"<group><rc>{rc}</rc><msg>{msg}</msg></group>", media_type="text/xml")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run the mock services on a local port in a daemon thread"""
+
+    def __init__(self, services: MockServices, port: Optional[int] = None):
+        import uvicorn
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            services.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off",
+        ))
+        self.thread = threading.Thread(target=self.server.run, name="mock-idp", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def discovery_endpoint(self) -> str:
+        return f"{self.url}/oidc/.well-known/openid-configuration"
+
+    @property
+    def bluepages_url(self) -> str:
+        return f"{self.url}/bluepages/tools/groups/groupsxml.wss"
+
+    def start(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Mock identity services failed to start on port {self.port}")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--idp-latency-ms", type=float, default=0.0, help="delay on every OIDC endpoint")
+    parser.add_argument("--bluepages-latency-ms", type=float, default=0.0, help="delay on every bluepages lookup")
+    parser.add_argument("--groups", nargs="*", help="groups users belong to (default: every group)")
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        idp_latency_ms=args.idp_latency_ms,
+        bluepages_latency_ms=args.bluepages_latency_ms,
+        groups=set(args.groups) if args.groups is not None else None,
+    )
+
+
+def main() -> None:
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve mock AppID and bluepages endpoints")
+    parser.add_argument("--port", type=int, default=9400)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    services = MockServices(config_from_args(args))
+    print(f"IBM_DISCOVERY_ENDPOINT=http://127.0.0.1:{args.port}/oidc/.well-known/openid-configuration")
+    print(f"IBM_CLIENT_ID={CLIENT_ID} IBM_CLIENT_SECRET={CLIENT_SECRET}")
+    print(f"BLUEPAGES_URL=http://127.0.0.1:{args.port}/bluepages/tools/groups/groupsxml.wss")
+    uvicorn.run(services.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
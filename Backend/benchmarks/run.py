@@ -0,0 +1,259 @@
+"""
+Latency and throughput for the key catalog routes.
+
+Requests go through the full ASGI app in-process (middleware, auth
+dependencies overridden with a benchmark admin, real database), so results
+reflect application and query cost without network noise. One JSON file is
+written per catalog size; compare runs with `python -m benchmarks.compare`.
+"""
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from sqlalchemy import create_engine, select
+from benchmarks.catalog import WORDS, add_spec_arguments, bench_database_url, load, spec_from_args
+
+BENCH_USER = {"email": "bench@example.com", "name": "Benchmark"}
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Settings the app needs at import; dummy values are fine in-process
+REQUIRED_ENV = {
+    "IBM_CLIENT_ID": "bench", "IBM_TENANT_ID": "bench", "IBM_CLIENT_SECRET": "bench",
+    "IBM_OAUTH_SERVER_URL": "http://localhost", "IBM_DISCOVERY_ENDPOINT": "http://localhost",
+    "SESSION_SECRET": "bench", "ADMIN_BLUEGROUP": "bench", "SOLUTION_ARCHITECT_BLUEGROUP": "bench",
+}
+
+Request = Tuple[str, str, Optional[Dict]]
+
+
+class Scenario:
+    def __init__(self, name: str, build: Callable[["Context"], Request],
+                 cleanup: Optional[Callable[["Context", Request], Request]] = None):
+        self.name = name
+        self.build = build
+        self.cleanup = cleanup
+
+
+class Context:
+    """Ids sampled from the generated catalog"""
+
+    def __init__(self, db_engine, seed: int):
+        from app.models import Activity, Offering, OfferingActivity
+        self.rng = random.Random(seed)
+        with db_engine.connect() as connection:
+            self.offering_ids = [str(r) for r in connection.scalars(select(Offering.offering_id))]
+            self.activity_ids = [str(r) for r in connection.scalars(select(Activity.activity_id))]
+            self.linked = {
+                (str(o), str(a)) for o, a in connection.execute(
+                    select(OfferingActivity.offering_id, OfferingActivity.activity_id)
+                )
+            }
+        self.in_flight = set()
+
+    def offering(self) -> str:
+        return self.rng.choice(self.offering_ids)
+
+    def unlinked_pair(self) -> Tuple[str, str]:
+        while True:
+            pair = (self.offering(), self.rng.choice(self.activity_ids))
+            if pair not in self.linked and pair not in self.in_flight:
+                self.in_flight.add(pair)
+                return pair
+
+
+def _link(ctx: Context) -> Request:
+    offering_id, activity_id = ctx.unlinked_pair()
+    return "POST", "/api/v1/link", {"offering_id": offering_id, "activity_id": activity_id, "sequence": 99}
+
+
+def _unlink(ctx: Context, request: Request) -> Request:
+    body = request[2]
+    ctx.in_flight.discard((body["offering_id"], body["activity_id"]))
+    return "DELETE", f"/api/v1/unlink?offering_id={body['offering_id']}&activity_id={body['activity_id']}", None
+
+
+SCENARIOS = {
+    s.name: s for s in (
+        Scenario("offering_search", lambda ctx: ("GET", f"/api/v1/offerings/search/?query={ctx.rng.choice(WORDS)}", None)),
+        Scenario("activity_listing", lambda ctx: ("GET", f"/api/v1/activities?offering_id={ctx.offering()}", None)),
+        Scenario("totals", lambda ctx: ("GET", f"/api/v1/totalHoursAndPrices/{ctx.offering()}", None)),
+        Scenario("link", _link, cleanup=_unlink),
+        Scenario("staffing", lambda ctx: ("GET", f"/api/v1/staffingDetails/{ctx.offering()}", None)),
+        Scenario("admin_stats", lambda ctx: ("GET", "/api/v1/admin/stats", None)),
+    )
+}
+
+
+def summarize(latencies: List[float], statuses: Counter, queries: List[int], elapsed: float) -> Dict:
+    from app.slow_query import percentile
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "status_counts": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count, 3) if count else 0.0,
+            "p50": round(percentile(ordered, 50), 3),
+            "p95": round(percentile(ordered, 95), 3),
+            "p99": round(percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3) if count else 0.0,
+        },
+        "db_queries_mean": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+async def measure(client, scenario: Scenario, ctx: Context, requests: int,
+                  concurrency: int, warmup: int) -> Dict:
+    latencies: List[float] = []
+    queries: List[int] = []
+    statuses: Counter = Counter()
+
+    async def one(record: bool) -> None:
+        request = scenario.build(ctx)
+        method, url, body = request
+        started = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        latency = (time.perf_counter() - started) * 1000
+        if scenario.cleanup is not None:
+            cleanup_method, cleanup_url, cleanup_body = scenario.cleanup(ctx, request)
+            await client.request(cleanup_method, cleanup_url, json=cleanup_body)
+        if record:
+            latencies.append(latency)
+            statuses[response.status_code] += 1
+            if "x-db-queries" in response.headers:
+                queries.append(int(response.headers["x-db-queries"]))
+
+    for _ in range(warmup):
+        await one(record=False)
+
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            await one(record=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, queries, time.perf_counter() - started)
+
+
+async def run_scenarios(app, ctx: Context, names: List[str], args) -> Dict[str, Dict]:
+    import httpx
+    results = {}
+    # Unhandled errors count as 500s instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in names:
+            results[name] = await measure(
+                client, SCENARIOS[name], ctx, args.requests, args.concurrency, args.warmup
+            )
+            latency = results[name]["latency_ms"]
+            print(f"  {name:>18}: p50 {latency['p50']:8.2f}ms  p95 {latency['p95']:8.2f}ms  "
+                  f"p99 {latency['p99']:8.2f}ms  {results[name]['throughput_rps']:8.1f} req/s  "
+                  f"errors {results[name]['errors']}")
+    return results
+
+
+def git_revision() -> Dict:
+    def git(*cmd) -> str:
+        return subprocess.run(("git", *cmd), capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def configure_environment(database_url: str, response_cache: bool) -> None:
+    """Point the app at the benchmark database before it is imported"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ.setdefault("DB_SSLMODE", "disable")
+    os.environ["DB_NOTIFY_ENABLED"] = "false"
+    os.environ["RESPONSE_CACHE_ENABLED"] = "true" if response_cache else "false"
+    for key, value in REQUIRED_ENV.items():
+        os.environ.setdefault(key, value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark key API routes against a synthetic catalog")
+    parser.add_argument("--offerings", type=int, nargs="+", default=[1000],
+                        help="catalog sizes to generate and benchmark, e.g. 1000 10000 100000")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--response-cache", action="store_true",
+                        help="leave the response cache on (off by default so routes are measured, not cache hits)")
+    parser.add_argument("--skip-generate", action="store_true", help="benchmark the catalog already in the database")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    database_url = bench_database_url(args.database_url)
+    configure_environment(database_url, args.response_cache)
+
+    from app.auth.dependencies import get_current_active_user
+    from app.auth.permissions import require_admin, require_solution_architect
+    from app.cache import CACHES
+    from app.database import dispose_engines, get_engine
+    from app.main import app
+    from app.response_cache import response_cache
+
+    for dependency in (get_current_active_user, require_admin, require_solution_architect):
+        app.dependency_overrides[dependency] = lambda: BENCH_USER
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    revision = git_revision()
+    for offerings in args.offerings:
+        spec = spec_from_args(args, offerings)
+        counts = None
+        if not args.skip_generate:
+            dispose_engines()
+            print(f"Generating catalog with {offerings} offerings...")
+            started = time.perf_counter()
+            counts = load(create_engine(database_url), spec)
+            print(f"  generated in {time.perf_counter() - started:.1f}s")
+        for cache in CACHES.values():
+            cache.invalidate()
+        response_cache.clear()
+
+        ctx = Context(get_engine(), spec.seed)
+        print(f"Benchmarking {len(ctx.offering_ids)} offerings, {args.requests} requests x "
+              f"{args.concurrency} concurrent per scenario")
+        results = asyncio.run(run_scenarios(app, ctx, args.scenarios, args))
+
+        report = {
+            "meta": {
+                **revision,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "offerings": len(ctx.offering_ids),
+                "spec": asdict(spec),
+                "row_counts": counts,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "warmup": args.warmup,
+                "response_cache": args.response_cache,
+            },
+            "results": results,
+        }
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(args.output_dir, f"{stamp}-{revision['commit'] or 'nogit'}-{offerings}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Local stand-in for an OTLP/HTTP trace collector, and a waterfall view of
+exported traces.
+
+    python -m benchmarks.trace_collector --port 4318 --out traces.jsonl
+
+then run the app with
+
+    TRACE_EXPORTER=otlp TRACE_SAMPLE_RATE=1.0 TRACE_OTLP_ENDPOINT=http://127.0.0.1:4318/v1/traces
+
+Each request's spans are printed as an indented waterfall as soon as its
+server span arrives. Files written by the default file exporter (or by
+--out) can be rendered later with `--read traces.jsonl`.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+import argparse
+import json
+import threading
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+SERVER_KIND = 2
+BAR_WIDTH = 40
+
+
+def spans_of(payload: Dict) -> Iterable[Dict]:
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            yield from scope.get("spans", [])
+
+
+def _attribute(span: Dict, key: str) -> Optional[str]:
+    for attribute in span.get("attributes", []):
+        if attribute["key"] == key:
+            return next(iter(attribute["value"].values()))
+    return None
+
+
+def waterfall(spans: List[Dict]) -> str:
+    """One line per span: offset, duration, a timeline bar and the indented name"""
+    start = min(int(span["startTimeUnixNano"]) for span in spans)
+    end = max(int(span["endTimeUnixNano"]) for span in spans)
+    total = max(end - start, 1)
+    ids = {span["spanId"] for span in spans}
+    children = defaultdict(list)
+    for span in spans:
+        parent = span.get("parentSpanId")
+        children[parent if parent in ids else None].append(span)
+
+    lines = [f"trace {spans[0]['traceId']}  {total / 1e6:.2f}ms  {len(spans)} spans"]
+
+    def render(span: Dict, depth: int) -> None:
+        span_start = int(span["startTimeUnixNano"]) - start
+        duration = int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])
+        offset = int(span_start / total * BAR_WIDTH)
+        bar = " " * offset + "#" * max(1, int(duration / total * BAR_WIDTH))
+        name = span["name"]
+        statement = _attribute(span, "db.statement")
+        if statement:
+            name = f"{name} {statement[:80]}"
+        if span.get("status", {}).get("code") == 2:
+            name = f"{name}  !! {span['status'].get('message')}"
+        lines.append(f"{span_start / 1e6:9.2f}ms {duration / 1e6:9.2f}ms |{bar:<{BAR_WIDTH}}| {'  ' * depth}{name}")
+        for child in sorted(children[span["spanId"]], key=lambda s: int(s["startTimeUnixNano"])):
+            render(child, depth + 1)
+
+    for root in sorted(children[None], key=lambda s: int(s["startTimeUnixNano"])):
+        render(root, 0)
+    return "\n".join(lines)
+
+
+class Collector:
+    """Accepts OTLP/JSON exports, appends them to a file and prints finished traces"""
+
+    def __init__(self, out: Optional[str] = None, quiet: bool = False):
+        self.out = out
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Dict]] = defaultdict(list)
+        self.traces: Dict[str, List[Dict]] = {}
+        self.app = Starlette(routes=[Route("/v1/traces", self.receive, methods=["POST"])])
+
+    async def receive(self, request: Request):
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            return JSONResponse({"error": "expected OTLP/JSON"}, status_code=400)
+        if self.out:
+            with open(self.out, "a") as f:
+                f.write(json.dumps(payload) + "\n")
+        self.add(spans_of(payload))
+        return JSONResponse({"partialSuccess": {}})
+
+    def add(self, spans: Iterable[Dict]) -> None:
+        with self._lock:
+            for span in spans:
+                trace = self._pending[span["traceId"]]
+                trace.append(span)
+                # The server span is ended last, so the trace is complete once it arrives
+                if span.get("kind") == SERVER_KIND:
+                    self.traces[span["traceId"]] = self._pending.pop(span["traceId"])
+                    if not self.quiet:
+                        print(waterfall(trace), flush=True)
+
+
+def main() -> None:
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Receive OTLP/JSON traces and print waterfalls")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--out", help="append every export to this file")
+    parser.add_argument("--read", help="print waterfalls from an exported traces file and exit")
+    args = parser.parse_args()
+
+    collector = Collector(args.out)
+    if args.read:
+        with open(args.read) as f:
+            for line in f:
+                collector.add(spans_of(json.loads(line)))
+        return
+    print(f"TRACE_EXPORTER=otlp TRACE_OTLP_ENDPOINT=http://127.0.0.1:{args.port}/v1/traces")
+    uvicorn.run(collector.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shared fixtures: an in-memory SQLite database standing in for PostgreSQL,
+a TestClient with authentication overridden, and a statement recorder.
+"""
+from collections import Counter
+from base64 import b64encode
+from typing import Dict, List, Optional
+import json
+import os
+import uuid
+
+# Settings are read on first use; give the app a complete environment
+# that points at SQLite before anything touches it
+TEST_ENV = {
+    "DATABASE_URL": "sqlite://",
+    "IBM_CLIENT_ID": "test", "IBM_TENANT_ID": "test", "IBM_CLIENT_SECRET": "test",
+    "IBM_OAUTH_SERVER_URL": "http://localhost", "IBM_DISCOVERY_ENDPOINT": "http://localhost",
+    "SESSION_SECRET": "test", "ADMIN_BLUEGROUP": "admins", "SOLUTION_ARCHITECT_BLUEGROUP": "architects",
+    "DB_NOTIFY_ENABLED": "false",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "DB_QUERY_BUDGET_STRICT": "false",
+}
+for key, value in TEST_ENV.items():
+    os.environ[key] = value
+
+import pytest
+from fastapi.testclient import TestClient
+from itsdangerous import TimestampSigner
+from sqlalchemy import create_engine, event, sql
+from sqlalchemy.pool import StaticPool
+from app import query_stats, tracing
+from app.cache import CACHES
+from app.database import Base, SessionLocal
+
+TEST_USER = {"email": "test@example.com", "name": "Test User"}
+
+
+def session_cookie(session: Dict) -> str:
+    """A cookie SessionMiddleware accepts as `session`"""
+    data = b64encode(json.dumps(session).encode())
+    return TimestampSigner(TEST_ENV["SESSION_SECRET"]).sign(data).decode()
+
+
+def _lenient_uuid_bind(original):
+    # PostgreSQL casts string ids to uuid; SQLite's emulation only takes UUID objects
+    def bind_processor(self, dialect):
+        process = original(self, dialect)
+        if process is None:
+            return None
+
+        def coerce(value):
+            if isinstance(value, str):
+                value = uuid.UUID(value)
+            return process(value)
+        return coerce
+    return bind_processor
+
+
+sql.sqltypes.Uuid.bind_processor = _lenient_uuid_bind(sql.sqltypes.Uuid.bind_processor)
+
+
+class StatementRecorder:
+    """Statement shapes executed while recording is on"""
+
+    def __init__(self):
+        self.active = False
+        self.statements: List[str] = []
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements.append(query_stats.statement_shape(statement))
+
+    def start(self) -> None:
+        self.statements = []
+        self.active = True
+
+    def stop(self) -> Counter:
+        self.active = False
+        return Counter(self.statements)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    db_engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    # Deletes rely on ON DELETE CASCADE, which SQLite only enforces when asked
+    event.listen(db_engine, "connect", lambda connection, record: connection.execute("PRAGMA foreign_keys=ON"))
+    query_stats.instrument(db_engine)
+    tracing.instrument(db_engine)
+    Base.metadata.create_all(db_engine)
+    SessionLocal.configure(bind=db_engine)
+    yield db_engine
+    db_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def recorder(engine) -> StatementRecorder:
+    statement_recorder = StatementRecorder()
+    event.listen(engine, "before_cursor_execute", statement_recorder.before_cursor_execute)
+    return statement_recorder
+
+
+@pytest.fixture
+def client(engine, monkeypatch) -> TestClient:
+    from app.main import app
+    from app.auth.dependencies import get_current_active_user, get_current_user
+    from app.auth.permissions import require_admin, require_solution_architect
+
+    # No BlueGroups lookups over the network
+    monkeypatch.setattr("app.auth.permissions.is_user_in_group", lambda email, group: True)
+    monkeypatch.setattr("app.api.v1.endpoints.auth.is_user_in_group", lambda email, group: True)
+
+    for dependency in (get_current_active_user, get_current_user, require_admin, require_solution_architect):
+        app.dependency_overrides[dependency] = lambda: TEST_USER
+    for cache in CACHES.values():
+        cache.invalidate()
+    # The session cookie is https-only
+    test_client = TestClient(app, base_url="https://testserver")
+    test_client.cookies.set("session", session_cookie({"user": {**TEST_USER, "roles": []}}))
+    yield test_client
+    app.dependency_overrides.clear()
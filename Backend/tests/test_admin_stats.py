@@ -0,0 +1,59 @@
+"""
+Admin statistics: counts computed across a catalog write are not cached,
+and trend ranges accept timezone-aware timestamps.
+"""
+from datetime import datetime
+from app.changes import Change, publish
+from app.crud import stats as crud_stats
+
+API = "/api/v1"
+
+
+def test_counts_computed_across_a_write_are_not_cached(engine, client, monkeypatch):
+    crud_stats.stats_cache.invalidate()
+    counts = crud_stats.get_entity_counts
+
+    def counts_then_write(db):
+        result = counts(db)
+        # A brand is committed while the counts are on their way back
+        publish([Change(entity="brands", key="b-1", op="create", refs={})])
+        return result
+
+    monkeypatch.setattr(crud_stats, "get_entity_counts", counts_then_write)
+    assert client.get(f"{API}/admin/stats").status_code == 200
+    assert crud_stats.stats_cache.get("summary", None) is None
+
+    monkeypatch.setattr(crud_stats, "get_entity_counts", counts)
+    first = client.get(f"{API}/admin/stats").json()
+    assert crud_stats.stats_cache.get("summary", None) == first
+
+
+def test_trends_accept_timezone_aware_range(engine, client, monkeypatch):
+    queried = []
+
+    def query_trends(db, entity, period, group_by, since, until):
+        # The real query uses date_trunc, which SQLite does not have
+        queried.append((since, until))
+        return {}
+
+    monkeypatch.setattr(crud_stats, "_query_trends", query_trends)
+    crud_stats.trends_cache.invalidate()
+
+    response = client.get(f"{API}/admin/stats/trends", params={"period": "day", "since": "2026-01-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert response.json()["buckets"][0]["period_start"] == "2026-01-01T00:00:00"
+
+    response = client.get(f"{API}/admin/stats/trends", params={
+        "period": "day", "since": "2026-01-01T01:00:00+02:00", "until": "2026-01-02T00:00:00Z",
+    })
+    assert response.status_code == 200
+    assert [bucket["period_start"] for bucket in response.json()["buckets"]] == [
+        "2025-12-31T00:00:00", "2026-01-01T00:00:00",
+    ]
+    # Jan 1 is closed and was cached by the first request
+    assert queried[-1] == (datetime(2025, 12, 31), datetime(2026, 1, 1))
+
+    response = client.get(f"{API}/admin/stats/trends", params={
+        "since": "2026-01-02T00:00:00+01:00", "until": "2026-01-01T23:00:00",
+    })
+    assert response.status_code == 400
@@ -0,0 +1,58 @@
+"""
+/batch runs GET sub-requests in-process; streaming routes are refused and
+slow sub-requests time out without holding up the batch.
+"""
+import time
+from sqlalchemy import select
+from benchmarks.catalog import CatalogSpec, load
+from app.config import get_settings
+from app.models import Offering
+
+API = "/api/v1"
+SPEC = CatalogSpec(
+    offerings=2, products_per_brand=1, offerings_per_product=1, activities_per_product=3,
+    activities_per_offering=3, staffing_per_activity=2, countries=2, bands=1, wbs=2, text_words=3,
+)
+
+
+def _offering_id(engine) -> str:
+    load(engine, SPEC)
+    with engine.connect() as connection:
+        return str(connection.scalars(select(Offering.offering_id).limit(1)).first())
+
+
+def test_sub_requests_keep_their_own_status(engine, client):
+    offering_id = _offering_id(engine)
+    response = client.post(f"{API}/batch", json={"requests": [
+        {"id": "ok", "path": f"{API}/offerings/{offering_id}"},
+        {"id": "missing", "path": f"{API}/offerings/00000000-0000-0000-0000-000000000000"},
+        {"id": "outside", "path": "/health"},
+    ]})
+    assert response.status_code == 200
+    statuses = {item["id"]: item["status"] for item in response.json()["responses"]}
+    assert statuses == {"ok": 200, "missing": 404, "outside": 400}
+
+
+def test_streaming_route_is_rejected(engine, client):
+    started = time.monotonic()
+    response = client.post(f"{API}/batch", json={"requests": [{"path": f"{API}/events"}]})
+    assert time.monotonic() - started < 2
+    [item] = response.json()["responses"]
+    assert item["status"] == 400
+    assert "Streaming" in item["body"]["detail"]
+
+
+def test_slow_sub_request_times_out(engine, client, monkeypatch):
+    # Let the event stream through so it stands in for any sub-request that never finishes
+    monkeypatch.setattr("app.batch.STREAMING_PATHS", set())
+    monkeypatch.setattr(get_settings(), "BATCH_ITEM_TIMEOUT_SECONDS", 0.3)
+    offering_id = _offering_id(engine)
+
+    started = time.monotonic()
+    response = client.post(f"{API}/batch", json={"requests": [
+        {"id": "stream", "path": f"{API}/events"},
+        {"id": "ok", "path": f"{API}/offerings/{offering_id}"},
+    ]})
+    assert time.monotonic() - started < 2
+    statuses = {item["id"]: item["status"] for item in response.json()["responses"]}
+    assert statuses == {"stream": 504, "ok": 200}
@@ -0,0 +1,81 @@
+"""
+The SSE broker resumes clients from Last-Event-ID, resets clients it can no
+longer resume, and forgets clients that disconnect.
+"""
+import asyncio
+import pytest
+from app.changes import Change
+from app.events import RESET, EventBroker
+from app import events
+
+
+def _changes(count: int, start: int = 1):
+    return [Change(entity="offerings", key=str(i), op="update", refs={}) for i in range(start, start + count)]
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = EventBroker(buffer_size=5, queue_size=3)
+    monkeypatch.setattr(events, "broker", broker)
+    return broker
+
+
+def test_last_event_id_resumes_from_the_buffer(broker):
+    broker.publish(_changes(3))
+
+    async def main():
+        _, backlog = broker.connect(broker.event_id(1))
+        assert [event.payload["id"] for event in backlog] == ["2", "3"]
+        assert broker.connect(broker.event_id(3))[1] == []
+        assert broker.connect(None)[1] == []
+        # Another worker's or a previous run's id cannot be resumed
+        assert broker.connect("0-1")[1] == [RESET]
+        assert broker.connect(broker.event_id(99))[1] == [RESET]
+
+        broker.publish(_changes(5, start=4))  # the buffer now starts at seq 4
+        assert broker.connect(broker.event_id(1))[1] == [RESET]
+        _, backlog = broker.connect(broker.event_id(3))
+        assert [event.seq for event in backlog] == [4, 5, 6, 7, 8]
+
+    asyncio.run(main())
+
+
+def test_client_that_falls_behind_gets_a_reset(broker):
+    async def main():
+        stream = events.stream(None)
+        assert (await stream.__anext__()).startswith("retry:")
+        broker.publish(_changes(2))
+        await asyncio.sleep(0)
+        assert '"id":"1"' in await stream.__anext__()
+
+        # More than the client queue holds arrive before the client reads
+        broker.publish(_changes(5, start=3))
+        await asyncio.sleep(0)
+        frame = await stream.__anext__()
+        assert frame.startswith(f"id: {broker.event_id(7)}\nevent: reset\n")
+        broker.publish(_changes(1, start=8))
+        await asyncio.sleep(0)
+        assert f"id: {broker.event_id(8)}\nevent: change\n" in await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_disconnect_removes_the_client(broker):
+    async def main():
+        stream = events.stream(None)
+        await stream.__anext__()
+        assert broker.client_count == 1
+
+        # The server cancels the response task when the client goes away
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert broker.client_count == 0
+
+        broker.publish(_changes(1))
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
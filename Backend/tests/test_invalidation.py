@@ -0,0 +1,18 @@
+"""
+The LISTEN connection lives outside the application pool.
+"""
+from sqlalchemy.pool import NullPool
+from app.changes import Change
+from app.invalidation import InvalidationListener, decode, encode
+
+
+def test_listener_uses_its_own_unpooled_engine(engine):
+    listener = InvalidationListener(engine, "catalog_changes")
+    assert listener.engine is not engine
+    assert isinstance(listener.engine.pool, NullPool)
+    assert listener.engine.url == engine.url
+
+
+def test_own_notifications_are_skipped():
+    [payload] = encode([Change(entity="offerings", key="1", op="update", refs={})])
+    assert decode(payload) is None
@@ -0,0 +1,115 @@
+"""
+Job params are validated at submit time, the queue bound holds under
+concurrent submits, jobs of a vanished worker are failed from any host,
+and pricing imports upsert.
+"""
+from datetime import datetime, timedelta
+import asyncio
+import threading
+import uuid
+import pytest
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.invalidation import worker_id
+from app.jobs import JobContext, JobQueueFull, JobRunner
+from app.job_types import import_pricing
+from app.models.job import Job
+from app.models.pricing import PricingDetail
+
+API = "/api/v1"
+
+
+@pytest.mark.parametrize("job_type, params", [
+    ("reprice", {}),
+    ("reprice", {"percent": "abc"}),
+    ("reprice", {"percent": 5, "column": "margin"}),
+    ("delete_brand", {"brand_id": "not-a-uuid"}),
+    ("import_pricing", {"rows": [{"country": "US"}]}),
+    ("export_catalog", {"unexpected": 1}),
+])
+def test_invalid_params_are_rejected_at_submit(client, job_type, params):
+    response = client.post(f"{API}/jobs", json={"job_type": job_type, "params": params})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"]
+
+
+def test_concurrent_submits_do_not_overfill_the_queue(engine, monkeypatch):
+    runner = JobRunner(workers=0, queue_size=1)
+    # SQLite shares one connection between threads; keep the inserts apart
+    insert_lock = threading.Lock()
+    insert = runner._insert
+
+    def serialized_insert(*args):
+        with insert_lock:
+            return insert(*args)
+
+    monkeypatch.setattr(runner, "_insert", serialized_insert)
+
+    async def main():
+        runner.start()
+        sessions = [SessionLocal(), SessionLocal()]
+        try:
+            return await asyncio.gather(
+                *(runner.submit(db, "export_catalog", {}, "test@example.com") for db in sessions),
+                return_exceptions=True,
+            )
+        finally:
+            for db in sessions:
+                db.close()
+
+    results = asyncio.run(main())
+    accepted = [r for r in results if isinstance(r, Job)]
+    assert len(accepted) == 1
+    assert any(isinstance(r, JobQueueFull) for r in results)
+
+    with SessionLocal() as db:
+        statuses = dict(db.execute(select(Job.job_id, Job.status).where(Job.job_type == "export_catalog")).all())
+    assert statuses[accepted[0].job_id] == "queued"
+    rejected = [status for job_id, status in statuses.items() if job_id != accepted[0].job_id]
+    assert rejected[-1] == "failed"
+
+
+def test_jobs_of_a_vanished_worker_are_failed_on_any_host(engine):
+    now = datetime.utcnow()
+    long_ago = now - timedelta(minutes=10)
+    jobs = {
+        "replaced_pod": Job(job_type="export_catalog", status="running", worker="old-pod-7f9c:1", heartbeat_on=long_ago),
+        "live_elsewhere": Job(job_type="export_catalog", status="queued", worker="new-pod-2b1d:1", heartbeat_on=now),
+        "before_heartbeats": Job(job_type="export_catalog", status="queued", worker="old-pod-7f9c:1", created_on=long_ago),
+        "finished": Job(job_type="export_catalog", status="succeeded", worker="old-pod-7f9c:1", heartbeat_on=long_ago),
+        "ours": Job(job_type="export_catalog", status="running", worker=worker_id(), heartbeat_on=long_ago),
+    }
+    with SessionLocal() as db:
+        db.add_all(jobs.values())
+        db.commit()
+        ids = {name: job.job_id for name, job in jobs.items()}
+
+    runner = JobRunner(workers=0, queue_size=1)
+    runner.heartbeat()  # renews only this worker's lease
+    assert runner.recover() == 2
+
+    with SessionLocal() as db:
+        statuses = {name: db.get(Job, job_id).status for name, job_id in ids.items()}
+    assert statuses == {
+        "replaced_pod": "failed", "live_elsewhere": "queued", "before_heartbeats": "failed",
+        "finished": "succeeded", "ours": "running",
+    }
+
+
+def test_import_pricing_upserts(engine, monkeypatch):
+    context = JobContext(JobRunner(workers=0, queue_size=1), uuid.uuid4(), {"rows": [
+        {"country": "ZZ", "role": "Architect", "band": 7, "cost": "100.00", "sale_price": "150.00"},
+        {"country": "ZZ", "role": "Developer", "band": 6, "cost": "80.00", "sale_price": "120.00"},
+    ]})
+    # Progress writes open a session of their own, which on the shared SQLite
+    # connection would roll back the import in flight
+    monkeypatch.setattr(context, "progress", lambda *args, **kwargs: None)
+    with SessionLocal() as db:
+        assert import_pricing(db, context) == {"rows_imported": 2}
+    context.params["rows"][0]["sale_price"] = "175.00"
+    with SessionLocal() as db:
+        import_pricing(db, context)
+        rows = db.execute(
+            select(PricingDetail.role, PricingDetail.sale_price).where(PricingDetail.country == "ZZ")
+        ).all()
+    assert sorted((role, float(price)) for role, price in rows) == [("Architect", 175.0), ("Developer", 120.0)]
@@ -0,0 +1,108 @@
+"""
+Log records are sampled per call site, capped per second, stamped with the
+request and trace IDs and written as JSON off the calling thread.
+"""
+import io
+import json
+import logging
+import queue
+import sys
+import pytest
+from app.config import get_settings
+from app.log_pipeline import JsonFormatter, LogPipeline, PipelineHandler, RateLimiter, SiteSampler
+from app.metrics import LOG_RECORDS_DROPPED
+from app import tracing
+
+
+def _record(name="app.auth.permissions", level=logging.INFO, lineno=52, msg="Admin access granted"):
+    return logging.LogRecord(name, level, "permissions.py", lineno, msg, None, None)
+
+
+@pytest.fixture
+def log_settings(monkeypatch):
+    current = get_settings()
+    monkeypatch.setattr(current, "LOG_SAMPLE_BURST", 3)
+    monkeypatch.setattr(current, "LOG_SAMPLE_EVERY", 5)
+    monkeypatch.setattr(current, "LOG_SAMPLE_WINDOW_SECONDS", 60.0)
+    monkeypatch.setattr(current, "LOG_MAX_PER_SECOND", 5)
+    return current
+
+
+def test_repeated_info_is_sampled_per_call_site(log_settings):
+    sampler = SiteSampler()
+    records = [_record() for _ in range(20)]
+    kept = [record for record in records if sampler.filter(record)]
+
+    # the burst, then every 5th of the remaining 17
+    assert kept == records[:3] + [records[7], records[12], records[17]]
+    assert [getattr(record, "suppressed", 0) for record in kept] == [0, 0, 0, 4, 4, 4]
+    assert sampler.filter(_record(lineno=81))
+    assert all(sampler.filter(_record(level=logging.WARNING)) for _ in range(10))
+    assert all(sampler.filter(_record(name="uvicorn.access")) for _ in range(10))
+
+
+def test_volume_is_capped_per_second(log_settings, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.log_pipeline.time.monotonic", lambda: now[0])
+    limiter = RateLimiter()
+    dropped_before = LOG_RECORDS_DROPPED.collect().get(("rate_limited",), 0)
+
+    kept = [limiter.filter(_record(level=logging.ERROR)) for _ in range(12)]
+    assert kept.count(True) == 5
+    assert LOG_RECORDS_DROPPED.collect()[("rate_limited",)] - dropped_before == 7
+
+    now[0] += 1.0
+    record = _record()
+    assert limiter.filter(record)
+    assert record.rate_limited == 7
+
+
+def test_records_carry_request_context_as_json():
+    handler = PipelineHandler(queue.Queue())
+    token = tracing._current_trace.set(tracing.Trace("ab" * 16, "req-1", False))
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("app.x", logging.ERROR, "x.py", 1, "failed for %s", ("a@b.c",), None)
+            record.exc_info = sys.exc_info()
+            record.offering_id = "o-1"
+            handler.handle(record)
+    finally:
+        tracing._current_trace.reset(token)
+
+    entry = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert entry["message"] == "failed for a@b.c"
+    assert entry["request_id"] == "req-1"
+    assert entry["trace_id"] == "ab" * 16
+    assert entry["offering_id"] == "o-1"
+    assert "ValueError: boom" in entry["exc"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = PipelineHandler(queue.Queue(maxsize=1))
+    dropped_before = LOG_RECORDS_DROPPED.collect().get(("queue_full",), 0)
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.collect()[("queue_full",)] - dropped_before == 1
+
+
+def test_stop_with_a_full_queue_writes_everything():
+    pipeline = LogPipeline()
+    output = io.StringIO()
+    pipeline.handler = PipelineHandler(queue.Queue(maxsize=2))
+    pipeline._output = logging.StreamHandler(output)
+    pipeline._start()
+    for _ in range(50):
+        pipeline.handler.queue.put(_record())
+
+    pipeline.stop()
+    assert output.getvalue().count("Admin access granted") == 50
+    assert pipeline.listener._thread is None
+
+
+def test_request_id_is_returned(client):
+    response = client.get("/health", headers={"X-Request-Id": "lb-1234"})
+    assert response.headers["X-Request-Id"] == "lb-1234"
+    assert len(client.get("/health").headers["X-Request-Id"]) == 16
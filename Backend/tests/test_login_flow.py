@@ -0,0 +1,56 @@
+"""
+The full login flow against the local AppID and bluepages stand-ins.
+"""
+from urllib.parse import urlsplit
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.mock_idp import CLIENT_ID, CLIENT_SECRET, BackgroundServer, MockConfig, MockServices
+from app.auth.ibm_auth import get_oauth
+from app.config import get_settings
+
+FRONTEND_URL = "https://frontend.test"
+
+
+@pytest.fixture(scope="module")
+def mock_server():
+    server = BackgroundServer(MockServices(MockConfig(groups={"Solution_Architect"}, key_bits=1024))).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def login_client(mock_server, monkeypatch):
+    from app.main import app
+    for key, value in {
+        "IBM_CLIENT_ID": CLIENT_ID, "IBM_CLIENT_SECRET": CLIENT_SECRET,
+        "IBM_DISCOVERY_ENDPOINT": mock_server.discovery_endpoint,
+        "BLUEPAGES_URL": mock_server.bluepages_url,
+        "FRONTEND_URL": FRONTEND_URL,
+    }.items():
+        monkeypatch.setenv(key, value)
+    get_settings.cache_clear()
+    get_oauth.cache_clear()
+    yield TestClient(app, base_url="https://testserver", follow_redirects=False)
+    get_settings.cache_clear()
+    get_oauth.cache_clear()
+
+
+def test_login_callback_creates_session(login_client):
+    response = login_client.get("/api/v1/login")
+    assert response.status_code == 302
+
+    authorize = httpx.get(response.headers["location"] + "&login_hint=ada%40example.com")
+    callback = urlsplit(authorize.headers["location"])
+    response = login_client.get(f"{callback.path}?{callback.query}")
+    assert response.headers["location"] == f"{FRONTEND_URL}/catalog"
+
+    user = login_client.get("/api/v1/me").json()["user"]
+    assert user["email"] == "ada@example.com"
+    assert "Solution_Architect" in user["roles"]
+
+
+def test_callback_with_unknown_state_restarts_login(login_client):
+    response = login_client.get("/api/v1/callback?code=nope&state=unknown")
+    assert response.status_code == 302
+    assert response.headers["location"] == "/api/v1/login"
@@ -0,0 +1,60 @@
+"""
+The event-loop monitor catches a blocking call inside an async route and
+attributes it to that route and call site.
+"""
+import asyncio
+import time
+import pytest
+from app.config import get_settings
+from app.loop_monitor import LoopMonitor, LoopMonitorMiddleware
+
+
+@pytest.fixture
+def fast_settings(monkeypatch):
+    current = get_settings()
+    monkeypatch.setattr(current, "LOOP_MONITOR_ENABLED", True)
+    monkeypatch.setattr(current, "LOOP_MONITOR_INTERVAL_MS", 10)
+    monkeypatch.setattr(current, "LOOP_BLOCK_THRESHOLD_MS", 50)
+    monkeypatch.setattr(current, "LOOP_BLOCK_LOG_INTERVAL", 0)
+
+
+def blocking_lookup():
+    time.sleep(0.3)
+
+
+def test_blocking_call_is_attributed_to_route(fast_settings, monkeypatch, caplog):
+    monitor = LoopMonitor()
+    monkeypatch.setattr("app.loop_monitor.loop_monitor", monitor)
+
+    async def endpoint(scope, receive, send):
+        blocking_lookup()
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/slow"}
+        await asyncio.create_task(LoopMonitorMiddleware(endpoint)(scope, None, None))
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(main())
+
+    [block] = monitor.top()
+    assert block["route"] == "GET /api/v1/slow"
+    assert "blocking_lookup" in block["site"]
+    assert block["max_ms"] >= 200
+    assert "time.sleep(0.3)" in block["stack"]
+    assert "Event loop blocked" in caplog.text
+
+
+def test_short_awaits_are_not_reported(fast_settings):
+    monitor = LoopMonitor()
+
+    async def main():
+        monitor.start()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        await monitor.stop()
+
+    asyncio.run(main())
+    assert monitor.top() == []
@@ -0,0 +1,76 @@
+"""
+/metrics needs a bearer token unless explicitly opened, and exited workers'
+snapshots are folded into one file instead of piling up.
+"""
+import json
+import os
+import pytest
+from app.config import get_settings
+from app import metrics
+
+DEAD_PID = 2 ** 22 + 1  # above the default pid_max, so never a live process
+
+
+@pytest.fixture
+def multiproc_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "METRICS_MULTIPROC_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_metrics_require_a_token_by_default(client, monkeypatch):
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(get_settings(), "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+
+def test_metrics_can_be_opened_for_local_use(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "METRICS_ALLOW_UNAUTHENTICATED", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_pool_counts_are_counters(engine, monkeypatch):
+    monkeypatch.setattr("app.database._engine", engine)
+    stats = {"checked_out": 1, "checked_in": 2, "overflow": 0, "checkouts": 42, "timeouts": 3}
+    monkeypatch.setattr("app.database.get_pool_stats", lambda db_engine=None: stats)
+    text = metrics.render()
+    assert "# TYPE db_pool_checkouts_total counter" in text
+    assert 'db_pool_checkouts_total{engine="primary"} 42' in text
+    assert 'db_pool_timeouts_total{engine="primary"} 3' in text
+    assert 'db_pool_connections{engine="primary",state="checked_out"} 1' in text
+
+
+def _write_worker_snapshot(directory, pid, requests, latency_count, in_flight):
+    content = {"pid": pid, "metrics": {
+        "http_requests_total": [[["GET", "/x", "200"], requests]],
+        "http_request_duration_seconds": [[["GET", "/x"], [latency_count] + [0] * 11 + [0.005 * latency_count]]],
+        "http_requests_in_flight": [[["GET", "/x"], in_flight]],
+    }}
+    (directory / f"metrics_{pid}.json").write_text(json.dumps(content))
+
+
+def test_exited_workers_are_folded_into_one_snapshot(multiproc_dir):
+    before = metrics._collect_all()
+    requests_before = before["http_requests_total"].get(("GET", "/x", "200"), 0)
+    fastest_before = before["http_request_duration_seconds"].get(("GET", "/x"), [0])[0]
+
+    for pid in (DEAD_PID, DEAD_PID + 1):
+        _write_worker_snapshot(multiproc_dir, pid, requests=3, latency_count=3, in_flight=2)
+        metrics.retire_snapshot(pid)
+    assert sorted(os.listdir(multiproc_dir)) == [metrics.EXITED_SNAPSHOT]
+
+    merged = metrics._collect_all()
+    assert merged["http_requests_total"][("GET", "/x", "200")] - requests_before == 6
+    assert merged["http_request_duration_seconds"][("GET", "/x")][0] - fastest_before == 6
+    assert ("GET", "/x") not in merged["http_requests_in_flight"]
+
+
+def test_stale_snapshots_are_retired_at_startup(multiproc_dir):
+    _write_worker_snapshot(multiproc_dir, DEAD_PID, requests=1, latency_count=1, in_flight=0)
+    metrics.write_snapshot()
+    metrics.retire_stale_snapshots()
+    assert sorted(os.listdir(multiproc_dir)) == [f"metrics_{os.getpid()}.json", metrics.EXITED_SNAPSHOT]
@@ -0,0 +1,70 @@
+"""
+Administrators can profile a single request with the X-Profile header.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from benchmarks.catalog import CatalogSpec, load
+from app.models import Offering
+from app import profiling
+
+SPEC = CatalogSpec(
+    offerings=2, products_per_brand=1, offerings_per_product=1, activities_per_product=3,
+    activities_per_offering=3, staffing_per_activity=2, countries=2, bands=1, wbs=2, text_words=3,
+)
+
+
+def _offering_id(engine) -> str:
+    load(engine, SPEC)
+    with engine.connect() as connection:
+        return str(connection.scalars(select(Offering.offering_id).limit(1)).first())
+
+
+def test_profiled_request_records_stacks_and_sql(engine, client):
+    offering_id = _offering_id(engine)
+    response = client.get(f"/api/v1/totalHoursAndPrices/{offering_id}", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    summary = client.get(f"/api/v1/admin/profiles/{profile_id}").json()
+    assert summary["route"] == "/api/v1/totalHoursAndPrices/{offering_id}"
+    assert summary["db"]["statements"] >= 1
+    assert summary["db"]["top"][0]["statement"].startswith("SELECT")
+    assert summary["allocations"] is None
+
+    folded = client.get(f"/api/v1/admin/profiles/{profile_id}/folded")
+    assert folded.status_code == 200
+    for line in folded.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+    assert profile_id in [p["id"] for p in client.get("/api/v1/admin/profiles").json()]
+
+
+def test_memory_profile_includes_allocations(engine, client):
+    offering_id = _offering_id(engine)
+    response = client.get(f"/api/v1/offerings/{offering_id}?__profile=memory")
+    summary = client.get(f"/api/v1/admin/profiles/{response.headers['X-Profile-Id']}").json()
+    assert summary["allocations"]["peak_bytes"] > 0
+
+
+def test_unflagged_and_non_admin_requests_are_not_profiled(engine, client):
+    from app.main import app
+    from app.auth.permissions import require_admin
+    from fastapi import HTTPException
+
+    offering_id = _offering_id(engine)
+    response = client.get(f"/api/v1/offerings/{offering_id}")
+    assert "X-Profile-Id" not in response.headers
+    assert not event.contains(Engine, "before_cursor_execute", profiling._before_cursor_execute)
+
+    def not_admin():
+        raise HTTPException(status_code=403)
+
+    app.dependency_overrides[require_admin] = not_admin
+    response = client.get(f"/api/v1/offerings/{offering_id}", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_unknown_profile_is_404(client):
+    assert client.get("/api/v1/admin/profiles/0123456789abcdef").status_code == 404
@@ -0,0 +1,227 @@
+"""
+Every API route must issue the same number of SQL statements whatever the
+size of the catalog. Each case runs against a small and a larger fixture
+catalog; a growing statement count is an N+1 and the failure lists the
+statement shapes responsible.
+"""
+from collections import Counter
+from typing import Callable, Dict, NamedTuple, Optional
+import pytest
+from sqlalchemy import select
+from benchmarks.catalog import CatalogSpec, load
+from app.api.v1.api import api_router
+from app.cache import CACHES
+from app.models import (
+    Activity, ActivityWBS, Brand, Country, Offering, OfferingActivity, StaffingDetail, WBS,
+)
+
+API = "/api/v1"
+
+# Every relationship fans out further in LARGE than in SMALL
+SMALL = CatalogSpec(
+    offerings=2, products_per_brand=1, offerings_per_product=1, activities_per_product=2,
+    activities_per_offering=2, staffing_per_activity=1, countries=2, bands=1, wbs=3, text_words=3,
+)
+LARGE = CatalogSpec(
+    offerings=8, products_per_brand=2, offerings_per_product=2, activities_per_product=6,
+    activities_per_offering=5, staffing_per_activity=3, countries=3, bands=2, wbs=6, text_words=3,
+)
+
+
+class Case(NamedTuple):
+    method: str
+    path: str                                  # route path, formatted with the fixture ids
+    body: Optional[Callable[[Dict], Dict]] = None
+    params: Optional[Dict[str, str]] = None    # path parameter -> fixture id, where not the same name
+
+
+CASES = [
+    Case("GET", "/user"),
+    Case("GET", "/me"),
+    Case("GET", "/logout"),
+    Case("POST", "/logout"),
+    Case("GET", "/validate"),
+    Case("GET", "/check"),
+    Case("GET", "/debug/session"),
+
+    Case("GET", "/countries"),
+    Case("GET", "/countries/{country_id}"),
+    Case("POST", "/countries", lambda ids: {"country_name": "New Country"}),
+    Case("PUT", "/countries/{country_id}", lambda ids: {"country_name": "Renamed Country"}),
+    Case("DELETE", "/countries/{country_id}"),
+
+    Case("GET", "/brands"),
+    Case("GET", "/brands/{brand_id}"),
+    Case("POST", "/brands", lambda ids: {"brand_name": "New Brand"}),
+    Case("PUT", "/brands/{brand_id}", lambda ids: {"description": "Updated"}),
+    Case("DELETE", "/brands/{brand_id}"),
+
+    Case("GET", "/products/all"),
+    Case("GET", "/products?brand_id={brand_id}"),
+    Case("GET", "/products/{product_id}"),
+    Case("POST", "/products", lambda ids: {"product_name": "New Product", "brand_id": ids["brand_id"]}),
+    Case("PUT", "/products/{product_id}", lambda ids: {"description": "Updated"}),
+    Case("DELETE", "/products/{product_id}"),
+
+    Case("GET", "/offerings?product_id={product_id}"),
+    Case("GET", "/offerings/{offering_id}"),
+    Case("GET", "/offerings/search/?query=offering"),
+    Case("POST", "/offerings", lambda ids: {"offering_name": "New Offering", "product_id": ids["product_id"]}),
+    Case("PUT", "/offerings/{offering_id}", lambda ids: {"tag_line": "Updated"}),
+    Case("DELETE", "/offerings/{offering_id}"),
+
+    Case("GET", "/library"),
+    Case("GET", "/library/unassigned"),
+    Case("GET", "/library/{activity_id}"),
+    Case("GET", "/activities?offering_id={offering_id}"),
+    Case("POST", "/library", lambda ids: {"activity_name": "New Activity"}),
+    Case("PUT", "/library/{activity_id}", lambda ids: {"description": "Updated"}),
+    Case("DELETE", "/library/{activity_id}"),
+    Case("POST", "/link", lambda ids: {
+        "offering_id": ids["offering_id"], "activity_id": ids["unlinked_activity_id"], "sequence": 9,
+    }),
+    Case("DELETE", "/unlink?offering_id={offering_id}&activity_id={activity_id}"),
+    Case("PATCH", "/update-sequence?offering_id={offering_id}&activity_id={activity_id}",
+         lambda ids: {"sequence": 3}),
+
+    Case("GET", "/staffingDetails/all"),
+    Case("GET", "/staffingDetails/activity/{activity_id}"),
+    Case("GET", "/staffingDetails/{offering_id}"),
+    Case("GET", "/staffingDetails/detail/{staffing_id}"),
+    Case("POST", "/staffingDetails", lambda ids: {
+        "activity_id": ids["activity_id"], "country": ids["country"], "role": ids["role"],
+        "band": ids["band"], "hours": 10,
+    }),
+    Case("PUT", "/staffingDetails/{staffing_id}", lambda ids: {"hours": 20}),
+    Case("DELETE", "/staffingDetails/{staffing_id}"),
+
+    Case("GET", "/pricing/all"),
+    Case("GET", "/pricing/search?country={country}"),
+    Case("GET", "/pricingDetails?country={country}&role={role}&band={band}"),
+    Case("GET", "/totalHoursAndPrices/{offering_id}"),
+    Case("POST", "/pricingDetails", lambda ids: {"country": "Nowhere", "role": "Tester", "band": 1, "cost": 1, "sale_price": 2}),
+    Case("PUT", "/pricingDetails/{country}/{role}/{band}", lambda ids: {"cost": 99}),
+    Case("DELETE", "/pricingDetails/{country}/{role}/{band}"),
+
+    Case("GET", "/wbs/"),
+    Case("GET", "/wbs/{wbs_id}"),
+    Case("GET", "/wbs/activity/{activity_id}/wbs"),
+    Case("POST", "/wbs/", lambda ids: {"wbs_description": "New WBS"}),
+    Case("PUT", "/wbs/{wbs_id}", lambda ids: {"wbs_weeks": 3}),
+    Case("DELETE", "/wbs/{wbs_id}"),
+    Case("POST", "/wbs/activity/{activity_id}/wbs/{wbs_id}", params={"wbs_id": "unlinked_wbs_id"}),
+    Case("DELETE", "/wbs/activity/{activity_id}/wbs/{wbs_id}"),
+
+    Case("GET", "/admin/stats"),
+    Case("GET", "/admin/db/pool"),
+    Case("GET", "/admin/db/slow-queries"),
+    Case("GET", "/admin/loop/blocks"),
+    Case("GET", "/admin/profiles"),
+
+    Case("GET", "/jobs"),
+    Case("POST", "/batch", lambda ids: {"requests": [
+        {"path": f"{API}/offerings/{ids['offering_id']}"},
+        {"path": f"{API}/activities?offering_id={ids['offering_id']}"},
+        {"path": f"{API}/staffingDetails/{ids['offering_id']}"},
+    ]}),
+]
+
+# Routes that cannot run against the SQLite fixture, and why
+EXCLUDED = {
+    ("GET", "/login"): "redirects to the identity provider",
+    ("GET", "/callback"): "needs an authorization code from the identity provider",
+    ("GET", "/events"): "infinite event stream",
+    ("GET", "/sync"): "PostgreSQL-only SQL (localtimestamp)",
+    ("GET", "/admin/stats/detailed"): "PostgreSQL-only SQL (json_object_agg)",
+    ("GET", "/admin/stats/trends"): "PostgreSQL-only SQL (date_trunc)",
+    ("POST", "/jobs"): "runs on the background job workers",
+    ("GET", "/jobs/{job_id}"): "job rows are not part of the catalog fixture",
+    ("POST", "/jobs/{job_id}/cancel"): "job rows are not part of the catalog fixture",
+    ("GET", "/admin/profiles/{profile_id}"): "in-memory profiles, no SQL",
+    ("GET", "/admin/profiles/{profile_id}/folded"): "in-memory profiles, no SQL",
+}
+
+
+def _fixture_ids(engine) -> Dict:
+    """Ids of the first row of each entity, which has the most related rows in LARGE"""
+    with engine.connect() as connection:
+        first = lambda column: connection.scalars(select(column).limit(1)).first()
+        offering_id = first(Offering.offering_id)
+        linked = OfferingActivity.offering_id == offering_id
+        activity_id = connection.scalars(select(OfferingActivity.activity_id).where(linked)).first()
+        unlinked_activity_id = connection.scalars(
+            select(Activity.activity_id).where(
+                Activity.activity_id.not_in(select(OfferingActivity.activity_id).where(linked))
+            )
+        ).first()
+        activity_wbs = select(ActivityWBS.wbs_id).where(ActivityWBS.activity_id == activity_id)
+        pricing = connection.execute(
+            select(StaffingDetail.country, StaffingDetail.role, StaffingDetail.band)
+            .where(StaffingDetail.activity_id == activity_id)
+        ).first()
+        return {
+            "country_id": first(Country.country_id),
+            "brand_id": first(Brand.brand_id),
+            "product_id": connection.scalars(
+                select(Offering.product_id).where(Offering.offering_id == offering_id)
+            ).first(),
+            "offering_id": offering_id,
+            "activity_id": activity_id,
+            "unlinked_activity_id": unlinked_activity_id,
+            "staffing_id": connection.scalars(
+                select(StaffingDetail.staffing_id).where(StaffingDetail.activity_id == activity_id)
+            ).first(),
+            "wbs_id": connection.scalars(activity_wbs).first(),
+            "unlinked_wbs_id": connection.scalars(select(WBS.wbs_id).where(WBS.wbs_id.not_in(activity_wbs))).first(),
+            "country": pricing.country,
+            "role": pricing.role,
+            "band": pricing.band,
+        }
+
+
+def _statements(engine, client, recorder, spec: CatalogSpec, case: Case) -> Counter:
+    load(engine, spec)
+    ids = {key: str(value) for key, value in _fixture_ids(engine).items()}
+    body = case.body(ids) if case.body else None
+    path = case.path.format(**{**ids, **{name: ids[key] for name, key in (case.params or {}).items()}})
+    for cache in CACHES.values():
+        cache.invalidate()
+    recorder.start()
+    try:
+        response = client.request(case.method, API + path, json=body)
+    finally:
+        statements = recorder.stop()
+    if response.status_code >= 400:
+        pytest.fail(f"{case.method} {path}: {response.status_code} {response.text[:500]}")
+    return statements
+
+
+def _growth_report(small: Counter, large: Counter) -> str:
+    lines = []
+    for shape in sorted(set(small) | set(large), key=lambda s: small[s] - large[s]):
+        if large[shape] != small[shape]:
+            lines.append(f"  {small[shape]} -> {large[shape]}x  {shape[:400]}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: f"{case.method} {case.path}")
+def test_statement_count_is_constant(engine, client, recorder, case):
+    small = _statements(engine, client, recorder, SMALL, case)
+    large = _statements(engine, client, recorder, LARGE, case)
+    if sum(small.values()) != sum(large.values()):
+        pytest.fail(
+            f"{case.method} {case.path} issued {sum(small.values())} statements on the small "
+            f"catalog and {sum(large.values())} on the large one:\n{_growth_report(small, large)}",
+            pytrace=False,
+        )
+
+
+def test_every_route_is_covered():
+    covered = {(case.method, case.path.split("?")[0]) for case in CASES} | set(EXCLUDED)
+    missing = [
+        (method, route.path)
+        for route in api_router.routes
+        for method in route.methods
+        if (method, route.path) not in covered and method != "HEAD"
+    ]
+    assert not missing, f"Add these routes to CASES (or EXCLUDED with a reason): {missing}"
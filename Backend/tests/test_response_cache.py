@@ -0,0 +1,137 @@
+"""
+Catalog reads are served from the response cache until a write invalidates
+one of their tags; deletes that cascade in the database clear everything.
+"""
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.pool import StaticPool
+from benchmarks.catalog import CatalogSpec, load
+from app.config import get_settings
+from app.database import ReplicaHealth
+from app.models import Offering, Product
+from app.response_cache import ResponseCache
+
+API = "/api/v1"
+SPEC = CatalogSpec(
+    offerings=2, products_per_brand=1, offerings_per_product=1, activities_per_product=2,
+    activities_per_offering=2, staffing_per_activity=1, countries=2, bands=1, wbs=2, text_words=3,
+)
+
+
+@pytest.fixture
+def cached(engine, monkeypatch):
+    load(engine, SPEC)
+    monkeypatch.setattr(get_settings(), "RESPONSE_CACHE_ENABLED", True)
+    # A fresh instance, with no recent invalidations
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024 * 1024, ttl=60)
+    monkeypatch.setattr("app.response_cache.response_cache", cache)
+    return cache
+
+
+def _first(engine, column):
+    with engine.connect() as connection:
+        return str(connection.scalars(select(column).limit(1)).first())
+
+
+def test_hit_after_miss(client, cached):
+    first = client.get(f"{API}/brands")
+    second = client.get(f"{API}/brands")
+    assert first.status_code == second.status_code == 200
+    assert "x-cache" not in first.headers
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+    assert second.headers["x-db-queries"] == "0"
+
+
+def test_write_invalidates_only_its_tags(engine, client, cached):
+    with engine.connect() as connection:
+        product_id, brand_id = connection.execute(select(Product.product_id, Product.brand_id).limit(1)).first()
+    client.get(f"{API}/products", params={"brand_id": str(brand_id)})
+    client.get(f"{API}/countries")
+
+    response = client.put(f"{API}/products/{product_id}", json={"product_name": "Renamed product"})
+    assert response.status_code == 200
+
+    products = client.get(f"{API}/products", params={"brand_id": str(brand_id)})
+    assert "x-cache" not in products.headers
+    assert "Renamed product" in {product["product_name"] for product in products.json()}
+    assert client.get(f"{API}/countries").headers["x-cache"] == "HIT"
+
+
+def test_cascading_delete_clears_the_cache(engine, client, cached):
+    offering_id = _first(engine, Offering.offering_id)
+    with engine.connect() as connection:
+        brand_id = connection.scalars(
+            select(Product.brand_id).join(Offering, Offering.product_id == Product.product_id)
+            .where(Offering.offering_id == offering_id)
+        ).first()
+    assert client.get(f"{API}/offerings/{offering_id}").status_code == 200
+    assert client.get(f"{API}/offerings/{offering_id}").headers["x-cache"] == "HIT"
+
+    # The offering goes with its brand without a change of its own
+    assert client.delete(f"{API}/brands/{brand_id}").status_code == 204
+    assert len(cached) == 0
+    assert client.get(f"{API}/offerings/{offering_id}").status_code == 404
+
+
+@pytest.fixture
+def lagging_replica(engine, monkeypatch):
+    """A replica frozen at the current state of the primary"""
+    replica_connection = sqlite3.connect(":memory:", check_same_thread=False)
+    primary_connection = engine.raw_connection()
+    try:
+        primary_connection.driver_connection.backup(replica_connection)
+    finally:
+        primary_connection.close()
+    replica = create_engine("sqlite://", creator=lambda: replica_connection, poolclass=StaticPool)
+    monkeypatch.setattr(get_settings(), "DATABASE_REPLICA_URL", "sqlite://")
+    monkeypatch.setattr("app.database._engine", engine)
+    monkeypatch.setattr("app.database._replica_engine", replica)
+    monkeypatch.setattr("app.database._replica_health", ReplicaHealth(30))
+    yield replica
+    replica.dispose()
+
+
+def test_fill_after_a_write_does_not_cache_replica_lag(engine, client, cached, lagging_replica):
+    with engine.connect() as connection:
+        product_id, brand_id = connection.execute(select(Product.product_id, Product.brand_id).limit(1)).first()
+    url, params = f"{API}/products", {"brand_id": str(brand_id)}
+    reader_cookie = client.cookies.get("session")
+    assert client.get(url, params=params).status_code == 200
+
+    assert client.put(f"{API}/products/{product_id}", json={"product_name": "Renamed product"}).status_code == 200
+
+    # Another user, not pinned to the primary by a recent write of their own
+    client.cookies.clear()
+    client.cookies.set("session", reader_cookie)
+    fill = client.get(url, params=params)
+    assert "x-cache" not in fill.headers
+    assert "Renamed product" in {product["product_name"] for product in fill.json()}
+    hit = client.get(url, params=params)
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.content == fill.content
+
+    # Reads of other tags still go to the replica
+    replica_statements = []
+    event.listen(lagging_replica, "before_cursor_execute", lambda *args: replica_statements.append(args[2]))
+    assert client.get(f"{API}/countries").status_code == 200
+    assert replica_statements
+
+
+def test_response_computed_before_a_write_is_not_stored():
+    cache = ResponseCache(max_bytes=1024, max_entry_bytes=1024, ttl=60)
+    key, tags = ("/api/v1/brands", (), "user"), {"brands"}
+
+    generation = cache.generation(tags)   # cache miss: the endpoint starts reading
+    cache.invalidate_tags({"brands"})     # a write commits meanwhile
+    cache.set(key, b"[stale]", [], tags, generation)
+    assert cache.get(key) is None
+
+    generation = cache.generation(tags)
+    cache.clear()                         # same for a cascading delete
+    cache.set(key, b"[stale]", [], tags, generation)
+    assert cache.get(key) is None
+
+    cache.set(key, b"[fresh]", [], tags, cache.generation(tags))
+    assert cache.get(key).body == b"[fresh]"
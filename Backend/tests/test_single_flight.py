@@ -0,0 +1,72 @@
+"""
+Single-flight runs on a session of its own, so a leader that goes away
+does not break the followers waiting on the shared call.
+"""
+import asyncio
+import threading
+import pytest
+from sqlalchemy import text
+from starlette.requests import Request
+from starlette.concurrency import run_in_threadpool
+from app.single_flight import SingleFlight
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/offerings/x", "headers": []})
+
+
+def test_cancelled_leader_does_not_fail_followers(engine):
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    sessions = []
+
+    def work(db):
+        sessions.append(db)
+        started.set()
+        release.wait(5)
+        return db.execute(text("SELECT 1")).scalar()
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do(_request(), "key", work))
+        await run_in_threadpool(started.wait, 5)
+        follower = asyncio.ensure_future(flight.do(_request(), "key", work))
+        await asyncio.sleep(0)
+
+        # The leader's client disconnects while the query is still running
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await follower
+
+    assert asyncio.run(main()) == 1
+    [db] = sessions
+    assert not db.in_transaction()  # closed by the shared task once it finished
+    assert len(flight) == 0
+
+
+def test_replica_and_primary_callers_do_not_share(engine, monkeypatch):
+    flight = SingleFlight("test")
+    routes = iter([True, False])
+    monkeypatch.setattr("app.single_flight.uses_replica", lambda request: next(routes))
+    release = threading.Event()
+    calls = []
+
+    def work(db):
+        calls.append(db)
+        release.wait(5)
+        return db
+
+    async def main():
+        replica_reader = asyncio.ensure_future(flight.do(_request(), "key", work))
+        while not calls:
+            await asyncio.sleep(0.01)
+        recent_writer = asyncio.ensure_future(flight.do(_request(), "key", work))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(replica_reader, recent_writer)
+
+    replica_result, primary_result = asyncio.run(main())
+    assert replica_result is not primary_result
+    assert len(calls) == 2
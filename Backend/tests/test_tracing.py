@@ -0,0 +1,143 @@
+"""
+Every response carries a trace ID; sampled requests export their spans as OTLP/JSON.
+"""
+import json
+import pytest
+from sqlalchemy import select
+from benchmarks.catalog import CatalogSpec, load
+from benchmarks.mock_idp import BackgroundServer
+from benchmarks.trace_collector import Collector, waterfall
+from app.config import get_settings
+from app.models import Offering
+from app.tracing import exporter
+
+SPEC = CatalogSpec(
+    offerings=2, products_per_brand=1, offerings_per_product=1, activities_per_product=3,
+    activities_per_offering=3, staffing_per_activity=2, countries=2, bands=1, wbs=2, text_words=3,
+)
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def follow_parent(monkeypatch):
+    # A rate too small to sample anything itself, so only the traceparent decides
+    monkeypatch.setattr(get_settings(), "TRACE_SAMPLE_RATE", 1e-12)
+    monkeypatch.setattr(get_settings(), "TRACE_RESPECT_PARENT", True)
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(get_settings(), "TRACE_EXPORTER", "file")
+    monkeypatch.setattr(get_settings(), "TRACE_FILE", str(path))
+    return path
+
+
+def _offering_id(engine) -> str:
+    load(engine, SPEC)
+    with engine.connect() as connection:
+        return str(connection.scalars(select(Offering.offering_id).limit(1)).first())
+
+
+def _exported_spans(path):
+    assert exporter.flush()
+    if not path.exists():
+        return []
+    return [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+def test_sampled_request_exports_nested_spans(engine, client, trace_file, monkeypatch):
+    monkeypatch.setattr(get_settings(), "TRACE_SAMPLE_RATE", 1.0)
+    offering_id = _offering_id(engine)
+
+    response = client.get(f"/api/v1/totalHoursAndPrices/{offering_id}")
+    assert response.status_code == 200
+    trace_id = response.headers["X-Trace-Id"]
+
+    spans = _exported_spans(trace_file)
+    assert {span["traceId"] for span in spans} == {trace_id}
+    [root] = [span for span in spans if "parentSpanId" not in span]
+    assert root["name"] == "GET /api/v1/totalHoursAndPrices/{offering_id}"
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+
+    children = {span["name"]: span for span in spans if span.get("parentSpanId") == root["spanId"]}
+    assert {"single_flight catalog", "serialize"} <= set(children)
+    flight = children["single_flight catalog"]["spanId"]
+    assert any(span["name"] == "db.query" and span["parentSpanId"] == flight for span in spans)
+    for span in spans:
+        assert int(root["startTimeUnixNano"]) <= int(span["startTimeUnixNano"])
+        assert int(span["endTimeUnixNano"]) <= int(root["endTimeUnixNano"])
+
+
+def test_incoming_traceparent_is_continued(engine, client, trace_file, follow_parent):
+    offering_id = _offering_id(engine)
+    response = client.get(
+        f"/api/v1/offerings/{offering_id}",
+        headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+    )
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+
+    spans = _exported_spans(trace_file)
+    [root] = [span for span in spans if span["kind"] == 2]
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+
+
+def test_unsampled_request_gets_id_but_no_spans(engine, client, trace_file, follow_parent):
+    offering_id = _offering_id(engine)
+    first = client.get(f"/api/v1/offerings/{offering_id}")
+    second = client.get(
+        f"/api/v1/offerings/{offering_id}",
+        headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"},
+    )
+    assert len(first.headers["X-Trace-Id"]) == 32
+    assert second.headers["X-Trace-Id"] == TRACE_ID
+    assert _exported_spans(trace_file) == []
+
+
+def test_sampled_traceparent_is_ignored_by_default(engine, client, trace_file):
+    offering_id = _offering_id(engine)
+    response = client.get(
+        f"/api/v1/offerings/{offering_id}",
+        headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+    )
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    assert _exported_spans(trace_file) == []
+
+
+def test_trace_file_is_rolled_over(engine, client, trace_file, monkeypatch):
+    monkeypatch.setattr(get_settings(), "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(get_settings(), "TRACE_FILE_MAX_BYTES", 1)
+    for _ in range(3):
+        client.get("/health")
+        assert exporter.flush()
+
+    rolled = trace_file.with_name(trace_file.name + ".1")
+    assert len(trace_file.read_text().splitlines()) == 1
+    assert len(rolled.read_text().splitlines()) == 1
+
+
+def test_otlp_export_reaches_collector(engine, client, monkeypatch, follow_parent):
+    collector = Collector(quiet=True)
+    server = BackgroundServer(collector).start()
+    monkeypatch.setattr(get_settings(), "TRACE_EXPORTER", "otlp")
+    monkeypatch.setattr(get_settings(), "TRACE_OTLP_ENDPOINT", f"{server.url}/v1/traces")
+    offering_id = _offering_id(engine)
+    try:
+        response = client.get(
+            f"/api/v1/totalHoursAndPrices/{offering_id}",
+            headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+        )
+        assert exporter.flush()
+    finally:
+        server.stop()
+
+    spans = collector.traces[response.headers["X-Trace-Id"]]
+    assert any(span["name"] == "db.query" for span in spans)
+    assert "GET /api/v1/totalHoursAndPrices/{offering_id}" in waterfall(spans)